@@ -51,11 +51,13 @@ class Cadastro(tk.Toplevel):
         if not self._validate_inputs(username, password, confirm):
             return
 
-        if self.db.register_user(username, password):
+        # db é um Storage (projeto_empresa/armazenamento.py): register_user retorna (sucesso, mensagem)
+        success, message = self.db.register_user(username, password)
+        if success:
             tk.messagebox.showinfo("Sucesso", "Conta criada com sucesso!")
             self.destroy()
         else:
-            tk.messagebox.showerror("Erro", "Nome de usuário já existe!")
+            tk.messagebox.showerror("Erro", message)
 
     def _validate_inputs(self, username: str, password: str, confirm: str) -> bool:
         if len(username) < self.config.MIN_USERNAME_LENGTH:
@@ -1,7 +1,8 @@
 import tkinter as tk
 from config import AppConfig, DatabaseConfig
-from db import UserDB
+from armazenamento import create_storage
 from login import LoginScreen
+from executor import get_executor
 
 def main() -> None:
     root = tk.Tk()
@@ -10,9 +11,14 @@ def main() -> None:
         MIN_USERNAME_LENGTH=config.MIN_USERNAME_LENGTH,
         MIN_PASSWORD_LENGTH=config.MIN_PASSWORD_LENGTH
     )
-    db = UserDB(db_config)
+    db = create_storage(db_config)
+    executor = get_executor(root)
     LoginScreen(root, db, config)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        executor.shutdown()
+        db.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
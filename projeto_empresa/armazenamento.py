@@ -0,0 +1,273 @@
+"""Interface comum de armazenamento (usuários e produtos) e seleção do backend.
+
+Backends disponíveis, escolhidos por DatabaseConfig.BACKEND:
+    sqlite  - UserDB (db.py)
+    mongo   - MongoStorage (armazenamento_mongo.py), requer pymongo
+    memoria - MemoryStorage, sem persistência (testes e demonstrações)
+
+Todos devolvem linhas de produto como tuplas na ordem de PRODUCT_COLUMNS e
+publicam os mesmos eventos (eventos.py) após cada escrita; tests/test_armazenamento.py
+confere isso em cada backend. Os programas de login_screen/ e Programa_Empresa/
+também usam create_storage, com o backend mongo.
+"""
+import bisect
+import itertools
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Protocol, runtime_checkable
+from autocomplete import UsernameIndex, fold_case
+from config import DatabaseConfig
+from db import (MAX_PAGE_SIZE, PRODUCT_COLUMNS, PRODUCT_SORT_KEYS, USER_SEARCH_LIMIT,
+                ProductFilter, ProductPage, UserDB, decode_cursor, encode_cursor)
+from eventos import (EventBus, PRODUTO_ATUALIZADO, PRODUTO_EXCLUIDO, PRODUTO_INSERIDO,
+                     PRODUTOS_IMPORTADOS, USUARIO_REGISTRADO)
+from hashing import HashingExecutor, PasswordHasher
+from validacao import validar_usuario
+
+BACKENDS = ('sqlite', 'mongo', 'memoria')
+
+@runtime_checkable
+class Storage(Protocol):
+    """Operações de usuários e produtos que a interface usa, iguais em todos os backends.
+
+    get_product devolve a linha com a versão no fim; update_product, adjust_stock
+    e delete_product retornam (sucesso, mensagem, produto atual ou None).
+    """
+    config: DatabaseConfig
+    events: EventBus
+
+    def register_user(self, username: str, password: str) -> tuple: ...
+    def validate_user(self, username: str, password: str) -> bool: ...
+    def search_users(self, search_term: str) -> list: ...
+    def register_product(self, nome: str, quantidade: int, preco: float) -> bool: ...
+    def register_products(self, produtos: list) -> bool: ...
+    def get_product(self, product_id: int) -> Optional[tuple]: ...
+    def update_product(self, product_id: int, nome: str, quantidade: int, preco: float,
+                       versao: int) -> tuple: ...
+    def adjust_stock(self, product_id: int, delta: int) -> tuple: ...
+    def delete_product(self, product_id: int, versao: Optional[int] = None) -> tuple: ...
+    def iter_products(self, batch_size: int = 1000) -> Iterator[list]: ...
+    def count_products(self, filtro: Optional[ProductFilter] = None) -> int: ...
+    def get_products_page(self, cursor: Optional[str] = None, page_size: int = 50,
+                          sort_key: str = 'data_cadastro', descending: bool = True,
+                          offset: int = 0, filtro: Optional[ProductFilter] = None) -> ProductPage: ...
+    def table_version(self, tabela: str = 'produtos') -> int: ...
+    def get_preference(self, chave: str, padrao=None): ...
+    def set_preference(self, chave: str, valor) -> bool: ...
+    def close(self) -> None: ...
+
+def create_storage(config: DatabaseConfig = DatabaseConfig()) -> Storage:
+    """Cria o backend configurado em config.BACKEND"""
+    if config.BACKEND == 'sqlite':
+        return UserDB(config)
+    if config.BACKEND == 'mongo':
+        # Import tardio: pymongo só é necessário para este backend
+        from armazenamento_mongo import MongoStorage
+        return MongoStorage(config)
+    if config.BACKEND == 'memoria':
+        return MemoryStorage(config)
+    raise ValueError(f"Backend de armazenamento desconhecido: {config.BACKEND}")
+
+def agora() -> str:
+    """Data de cadastro no mesmo formato do CURRENT_TIMESTAMP do SQLite (UTC)"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def sort_value(sort_key: str, value):
+    """Valor usado na ordenação; nome ignora maiúsculas em ASCII, como o índice NOCASE"""
+    return fold_case(value) if sort_key == 'nome' else value
+
+class MemoryStorage:
+    """Backend em memória, com as mesmas regras do SQLite e sem persistência.
+
+    As páginas usam listas ordenadas por chave (refeitas só após escritas) e bisect
+    para posicionar o cursor.
+    """
+
+    def __init__(self, config: DatabaseConfig = DatabaseConfig()):
+        self.config = config
+        self.events = EventBus()
+        self.hash_executor = HashingExecutor(config.HASH_WORKERS) if config.HASH_WORKERS > 0 else None
+        self.hasher = PasswordHasher(config, self.hash_executor)
+        self._users = {}
+        self._username_index = UsernameIndex()
+        self._produtos = {}
+        self._ordens = {}
+        self._preferencias = {}
+        self._versao = 0
+        self._ids_usuario = itertools.count(1)
+        self._ids_produto = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def register_user(self, username: str, password: str) -> tuple:
+        erro = validar_usuario(username, password, self.config)
+        if erro:
+            return (False, erro)
+        hashed_password = self.hasher.hash(password)
+        with self._lock:
+            if username in self._users:
+                return (False, "Nome de usuário já está em uso")
+            self._users[username] = hashed_password
+            self._username_index.add(username)
+        self.events.publish(USUARIO_REGISTRADO, username=username)
+        return (True, "Registro bem-sucedido!")
+
+    def validate_user(self, username: str, password: str) -> bool:
+        with self._lock:
+            encoded = self._users.get(username)
+        if encoded is None or not self.hasher.verify(password, encoded):
+            return False
+        if self.hasher.needs_rehash(encoded):
+            new_hash = self.hasher.hash(password)
+            with self._lock:
+                if self._users.get(username) == encoded:
+                    self._users[username] = new_hash
+        return True
+
+    def search_users(self, search_term: str) -> list:
+        return self._username_index.search(search_term, USER_SEARCH_LIMIT)
+
+    def register_product(self, nome: str, quantidade: int, preco: float) -> bool:
+        with self._lock:
+            produto = self._inserir(nome, quantidade, preco)
+        self.events.publish(PRODUTO_INSERIDO, produto=produto)
+        return True
+
+    def register_products(self, produtos: list) -> bool:
+        with self._lock:
+            for nome, quantidade, preco in produtos:
+                self._inserir(nome, quantidade, preco)
+        self.events.publish(PRODUTOS_IMPORTADOS, total=len(produtos))
+        return True
+
+    def _inserir(self, nome: str, quantidade: int, preco: float) -> tuple:
+        product_id = next(self._ids_produto)
+        self._produtos[product_id] = (product_id, nome, quantidade, preco, agora(), 1)
+        self._alterado()
+        return self._produtos[product_id]
+
+    def _alterado(self) -> None:
+        self._versao += 1
+        self._ordens.clear()
+
+    def get_product(self, product_id: int) -> Optional[tuple]:
+        with self._lock:
+            return self._produtos.get(product_id)
+
+    def update_product(self, product_id: int, nome: str, quantidade: int, preco: float,
+                       versao: int) -> tuple:
+        with self._lock:
+            atual = self._produtos.get(product_id)
+            if atual is None:
+                return (False, "Produto não encontrado", None)
+            if atual[5] != versao:
+                return (False, "Produto foi alterado por outro usuário; confira os dados atuais", atual)
+            produto = self._produtos[product_id] = (product_id, nome, quantidade, preco, atual[4], versao + 1)
+            self._alterado()
+        self.events.publish(PRODUTO_ATUALIZADO, produto=produto)
+        return (True, "Produto atualizado com sucesso!", produto)
+
+    def adjust_stock(self, product_id: int, delta: int) -> tuple:
+        with self._lock:
+            atual = self._produtos.get(product_id)
+            if atual is None:
+                return (False, "Produto não encontrado", None)
+            if atual[2] + delta < 0:
+                return (False, f"Estoque insuficiente (disponível: {atual[2]})", atual)
+            produto = self._produtos[product_id] = (*atual[:2], atual[2] + delta, *atual[3:5], atual[5] + 1)
+            self._alterado()
+        self.events.publish(PRODUTO_ATUALIZADO, produto=produto)
+        return (True, "Estoque ajustado com sucesso!", produto)
+
+    def delete_product(self, product_id: int, versao: Optional[int] = None) -> tuple:
+        with self._lock:
+            atual = self._produtos.get(product_id)
+            if atual is None:
+                return (False, "Produto não encontrado", None)
+            if versao is not None and atual[5] != versao:
+                return (False, "Produto foi alterado por outro usuário; confira os dados atuais", atual)
+            del self._produtos[product_id]
+            self._alterado()
+        self.events.publish(PRODUTO_EXCLUIDO, id=product_id)
+        return (True, "Produto excluído com sucesso!", None)
+
+    def iter_products(self, batch_size: int = 1000):
+        with self._lock:
+            produtos = [self._produtos[product_id][:5] for product_id in sorted(self._produtos)]
+        for inicio in range(0, len(produtos), batch_size):
+            yield produtos[inicio:inicio + batch_size]
+
+    def count_products(self, filtro: Optional[ProductFilter] = None) -> int:
+        with self._lock:
+            if filtro is None:
+                return len(self._produtos)
+            return sum(1 for produto in self._produtos.values() if filtro.matches(produto))
+
+    def _ordem(self, sort_key: str) -> list:
+        """[(valor de ordenação, id)] em ordem crescente; refeita na primeira leitura após uma escrita"""
+        ordem = self._ordens.get(sort_key)
+        if ordem is None:
+            column = PRODUCT_COLUMNS.index(sort_key)
+            ordem = self._ordens[sort_key] = sorted(
+                (sort_value(sort_key, produto[column]), produto[0]) for produto in self._produtos.values()
+            )
+        return ordem
+
+    def get_products_page(self, cursor: Optional[str] = None, page_size: int = 50,
+                          sort_key: str = 'data_cadastro', descending: bool = True,
+                          offset: int = 0, filtro: Optional[ProductFilter] = None) -> ProductPage:
+        if sort_key not in PRODUCT_SORT_KEYS:
+            raise ValueError(f"Chave de ordenação inválida: {sort_key}")
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        with self._lock:
+            ordem = self._ordem(sort_key)
+            if cursor:
+                value, last_id = decode_cursor(cursor, sort_key, descending)
+                chave = (sort_value(sort_key, value), last_id)
+                posicao = bisect.bisect_left(ordem, chave) - 1 if descending else bisect.bisect_right(ordem, chave)
+                offset = 0
+            else:
+                posicao = len(ordem) - 1 if descending else 0
+            passo = -1 if descending else 1
+
+            rows = []
+            while 0 <= posicao < len(ordem) and len(rows) <= page_size:
+                produto = self._produtos[ordem[posicao][1]]
+                posicao += passo
+                if filtro is not None and not filtro.matches(produto):
+                    continue
+                if offset > 0:
+                    offset -= 1
+                    continue
+                rows.append(produto[:5])
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = encode_cursor(last[PRODUCT_COLUMNS.index(sort_key)], last[0], sort_key, descending)
+        return ProductPage(rows, next_cursor)
+
+    def table_version(self, tabela: str = 'produtos') -> int:
+        with self._lock:
+            return self._versao if tabela == 'produtos' else 0
+
+    def get_preference(self, chave: str, padrao=None):
+        with self._lock:
+            valor = self._preferencias.get(chave)
+        return json.loads(valor) if valor is not None else padrao
+
+    def set_preference(self, chave: str, valor) -> bool:
+        try:
+            texto = json.dumps(valor)
+        except (TypeError, ValueError) as e:
+            logging.error(f"Erro ao gravar preferência {chave}: {str(e)}")
+            return False
+        with self._lock:
+            self._preferencias[chave] = texto
+        return True
+
+    def close(self) -> None:
+        if self.hash_executor is not None:
+            self.hash_executor.shutdown()
@@ -0,0 +1,501 @@
+"""Backend MongoDB da interface de armazenamento (ver armazenamento.py).
+
+Coleções: users, produtos, contadores (próximo id e versão de produtos, próximo
+seq de usuários) e preferencias. Produtos usam _id inteiro, como no SQLite, e
+guardam campos derivados para busca e ordenação: nome_ordem (fold_case) e
+termos (palavras sem acento, para a busca por prefixo). Usuários têm um seq
+crescente, usado pelo filtro de nomes (bloom.py); quem não tem recebe um na
+próxima sincronização do filtro. O username_busca (fold_case, para a busca de
+usuários) dos usuários antigos é preenchido ao conectar.
+
+A conexão (import do pymongo, resolução do mongodb+srv e criação dos índices)
+é feita por MongoConnection em segundo plano, para a janela abrir sem esperar;
+só a primeira operação no banco aguarda a conexão ficar pronta.
+"""
+import json
+import logging
+import re
+import threading
+from datetime import date, timedelta
+from typing import Optional
+from config import DatabaseConfig
+from autocomplete import fold_case
+from bloom import UsernameBloom
+from armazenamento import agora, sort_value
+from db import (MAX_PAGE_SIZE, PRODUCT_COLUMNS, PRODUCT_SORT_KEYS, USER_SEARCH_LIMIT,
+                ProductFilter, ProductPage, decode_cursor, encode_cursor, termos_busca)
+from eventos import (EventBus, PRODUTO_ATUALIZADO, PRODUTO_EXCLUIDO, PRODUTO_INSERIDO,
+                     PRODUTOS_IMPORTADOS, USUARIO_REGISTRADO)
+from hashing import HashingExecutor, PasswordHasher
+from validacao import validar_usuario
+
+# Campo do documento para cada chave de ordenação
+SORT_FIELDS = {'id': '_id', 'nome': 'nome_ordem'}
+DUPLICATE_KEY = 11000
+
+def documento_produto(product_id: int, nome: str, quantidade: int, preco: float, data_cadastro: str) -> dict:
+    return {
+        '_id': product_id,
+        'nome': nome,
+        'nome_ordem': fold_case(nome),
+        'termos': termos_busca(nome),
+        'quantidade': quantidade,
+        'preco': preco,
+        'data_cadastro': data_cadastro,
+        'versao': 1,
+    }
+
+def linha_produto(documento: dict, com_versao: bool = False) -> tuple:
+    linha = tuple(documento['_id' if column == 'id' else column] for column in PRODUCT_COLUMNS)
+    return linha + (documento['versao'],) if com_versao else linha
+
+def consulta_filtro(filtro: Optional[ProductFilter]) -> dict:
+    """Traduz o ProductFilter para uma consulta do MongoDB"""
+    if filtro is None:
+        return {}
+    condicoes = [{'termos': {'$regex': f"^{re.escape(palavra)}"}} for palavra in termos_busca(filtro.texto)]
+    for campo, minimo, maximo in (('quantidade', filtro.quantidade_min, filtro.quantidade_max),
+                                  ('preco', filtro.preco_min, filtro.preco_max)):
+        faixa = {}
+        if minimo is not None:
+            faixa['$gte'] = minimo
+        if maximo is not None:
+            faixa['$lte'] = maximo
+        if faixa:
+            condicoes.append({campo: faixa})
+    datas = {}
+    if filtro.data_inicio is not None:
+        datas['$gte'] = filtro.data_inicio
+    if filtro.data_fim is not None:
+        datas['$lt'] = (date.fromisoformat(filtro.data_fim) + timedelta(days=1)).isoformat()
+    if datas:
+        condicoes.append({'data_cadastro': datas})
+    return {'$and': condicoes} if condicoes else {}
+
+def exigir_uri(config: DatabaseConfig) -> str:
+    """URI do MongoDB da configuração; erro claro se MONGODB_URI não foi definida"""
+    if not config.MONGO_URI:
+        raise RuntimeError("Defina a variável de ambiente MONGODB_URI com a URI de conexão do MongoDB")
+    return config.MONGO_URI
+
+def pymongo_client(uri: str, **options):
+    """Fábrica padrão de clientes; o import do pymongo também fica fora do início do programa"""
+    try:
+        import pymongo
+    except ImportError:
+        raise RuntimeError("Backend mongo requer o pacote pymongo") from None
+    return pymongo.MongoClient(uri, **options)
+
+class MongoConnection:
+    """Cria o cliente MongoDB num thread próprio e entrega o banco quando estiver pronto.
+
+    client_factory(uri, **opções) permite trocar o pymongo por um substituto
+    compatível nos testes (ex.: lambda uri, **kw: mongomock.MongoClient()).
+    on_connect(banco) roda no thread de conexão, antes de liberar quem espera.
+    """
+
+    def __init__(self, config: DatabaseConfig, client_factory=None, on_connect=None):
+        if client_factory is None:
+            # Sem URI não há o que conectar: falha aqui, não no thread de conexão
+            exigir_uri(config)
+        self.config = config
+        self.client_factory = client_factory or pymongo_client
+        self.on_connect = on_connect
+        self.client = None
+        self.error = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._connect, name="mongo-connect", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> None:
+        try:
+            client = self.client_factory(self.config.MONGO_URI, **self.config.mongo_options())
+            if self.on_connect is not None:
+                self.on_connect(client[self.config.MONGO_DATABASE])
+            self.client = client
+        except Exception as e:
+            logging.error(f"Erro ao conectar ao MongoDB: {str(e)}")
+            self.error = e
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def database(self):
+        """Banco configurado; espera a conexão até o timeout de seleção de servidor"""
+        if not self._ready.wait(self.config.MONGO_SERVER_SELECTION_TIMEOUT_MS / 1000):
+            raise TimeoutError("Tempo esgotado aguardando a conexão com o MongoDB")
+        if self.client is None:
+            raise RuntimeError(f"Sem conexão com o MongoDB: {self.error}")
+        return self.client[self.config.MONGO_DATABASE]
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout=self.config.MONGO_CONNECT_TIMEOUT_MS / 1000)
+            self._thread = None
+        if self.client is not None:
+            self.client.close()
+
+def numerar_usuarios(database, tabela_usuarios: str) -> int:
+    """Dá um seq aos usuários que não têm (cadastrados antes dele ou por outro programa); retorna quantos"""
+    users = database[tabela_usuarios]
+    ids = [user['_id'] for user in users.find({'seq': None}, {'_id': 1})]
+    if not ids:
+        return 0
+    contador = database['contadores'].find_one_and_update(
+        {'_id': tabela_usuarios}, {'$inc': {'proximo_id': len(ids)}}, upsert=True, return_document=True
+    )
+    for seq, user_id in enumerate(ids, contador['proximo_id'] - len(ids) + 1):
+        # A condição em seq evita renumerar um usuário que outro processo já numerou
+        users.update_one({'_id': user_id, 'seq': None}, {'$set': {'seq': seq}})
+    return len(ids)
+
+def completar_usuarios(database, tabela_usuarios: str) -> int:
+    """Preenche username_busca nos usuários que não têm (gravados pelas versões antigas); retorna quantos"""
+    users = database[tabela_usuarios]
+    total = 0
+    for user in users.find({'username_busca': None}, {'username': 1}):
+        users.update_one({'_id': user['_id']}, {'$set': {'username_busca': fold_case(user['username'])}})
+        total += 1
+    return total
+
+def create_indexes(database, tabela_usuarios: str) -> None:
+    try:
+        database[tabela_usuarios].create_index('username', unique=True)
+        database[tabela_usuarios].create_index('username_busca')
+        database[tabela_usuarios].create_index('seq')
+        for campo in ('data_cadastro', 'nome_ordem', 'quantidade', 'preco'):
+            database['produtos'].create_index([(campo, 1), ('_id', 1)])
+        database['produtos'].create_index('termos')
+    except Exception as e:
+        logging.error(f"Erro ao criar índices no MongoDB: {str(e)}")
+
+class MongoStorage:
+    """Storage sobre MongoDB.
+
+    Com client, usa o cliente informado (o chamador o fecha); sem ele, abre uma
+    MongoConnection em segundo plano com client_factory (pymongo por padrão).
+    """
+
+    def __init__(self, config: DatabaseConfig = DatabaseConfig(), client=None, client_factory=None):
+        self.config = config
+        self.events = EventBus()
+        self.hash_executor = HashingExecutor(config.HASH_WORKERS) if config.HASH_WORKERS > 0 else None
+        self.hasher = PasswordHasher(config, self.hash_executor)
+        self.connection = None
+        self._database = None
+        self._bloom = None
+        if client is not None:
+            self._database = client[config.MONGO_DATABASE]
+            self._on_connect(self._database)
+        else:
+            self.connection = MongoConnection(config, client_factory, on_connect=self._on_connect)
+            self.connection.start()
+
+    def _on_connect(self, database) -> None:
+        create_indexes(database, self.config.TABLE_NAME)
+        try:
+            completar_usuarios(database, self.config.TABLE_NAME)
+        except Exception as e:
+            logging.error(f"Erro ao completar usuários antigos: {str(e)}")
+        if self.config.USERNAME_BLOOM:
+            self._load_username_bloom(database)
+
+    def _load_username_bloom(self, database) -> None:
+        """Filtro de nomes (bloom.py); o marcador é o campo seq, numerado pelo contador da coleção"""
+        users, contadores = database[self.config.TABLE_NAME], database['contadores']
+
+        def carregar_desde(marcador: int) -> list:
+            numerar_usuarios(database, self.config.TABLE_NAME)
+            cursor = users.find({'seq': {'$gt': marcador}}, {'seq': 1, 'username': 1}).sort('seq', 1)
+            return [(user['seq'], user['username']) for user in cursor]
+
+        def marcador_maximo() -> int:
+            contador = contadores.find_one({'_id': self.config.TABLE_NAME})
+            return contador.get('proximo_id', 0) if contador else 0
+
+        try:
+            self._bloom = UsernameBloom(
+                self.config.BLOOM_FILE or f"{self.config.MONGO_DATABASE}.bloom",
+                self.config.BLOOM_CAPACITY, self.config.BLOOM_ERROR_RATE,
+                carregar_desde, marcador_maximo, self.config.BLOOM_SYNC_INTERVAL
+            )
+        except Exception as e:
+            logging.error(f"Erro ao carregar filtro de usuários: {str(e)}")
+
+    @property
+    def database(self):
+        if self._database is None:
+            self._database = self.connection.database()
+        return self._database
+
+    @property
+    def users(self):
+        return self.database[self.config.TABLE_NAME]
+
+    @property
+    def produtos(self):
+        return self.database['produtos']
+
+    @property
+    def contadores(self):
+        return self.database['contadores']
+
+    @property
+    def preferencias(self):
+        return self.database['preferencias']
+
+    def register_user(self, username: str, password: str) -> tuple:
+        try:
+            erro = validar_usuario(username, password, self.config)
+            if erro:
+                return (False, erro)
+            # Nome talvez existente segundo o filtro: confere antes de gastar o hash
+            if self._bloom is not None and self._bloom.might_exist(username):
+                if self.users.find_one({'username': username}, {'_id': 1}):
+                    return (False, "Nome de usuário já está em uso")
+            hashed_password = self.hasher.hash(password)
+            seq = self._reservar_ids(1, self.config.TABLE_NAME)[0]
+            self.users.insert_one({
+                'username': username,
+                'username_busca': fold_case(username),
+                'password': hashed_password,
+                'seq': seq,
+            })
+            if self._bloom is not None:
+                self._bloom.add(username, seq)
+            self.events.publish(USUARIO_REGISTRADO, username=username)
+            return (True, "Registro bem-sucedido!")
+        except Exception as e:
+            if getattr(e, 'code', None) == DUPLICATE_KEY:
+                return (False, "Nome de usuário já está em uso")
+            logging.error(f"Erro crítico no registro: {str(e)}")
+            return (False, f"Erro interno: {str(e)}")
+
+    def validate_user(self, username: str, password: str) -> bool:
+        try:
+            if self._bloom is not None and not self._bloom.might_exist(username):
+                return False
+            user = self.users.find_one({'username': username}, {'password': 1})
+            if not user or not self.hasher.verify(password, user['password']):
+                return False
+            if self.hasher.needs_rehash(user['password']):
+                # A condição no hash antigo evita sobrescrever uma troca de senha concorrente
+                self.users.update_one(
+                    {'username': username, 'password': user['password']},
+                    {'$set': {'password': self.hasher.hash(password)}}
+                )
+            return True
+        except Exception as e:
+            logging.error(f"Erro na validação: {str(e)}")
+            return False
+
+    def search_users(self, search_term: str) -> list:
+        try:
+            cursor = self.users.find(
+                {'username_busca': {'$regex': f"^{re.escape(fold_case(search_term))}"}},
+                {'username': 1}
+            ).sort([('username_busca', 1), ('username', 1)]).limit(USER_SEARCH_LIMIT)
+            return [user['username'] for user in cursor]
+        except Exception as e:
+            logging.error(f"Erro na busca de usuários: {str(e)}")
+            return []
+
+    def _reservar_ids(self, total: int, nome: str = 'produtos') -> range:
+        contador = self.contadores.find_one_and_update(
+            {'_id': nome}, {'$inc': {'proximo_id': total}}, upsert=True, return_document=True
+        )
+        return range(contador['proximo_id'] - total + 1, contador['proximo_id'] + 1)
+
+    def _incrementar_versao(self, alteradas: int) -> None:
+        self.contadores.update_one({'_id': 'produtos'}, {'$inc': {'versao': alteradas}}, upsert=True)
+
+    def register_product(self, nome: str, quantidade: int, preco: float) -> bool:
+        try:
+            documento = documento_produto(self._reservar_ids(1)[0], nome, quantidade, preco, agora())
+            self.produtos.insert_one(documento)
+            self._incrementar_versao(1)
+        except Exception as e:
+            logging.error(f"Erro no cadastro de produto: {str(e)}")
+            return False
+        self.events.publish(PRODUTO_INSERIDO, produto=linha_produto(documento, com_versao=True))
+        return True
+
+    def register_products(self, produtos: list) -> bool:
+        if not produtos:
+            return True
+        try:
+            data_cadastro = agora()
+            ids = self._reservar_ids(len(produtos))
+            self.produtos.insert_many(
+                [documento_produto(product_id, *produto, data_cadastro) for product_id, produto in zip(ids, produtos)],
+                ordered=False
+            )
+            self._incrementar_versao(len(produtos))
+        except Exception as e:
+            logging.error(f"Erro no cadastro de produtos em lote: {str(e)}")
+            return False
+        self.events.publish(PRODUTOS_IMPORTADOS, total=len(produtos))
+        return True
+
+    def get_product(self, product_id: int) -> Optional[tuple]:
+        try:
+            documento = self.produtos.find_one({'_id': product_id})
+            return linha_produto(documento, com_versao=True) if documento else None
+        except Exception as e:
+            logging.error(f"Erro ao buscar produto {product_id}: {str(e)}")
+            return None
+
+    def _resultado_conflito(self, product_id: int) -> tuple:
+        atual = self.get_product(product_id)
+        if atual is None:
+            return (False, "Produto não encontrado", None)
+        return (False, "Produto foi alterado por outro usuário; confira os dados atuais", atual)
+
+    def update_product(self, product_id: int, nome: str, quantidade: int, preco: float,
+                       versao: int) -> tuple:
+        try:
+            documento = self.produtos.find_one_and_update(
+                {'_id': product_id, 'versao': versao},
+                {'$set': {'nome': nome, 'nome_ordem': fold_case(nome), 'termos': termos_busca(nome),
+                          'quantidade': quantidade, 'preco': preco},
+                 '$inc': {'versao': 1}},
+                return_document=True
+            )
+            if documento is None:
+                return self._resultado_conflito(product_id)
+            self._incrementar_versao(1)
+        except Exception as e:
+            logging.error(f"Erro ao atualizar produto {product_id}: {str(e)}")
+            return (False, "Falha ao atualizar produto", None)
+        produto = linha_produto(documento, com_versao=True)
+        self.events.publish(PRODUTO_ATUALIZADO, produto=produto)
+        return (True, "Produto atualizado com sucesso!", produto)
+
+    def adjust_stock(self, product_id: int, delta: int) -> tuple:
+        try:
+            documento = self.produtos.find_one_and_update(
+                {'_id': product_id, 'quantidade': {'$gte': -delta}},
+                {'$inc': {'quantidade': delta, 'versao': 1}},
+                return_document=True
+            )
+            if documento is None:
+                atual = self.get_product(product_id)
+                if atual is None:
+                    return (False, "Produto não encontrado", None)
+                return (False, f"Estoque insuficiente (disponível: {atual[2]})", atual)
+            self._incrementar_versao(1)
+        except Exception as e:
+            logging.error(f"Erro ao ajustar estoque do produto {product_id}: {str(e)}")
+            return (False, "Falha ao ajustar estoque", None)
+        produto = linha_produto(documento, com_versao=True)
+        self.events.publish(PRODUTO_ATUALIZADO, produto=produto)
+        return (True, "Estoque ajustado com sucesso!", produto)
+
+    def delete_product(self, product_id: int, versao: Optional[int] = None) -> tuple:
+        consulta = {'_id': product_id} if versao is None else {'_id': product_id, 'versao': versao}
+        try:
+            if self.produtos.delete_one(consulta).deleted_count != 1:
+                return self._resultado_conflito(product_id)
+            self._incrementar_versao(1)
+        except Exception as e:
+            logging.error(f"Erro ao excluir produto {product_id}: {str(e)}")
+            return (False, "Falha ao excluir produto", None)
+        self.events.publish(PRODUTO_EXCLUIDO, id=product_id)
+        return (True, "Produto excluído com sucesso!", None)
+
+    def iter_products(self, batch_size: int = 1000):
+        cursor = self.produtos.find({}, {column: 1 for column in PRODUCT_COLUMNS if column != 'id'})
+        rows = []
+        for documento in cursor.sort('_id', 1).batch_size(batch_size):
+            rows.append(linha_produto(documento))
+            if len(rows) == batch_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    def count_products(self, filtro: Optional[ProductFilter] = None) -> int:
+        try:
+            consulta = consulta_filtro(filtro)
+            if not consulta:
+                return self.produtos.estimated_document_count()
+            return self.produtos.count_documents(consulta)
+        except Exception as e:
+            logging.error(f"Erro ao contar produtos: {str(e)}")
+            return 0
+
+    def get_products_page(self, cursor: Optional[str] = None, page_size: int = 50,
+                          sort_key: str = 'data_cadastro', descending: bool = True,
+                          offset: int = 0, filtro: Optional[ProductFilter] = None) -> ProductPage:
+        """Paginação por chave, como em UserDB.get_products_page"""
+        if sort_key not in PRODUCT_SORT_KEYS:
+            raise ValueError(f"Chave de ordenação inválida: {sort_key}")
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        campo = SORT_FIELDS.get(sort_key, sort_key)
+        direcao = -1 if descending else 1
+        op = '$lt' if descending else '$gt'
+
+        condicoes = [consulta_filtro(filtro)] if filtro else []
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_key, descending)
+            if campo == '_id':
+                condicoes.append({'_id': {op: last_id}})
+            else:
+                value = sort_value(sort_key, value)
+                condicoes.append({'$or': [{campo: {op: value}}, {campo: value, '_id': {op: last_id}}]})
+            offset = 0
+        condicoes = [condicao for condicao in condicoes if condicao]
+        consulta = {'$and': condicoes} if condicoes else {}
+        ordem = [('_id', direcao)] if campo == '_id' else [(campo, direcao), ('_id', direcao)]
+
+        try:
+            documentos = self.produtos.find(consulta).sort(ordem).skip(offset).limit(page_size + 1)
+            rows = [linha_produto(documento) for documento in documentos]
+        except Exception as e:
+            logging.error(f"Erro ao paginar produtos: {str(e)}")
+            return ProductPage()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = encode_cursor(last[PRODUCT_COLUMNS.index(sort_key)], last[0], sort_key, descending)
+        return ProductPage(rows, next_cursor)
+
+    def table_version(self, tabela: str = 'produtos') -> int:
+        try:
+            contador = self.contadores.find_one({'_id': tabela})
+            return contador.get('versao', 0) if contador else 0
+        except Exception as e:
+            logging.error(f"Erro ao ler versão da tabela {tabela}: {str(e)}")
+            return -1
+
+    def get_preference(self, chave: str, padrao=None):
+        try:
+            documento = self.preferencias.find_one({'_id': chave})
+            return json.loads(documento['valor']) if documento else padrao
+        except Exception as e:
+            logging.error(f"Erro ao ler preferência {chave}: {str(e)}")
+            return padrao
+
+    def set_preference(self, chave: str, valor) -> bool:
+        try:
+            self.preferencias.update_one({'_id': chave}, {'$set': {'valor': json.dumps(valor)}}, upsert=True)
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao gravar preferência {chave}: {str(e)}")
+            return False
+
+    def close(self) -> None:
+        if self.hash_executor is not None:
+            self.hash_executor.shutdown()
+        if self.connection is not None:
+            self.connection.close()
+        if self._bloom is not None:
+            self._bloom.close()
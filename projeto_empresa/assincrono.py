@@ -0,0 +1,222 @@
+"""API assíncrona (asyncio) de usuários e produtos.
+
+AsyncUserDB envolve o UserDB síncrono: escritas passam por um único thread
+escritor, para o SQLite não disputar o lock de escrita entre threads, e
+leituras e hashes de senha rodam num pool de leitores, que no modo WAL não
+bloqueiam o escritor. AsyncMongoUserDB usa o driver assíncrono (motor) sobre as
+mesmas coleções de armazenamento_mongo.MongoStorage.
+
+Para chamar estas corrotinas a partir do Tk, use TkExecutor.submit_async
+(executor.py).
+"""
+import asyncio
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+from armazenamento import agora
+from armazenamento_mongo import DUPLICATE_KEY, documento_produto, exigir_uri, linha_produto
+from autocomplete import fold_case
+from config import DatabaseConfig
+from db import USER_SEARCH_LIMIT, ProductFilter, ProductPage, UserDB
+from eventos import EventBus, PRODUTO_INSERIDO, USUARIO_REGISTRADO
+from hashing import HashingExecutor, PasswordHasher
+from validacao import validar_usuario
+
+class AsyncUserDB:
+    """Corrotinas sobre um UserDB, com um thread escritor e um pool de leitores"""
+
+    def __init__(self, db: UserDB, readers: Optional[int] = None):
+        self.db = db
+        self.config = db.config
+        self.events = db.events
+        # Uma conexão do pool fica com o escritor; as demais atendem os leitores
+        readers = readers or max(1, db.config.POOL_SIZE - 1)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+
+    async def _read(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, partial(fn, *args, **kwargs))
+
+    async def _write(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, partial(fn, *args, **kwargs))
+
+    async def validate_user(self, username: str, password: str) -> bool:
+        return await self._read(self.db.validate_user, username, password)
+
+    async def check_credentials(self, auth, username: str, password: str, origem: str = 'local') -> bool:
+        """AuthManager.check_credentials (limitador, hash e registro da tentativa) no pool de leitores"""
+        return await self._read(auth.check_credentials, username, password, origem)
+
+    async def register_user(self, username: str, password: str) -> tuple:
+        erro = validar_usuario(username, password, self.config)
+        if erro:
+            return (False, erro)
+        try:
+            # O hash roda fora do escritor, que só fica ocupado com o INSERT
+            hashed_password = await self._read(self.db.hasher.hash, password)
+        except Exception as e:
+            logging.error(f"Erro crítico no registro: {str(e)}")
+            return (False, f"Erro interno: {str(e)}")
+        return await self._write(self.db.insert_user, username, hashed_password)
+
+    async def search_users(self, search_term: str) -> list:
+        return await self._read(self.db.search_users, search_term)
+
+    async def get_all_products(self) -> list:
+        return await self._read(self.db.get_all_products)
+
+    async def register_product(self, nome: str, quantidade: int, preco: float) -> bool:
+        return await self._write(self.db.register_product, nome, quantidade, preco)
+
+    async def get_products_page(self, *args, **kwargs) -> ProductPage:
+        """Mesmos parâmetros de UserDB.get_products_page"""
+        return await self._read(self.db.get_products_page, *args, **kwargs)
+
+    async def count_products(self, filtro: Optional[ProductFilter] = None) -> int:
+        return await self._read(self.db.count_products, filtro)
+
+    async def close(self, close_db: bool = True) -> None:
+        """Espera as operações pendentes e, se close_db, fecha o UserDB"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._writer.shutdown)
+        await loop.run_in_executor(None, self._readers.shutdown)
+        if close_db:
+            self.db.close()
+
+class AsyncMongoUserDB:
+    """Mesmas corrotinas sobre o MongoDB, pelo driver assíncrono motor"""
+
+    def __init__(self, config: DatabaseConfig = DatabaseConfig(), client=None):
+        self.config = config
+        self.events = EventBus()
+        self.hash_executor = HashingExecutor(config.HASH_WORKERS) if config.HASH_WORKERS > 0 else None
+        self.hasher = PasswordHasher(config, self.hash_executor)
+        self._own_client = client is None
+        if client is None:
+            try:
+                # Import tardio: motor só é necessário para este backend
+                from motor.motor_asyncio import AsyncIOMotorClient
+            except ImportError:
+                raise RuntimeError("AsyncMongoUserDB requer o pacote motor") from None
+            # O motor não conecta no construtor; a primeira operação abre o pool
+            client = AsyncIOMotorClient(exigir_uri(config), **config.mongo_options())
+        self.client = client
+        self.database = client[config.MONGO_DATABASE]
+        self.users = self.database[config.TABLE_NAME]
+        self.produtos = self.database['produtos']
+        self.contadores = self.database['contadores']
+        self._indexes = None
+
+    async def _ensure_indexes(self) -> None:
+        if self._indexes is None:
+            self._indexes = asyncio.ensure_future(self._create_indexes_async())
+        await self._indexes
+
+    async def _create_indexes_async(self) -> None:
+        try:
+            await self.users.create_index('username', unique=True)
+            await self.users.create_index('username_busca')
+            await self.users.create_index('seq')
+            for campo in ('data_cadastro', 'nome_ordem', 'quantidade', 'preco'):
+                await self.produtos.create_index([(campo, 1), ('_id', 1)])
+            await self.produtos.create_index('termos')
+        except Exception as e:
+            logging.error(f"Erro ao criar índices no MongoDB: {str(e)}")
+        try:
+            # Usuários das versões antigas não têm username_busca (ver completar_usuarios)
+            async for user in self.users.find({'username_busca': None}, {'username': 1}):
+                await self.users.update_one({'_id': user['_id']},
+                                            {'$set': {'username_busca': fold_case(user['username'])}})
+        except Exception as e:
+            logging.error(f"Erro ao completar usuários antigos: {str(e)}")
+
+    async def validate_user(self, username: str, password: str) -> bool:
+        try:
+            user = await self.users.find_one({'username': username}, {'password': 1})
+            if not user or not await self.hasher.verify_async(password, user['password']):
+                return False
+            if self.hasher.needs_rehash(user['password']):
+                await self.users.update_one(
+                    {'username': username, 'password': user['password']},
+                    {'$set': {'password': await self.hasher.hash_async(password)}}
+                )
+            return True
+        except Exception as e:
+            logging.error(f"Erro na validação: {str(e)}")
+            return False
+
+    async def register_user(self, username: str, password: str) -> tuple:
+        erro = validar_usuario(username, password, self.config)
+        if erro:
+            return (False, erro)
+        try:
+            await self._ensure_indexes()
+            hashed_password = await self.hasher.hash_async(password)
+            # seq é o marcador do filtro de nomes do MongoStorage (bloom.py)
+            contador = await self.contadores.find_one_and_update(
+                {'_id': self.config.TABLE_NAME}, {'$inc': {'proximo_id': 1}}, upsert=True, return_document=True
+            )
+            await self.users.insert_one({
+                'username': username,
+                'username_busca': fold_case(username),
+                'password': hashed_password,
+                'seq': contador['proximo_id'],
+            })
+        except Exception as e:
+            if getattr(e, 'code', None) == DUPLICATE_KEY:
+                return (False, "Nome de usuário já está em uso")
+            logging.error(f"Erro crítico no registro: {str(e)}")
+            return (False, f"Erro interno: {str(e)}")
+        self.events.publish(USUARIO_REGISTRADO, username=username)
+        return (True, "Registro bem-sucedido!")
+
+    async def search_users(self, search_term: str) -> list:
+        try:
+            await self._ensure_indexes()
+            cursor = self.users.find(
+                {'username_busca': {'$regex': f"^{re.escape(fold_case(search_term))}"}},
+                {'username': 1}
+            ).sort([('username_busca', 1), ('username', 1)]).limit(USER_SEARCH_LIMIT)
+            return [user['username'] async for user in cursor]
+        except Exception as e:
+            logging.error(f"Erro na busca de usuários: {str(e)}")
+            return []
+
+    async def get_all_products(self) -> list:
+        try:
+            cursor = self.produtos.find({}).sort([('data_cadastro', -1), ('_id', -1)])
+            return [linha_produto(documento, com_versao=True) async for documento in cursor]
+        except Exception as e:
+            logging.error(f"Erro ao buscar produtos: {str(e)}")
+            return []
+
+    async def register_product(self, nome: str, quantidade: int, preco: float) -> bool:
+        try:
+            await self._ensure_indexes()
+            contador = await self.contadores.find_one_and_update(
+                {'_id': 'produtos'}, {'$inc': {'proximo_id': 1}}, upsert=True, return_document=True
+            )
+            documento = documento_produto(contador['proximo_id'], nome, quantidade, preco, agora())
+            await self.produtos.insert_one(documento)
+            await self.contadores.update_one({'_id': 'produtos'}, {'$inc': {'versao': 1}})
+        except Exception as e:
+            logging.error(f"Erro no cadastro de produto: {str(e)}")
+            return False
+        self.events.publish(PRODUTO_INSERIDO, produto=linha_produto(documento, com_versao=True))
+        return True
+
+    async def close(self) -> None:
+        if self.hash_executor is not None:
+            self.hash_executor.shutdown()
+        if self._own_client:
+            self.client.close()
+
+def create_async_storage(config: DatabaseConfig = DatabaseConfig()):
+    """AsyncMongoUserDB para o backend mongo; AsyncUserDB (SQLite) para os demais"""
+    if config.BACKEND == 'mongo':
+        return AsyncMongoUserDB(config)
+    if config.BACKEND != 'sqlite':
+        raise ValueError(f"Backend sem API assíncrona: {config.BACKEND}")
+    return AsyncUserDB(UserDB(config))
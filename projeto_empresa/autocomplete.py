@@ -0,0 +1,94 @@
+import bisect
+import threading
+import string
+from collections import OrderedDict
+from typing import Optional
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def fold_case(value: str) -> str:
+    """Minúsculas só em ASCII, como o LIKE do SQLite"""
+    if value.isascii():
+        return value.lower()
+    return value.translate(_ASCII_LOWER)
+
+class PrefixCache:
+    """Cache LRU de buscas por prefixo de nome de usuário.
+
+    Uma busca por "joao" pode ser respondida localmente a partir de "jo" quando o
+    resultado de "jo" veio incompleto (menos que limit itens), pois ele já contém
+    todos os usuários que começam com "jo".
+    """
+
+    def __init__(self, max_entries: int = 256, limit: int = 10):
+        self.max_entries = max_entries
+        self.limit = limit
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, prefix: str) -> Optional[list]:
+        key = fold_case(prefix)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return list(self._entries[key])
+
+            for size in range(len(key) - 1, -1, -1):
+                shorter = self._entries.get(key[:size])
+                if shorter is not None and len(shorter) < self.limit:
+                    results = [user for user in shorter if fold_case(user).startswith(key)]
+                    self._store(key, results)
+                    return list(results)
+        return None
+
+    def put(self, prefix: str, results: list) -> None:
+        with self._lock:
+            self._store(fold_case(prefix), list(results))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: str, results: list) -> None:
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class UsernameIndex:
+    """Índice ordenado em memória para busca de usuários por prefixo.
+
+    Mantém os nomes ordenados pela forma em minúsculas (fold_case) e responde
+    com bisect, sem consultar o banco. Os resultados seguem essa ordem.
+    """
+
+    def __init__(self, usernames=()):
+        # Ordenação estável: nomes já em ordem binária mantêm essa ordem nos empates
+        self._names = sorted(usernames, key=fold_case)
+        self._keys = [fold_case(username) for username in self._names]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, username: str) -> None:
+        key = fold_case(username)
+        with self._lock:
+            position = bisect.bisect_left(self._keys, key)
+            # Chaves iguais (mesmo nome em caixas diferentes) ficam ordenadas pelo nome
+            while position < len(self._keys) and self._keys[position] == key \
+                    and self._names[position] < username:
+                position += 1
+            self._keys.insert(position, key)
+            self._names.insert(position, username)
+
+    def search(self, prefix: str, limit: int = 10) -> list:
+        key = fold_case(prefix)
+        with self._lock:
+            position = bisect.bisect_left(self._keys, key)
+            results = []
+            while position < len(self._keys) and len(results) < limit \
+                    and self._keys[position].startswith(key):
+                results.append(self._names[position])
+                position += 1
+        return results
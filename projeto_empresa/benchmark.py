@@ -0,0 +1,635 @@
+"""Benchmarks de desempenho do projeto_empresa.
+
+Uso: python benchmark.py <cenario> [opções]
+Cada cenário cria um banco temporário, então o users.db real não é tocado.
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import string
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from config import DatabaseConfig, ServerConfig, STORAGE_PROFILES
+from armazenamento import MemoryStorage
+from assincrono import AsyncUserDB
+from db import UserDB, AuthManager, ProductFilter, PRODUCT_SORT_KEYS
+from hashing import calibrate, hash_password, verify_password
+from importacao import importar_produtos
+from exportacao import FORMATOS, exportar_produtos
+from formatacao import formatar_produto, formatar_produtos
+from grid import RowCache
+from relatorio import RelatorioEngine
+from resumo import calcular_do_zero
+from servidor import AuthServer, gerar_carga, imprimir_carga
+
+@contextmanager
+def _temp_db(**overrides):
+    tmpdir = tempfile.mkdtemp(prefix="bench_")
+    config = DatabaseConfig(DB_NAME=os.path.join(tmpdir, "bench.db"), **overrides)
+    db = UserDB(config)
+    try:
+        yield db
+    finally:
+        db.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+def _report(label: str, ops: int, elapsed: float) -> None:
+    print(f"{label:<40} {ops / elapsed:>12,.0f} ops/s  {elapsed / ops * 1e6:>10.1f} us/op")
+
+def _seed_users(db: UserDB, total: int) -> None:
+    with db.pool.connection() as conn:
+        conn.executemany(
+            f"INSERT INTO {db.config.TABLE_NAME} (username, password) VALUES (?, ?)",
+            ((f"user{i:07d}", "x" * 64) for i in range(total))
+        )
+        conn.commit()
+
+def bench_pool(args) -> None:
+    """Compara conexão por chamada com o pool de conexões"""
+    with _temp_db() as db:
+        _seed_users(db, args.users)
+        query = f"SELECT password FROM {db.config.TABLE_NAME} WHERE username = ?"
+
+        start = time.perf_counter()
+        for i in range(args.ops):
+            with sqlite3.connect(db.config.DB_NAME) as conn:
+                conn.execute(query, (f"user{i % args.users:07d}",)).fetchone()
+        _report("sqlite3.connect por chamada", args.ops, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(args.ops):
+            with db.pool.connection() as conn:
+                conn.execute(query, (f"user{i % args.users:07d}",)).fetchone()
+        _report("ConnectionPool", args.ops, time.perf_counter() - start)
+
+def _seed_products(db: UserDB, total: int) -> None:
+    with db.pool.connection() as conn:
+        conn.executemany(
+            "INSERT INTO produtos (nome, quantidade, preco) VALUES (?, ?, ?)",
+            ((f"Produto {i}", i % 500, 1 + (i % 1000) / 10) for i in range(total))
+        )
+        conn.commit()
+
+def bench_storage(args) -> None:
+    """Vazão de leitores concorrentes com um escritor em cada perfil de armazenamento"""
+    for profile in STORAGE_PROFILES:
+        with _temp_db(STORAGE_PROFILE=profile, POOL_SIZE=args.readers + 1) as db:
+            _seed_products(db, args.products)
+            stop = threading.Event()
+            counts = [0] * (args.readers + 1)
+
+            def reader(slot: int) -> None:
+                while not stop.is_set():
+                    with db.pool.connection() as conn:
+                        conn.execute(
+                            "SELECT * FROM produtos ORDER BY id DESC LIMIT 50"
+                        ).fetchall()
+                    counts[slot] += 1
+
+            def writer() -> None:
+                while not stop.is_set():
+                    db.register_product("Novo", 1, 9.9)
+                    counts[-1] += 1
+
+            threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+            threads.append(threading.Thread(target=writer))
+            for thread in threads:
+                thread.start()
+            time.sleep(args.seconds)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            reads, writes = sum(counts[:-1]), counts[-1]
+            print(f"{profile:<12} leituras {reads / args.seconds:>10,.0f}/s"
+                  f"   escritas {writes / args.seconds:>8,.0f}/s")
+
+def bench_pages(args) -> None:
+    """Custo de get_all_products contra páginas keyset no início e no fim da tabela"""
+    with _temp_db() as db:
+        _seed_products(db, args.products)
+
+        start = time.perf_counter()
+        db.get_all_products()
+        _report("get_all_products (tabela inteira)", 1, time.perf_counter() - start)
+
+        cursor, pages, deep_elapsed = None, 0, 0.0
+        while True:
+            start = time.perf_counter()
+            page = db.get_products_page(cursor, page_size=args.page_size)
+            elapsed = time.perf_counter() - start
+            if pages == 0:
+                _report("primeira página", 1, elapsed)
+            pages += 1
+            deep_elapsed = elapsed
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        _report(f"última página ({pages} páginas)", 1, deep_elapsed)
+
+        # Troca de ordenação: primeira página e salto para o meio, em cada coluna
+        for sort_key in PRODUCT_SORT_KEYS:
+            for descending in (False, True):
+                label = f"{sort_key} {'desc' if descending else 'asc'}"
+                start = time.perf_counter()
+                db.get_products_page(page_size=args.page_size, sort_key=sort_key, descending=descending)
+                _report(f"ordenar por {label}", 1, time.perf_counter() - start)
+                start = time.perf_counter()
+                db.get_products_page(page_size=args.page_size, sort_key=sort_key, descending=descending,
+                                     offset=args.products // 2)
+                _report(f"ordenar por {label} (meio)", 1, time.perf_counter() - start)
+
+def bench_user_search(args) -> None:
+    """Busca por prefixo: LIKE no SQLite contra o UsernameIndex em memória"""
+    rng = random.Random(42)
+    for total in (int(size) for size in args.sizes.split(',')):
+        # Cache desligado para medir o custo real de cada consulta SQL
+        with _temp_db(USERNAME_INDEX=False, USER_SEARCH_CACHE_SIZE=0) as db:
+            with db.pool.connection() as conn:
+                conn.executemany(
+                    f"INSERT INTO {db.config.TABLE_NAME} (username, password) VALUES (?, ?)",
+                    ((''.join(rng.choices(string.ascii_letters, k=6)) + str(i), "x" * 64)
+                     for i in range(total))
+                )
+                conn.commit()
+            prefixes = [''.join(rng.choices(string.ascii_lowercase, k=2)) for _ in range(args.ops)]
+
+            start = time.perf_counter()
+            for prefix in prefixes:
+                db.search_users(prefix)
+            _report(f"SQL LIKE ({total:,} usuários)", len(prefixes), time.perf_counter() - start)
+
+            start = time.perf_counter()
+            db._load_username_index()
+            _report(f"carga do índice ({total:,} usuários)", 1, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for prefix in prefixes:
+                db.search_users(prefix)
+            _report(f"UsernameIndex ({total:,} usuários)", len(prefixes), time.perf_counter() - start)
+
+def bench_hashing(args) -> None:
+    """Calibra o custo do hash de senha para caber no orçamento de latência (--target-ms)"""
+    for algorithm in ('pbkdf2_sha256', 'scrypt'):
+        params = calibrate(algorithm, args.target_ms)
+        params['salt_bytes'] = 16
+        encoded = hash_password("senha-de-teste", params)
+
+        start = time.perf_counter()
+        for _ in range(args.ops):
+            verify_password("senha-de-teste", encoded)
+        elapsed = time.perf_counter() - start
+
+        costs = ", ".join(f"{key}={value}" for key, value in params.items()
+                          if key not in ('algorithm', 'salt_bytes'))
+        print(f"{algorithm:<14} {costs:<28} {elapsed / args.ops * 1000:>8.1f} ms/hash")
+
+def bench_logins(args) -> None:
+    """Logins/s com o hash no thread chamador contra o pool de processos, por número de núcleos"""
+    cores = os.cpu_count() or 1
+    worker_counts = [0] + sorted({1, 2, cores // 2, cores} - {0})
+    for workers in worker_counts:
+        with _temp_db(HASH_WORKERS=workers, PBKDF2_ITERATIONS=args.iterations, USERNAME_INDEX=False,
+                      LOGIN_RATE_LIMIT=False) as db:
+            for i in range(args.users):
+                db.register_user(f"user{i:04d}", f"senha{i:04d}")
+            auth = AuthManager(db)
+            attempts = [(f"user{i % args.users:04d}", f"senha{i % args.users:04d}")
+                        for i in range(args.logins)]
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(workers, 1) * 2) as clients:
+                results = list(clients.map(lambda pair: auth.validate_credentials(*pair), attempts))
+            elapsed = time.perf_counter() - start
+
+            assert all(results)
+            label = "no thread chamador" if workers == 0 else f"{workers} processo(s)"
+            print(f"{label:<22} {len(attempts) / elapsed:>10,.1f} logins/s")
+
+def bench_sessions(args) -> None:
+    """Verificação de token de sessão contra validação completa das credenciais (hash da senha)"""
+    for store in ("memoria", "sqlite"):
+        with _temp_db(SESSION_STORE=store, USERNAME_INDEX=False, LOGIN_RATE_LIMIT=False) as db:
+            for i in range(args.users):
+                db.register_user(f"user{i:04d}", f"senha{i:04d}")
+            auth = AuthManager(db)
+
+            start = time.perf_counter()
+            tokens = [auth.login(f"user{i % args.users:04d}", f"senha{i % args.users:04d}")
+                      for i in range(args.logins)]
+            _report(f"{store}: login completo + emissão", args.logins, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for i in range(args.logins):
+                auth.validate_credentials(f"user{i % args.users:04d}", f"senha{i % args.users:04d}")
+            _report(f"{store}: validação das credenciais", args.logins, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for i in range(args.ops):
+                auth.verify_token(tokens[i % len(tokens)])
+            _report(f"{store}: verificação do token", args.ops, time.perf_counter() - start)
+
+def bench_limiter(args) -> None:
+    """Ataque de força bruta com e sem o limite de tentativas: carga que chega ao hash e latência de logins legítimos"""
+    for ativo in (False, True):
+        with _temp_db(PBKDF2_ITERATIONS=args.iterations, USERNAME_INDEX=False, LOGIN_RATE_LIMIT=ativo,
+                      CHANGE_POLL_INTERVAL=0) as db:
+            for i in range(args.targets):
+                db.register_user(f"alvo{i:04d}", "senha-certa")
+            for i in range(args.legit):
+                db.register_user(f"legitimo{i:04d}", "senha-certa")
+            auth = AuthManager(db)
+
+            hashes = 0
+            hashes_lock = threading.Lock()
+            validate_user = db.validate_user
+
+            def contar_hash(username: str, password: str) -> bool:
+                nonlocal hashes
+                with hashes_lock:
+                    hashes += 1
+                return validate_user(username, password)
+            db.validate_user = contar_hash
+
+            def atacante(t: int) -> int:
+                aceitas = 0
+                for i in range(t, args.attempts, args.attackers):
+                    alvo = f"alvo{i % args.targets:04d}"
+                    aceitas += auth.validate_credentials(alvo, f"chute{i}", origem=f"10.0.0.{i % args.sources}")
+                return aceitas
+
+            latencias = []
+
+            def legitimo() -> None:
+                for i in range(args.legit):
+                    inicio = time.perf_counter()
+                    assert auth.validate_credentials(f"legitimo{i:04d}", "senha-certa", origem=f"192.168.0.{i}")
+                    latencias.append(time.perf_counter() - inicio)
+                    time.sleep(0.05)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.attackers + 1) as pool:
+                pool.submit(legitimo)
+                aceitas = sum(pool.map(atacante, range(args.attackers)))
+            elapsed = time.perf_counter() - start
+
+            rotulo = "com limite" if ativo else "sem limite"
+            _report(f"{rotulo}: tentativas do ataque", args.attempts, elapsed)
+            print(f"{'':<40} {hashes} de {args.attempts + args.legit} chegaram ao hash "
+                  f"({100 * (1 - hashes / (args.attempts + args.legit)):.1f}% descartadas); {aceitas} aceitas")
+            print(f"{'':<40} login legítimo durante o ataque: {_percentis(latencias)}")
+
+def bench_bloom(args) -> None:
+    """Logins de usuários inexistentes com e sem o filtro de Bloom, e abertura do banco com o filtro já gravado"""
+    tmpdir = tempfile.mkdtemp(prefix="bench_")
+
+    def config(ativo: bool = True) -> DatabaseConfig:
+        return DatabaseConfig(DB_NAME=os.path.join(tmpdir, "bench.db"), USERNAME_INDEX=False,
+                              CHANGE_POLL_INTERVAL=0, USERNAME_BLOOM=ativo, BLOOM_CAPACITY=max(args.users, 1000))
+    try:
+        db = UserDB(config(False))
+        _seed_users(db, args.users)
+        db.close()
+        for rotulo in ("filtro criado do zero", "filtro já gravado"):
+            start = time.perf_counter()
+            db = UserDB(config())
+            print(f"{rotulo:<40} abertura em {(time.perf_counter() - start) * 1e3:.1f} ms")
+            db.close()
+
+        for ativo in (False, True):
+            db = UserDB(config(ativo))
+            try:
+                start = time.perf_counter()
+                aceitos = sum(db.validate_user(f"desconhecido{i:07d}", "senha") for i in range(args.ops))
+                rotulo = "com filtro" if ativo else "sem filtro"
+                _report(f"{rotulo}: usuário inexistente", args.ops, time.perf_counter() - start)
+                assert aceitos == 0
+            finally:
+                db.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+def bench_import(args) -> None:
+    """Linhas/s da importação em lote de CSV, por tamanho de transação"""
+    with _temp_db() as db:
+        path = os.path.join(os.path.dirname(db.config.DB_NAME), "produtos.csv")
+        with open(path, "w", encoding="utf-8") as arquivo:
+            arquivo.write("nome,quantidade,preco\n")
+            for i in range(args.rows):
+                arquivo.write(f"Produto {i},{i % 500},{1 + (i % 1000) / 10}\n")
+
+        for batch_size in (int(size) for size in args.batches.split(',')):
+            start = time.perf_counter()
+            result = importar_produtos(db, path, batch_size)
+            elapsed = time.perf_counter() - start
+            _report(f"lote de {batch_size} ({result.imported:,} linhas)", result.imported, elapsed)
+
+        start = time.perf_counter()
+        for i in range(args.single):
+            db.register_product(f"Produto {i}", i % 500, 9.9)
+        _report("register_product linha a linha", args.single, time.perf_counter() - start)
+
+def bench_export(args) -> None:
+    """Linhas/s e tamanho de arquivo da exportação em cada formato (memória constante)"""
+    with _temp_db() as db:
+        _seed_products(db, args.rows)
+        tmpdir = os.path.dirname(db.config.DB_NAME)
+        for formato in FORMATOS:
+            path = os.path.join(tmpdir, f"produtos.{formato}")
+            start = time.perf_counter()
+            total = exportar_produtos(db, path, formato)
+            elapsed = time.perf_counter() - start
+            _report(f"{formato} ({os.path.getsize(path) / 1e6:,.1f} MB)", total, elapsed)
+            os.remove(path)
+        try:
+            # Import tardio: resource só existe em sistemas Unix
+            import resource
+        except ImportError:
+            return
+        # ru_maxrss é o pico do processo inteiro (em KB no Linux), semeadura incluída
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"pico de memória do processo: {peak:,.0f} MB")
+
+def bench_report(args) -> None:
+    """Latência do relatório: agregação sobre produtos contra as tabelas de resumo"""
+    with _temp_db() as db:
+        with db.pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO produtos (nome, quantidade, preco, data_cadastro) VALUES (?, ?, ?, ?)",
+                ((f"Produto {i}", i % 500, 1 + (i % 1000) / 10,
+                  f"20{20 + i % 5}-{1 + i % 12:02d}-{1 + i % 28:02d} 10:00:00")
+                 for i in range(args.products))
+            )
+            conn.commit()
+
+        start = time.perf_counter()
+        for _ in range(args.ops):
+            with db.pool.connection() as conn:
+                calcular_do_zero(conn)
+        _report("agregação completa sobre produtos", args.ops, time.perf_counter() - start)
+
+        engine = RelatorioEngine(db)
+        start = time.perf_counter()
+        for _ in range(args.ops):
+            engine._calcular(db.config.LOW_STOCK_THRESHOLD)
+        _report("tabelas de resumo", args.ops, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(args.ops):
+            engine.gerar()
+        _report("cache por versão da tabela", args.ops, time.perf_counter() - start)
+
+def bench_search(args) -> None:
+    """Latência da busca de produtos (primeira página + contagem), FTS5 contra LIKE"""
+    palavras = ["arroz", "feijão", "café", "açúcar", "óleo", "sabão", "leite", "farinha",
+                "macarrão", "biscoito", "integral", "orgânico", "pacote", "caixa", "garrafa"]
+    rng = random.Random(42)
+    with _temp_db() as db:
+        with db.pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO produtos (nome, quantidade, preco, data_cadastro) VALUES (?, ?, ?, ?)",
+                ((f"{' '.join(rng.sample(palavras, 3))} {i}", i % 500, 1 + (i % 1000) / 10,
+                  f"20{20 + i % 5}-{1 + i % 12:02d}-{1 + i % 28:02d} 10:00:00")
+                 for i in range(args.products))
+            )
+            conn.commit()
+
+        filtros = {
+            "texto comum ('cafe')": ProductFilter(texto="cafe"),
+            "texto raro (id exato)": ProductFilter(texto=str(args.products // 2)),
+            "texto + faixa de preço": ProductFilter(texto="arroz integral", preco_min=10, preco_max=20),
+            "faixa de quantidade": ProductFilter(quantidade_min=10, quantidade_max=12),
+            "faixa de datas": ProductFilter(data_inicio="2022-03-01", data_fim="2022-03-31"),
+        }
+        for modo, fts in (("fts5", True), ("like", False)):
+            if fts and not db.fts_enabled:
+                print("FTS5 indisponível neste SQLite")
+                continue
+            db.fts_enabled = fts
+            for nome, filtro in filtros.items():
+                start = time.perf_counter()
+                for _ in range(args.ops):
+                    db.get_products_page(page_size=args.page_size, filtro=filtro)
+                _report(f"{modo} página: {nome}", args.ops, time.perf_counter() - start)
+                start = time.perf_counter()
+                for _ in range(args.ops):
+                    total = db.count_products(filtro)
+                _report(f"{modo} contagem ({total}): {nome}", args.ops, time.perf_counter() - start)
+
+def bench_render(args) -> None:
+    """Custo por linha da formatação da grade: strptime, lote por página e cache por id"""
+    def strptime_row(produto) -> tuple:
+        # Formatação anterior da ConsultaProdutos, linha a linha
+        id_produto, nome, quantidade, preco, data_cadastro = produto
+        data = datetime.strptime(data_cadastro, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y %H:%M')
+        return (id_produto, nome, quantidade, f"R$ {preco:.2f}".replace('.', ','), data)
+
+    with _temp_db() as db:
+        _seed_products(db, args.rows)
+        pages, cursor = [], None
+        while True:
+            page = db.get_products_page(cursor, page_size=args.page_size)
+            pages.append(page.rows)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        total = sum(map(len, pages))
+
+        start = time.perf_counter()
+        for rows in pages:
+            [strptime_row(row) for row in rows]
+        _report("strptime por linha", total, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for rows in pages:
+            [formatar_produto(row) for row in rows]
+        _report("fatiamento por linha", total, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for rows in pages:
+            formatar_produtos(rows)
+        _report("lote por página", total, time.perf_counter() - start)
+
+        cache = RowCache(total)
+        for rows in pages:
+            cache.format(rows, formatar_produtos)
+        start = time.perf_counter()
+        for rows in pages:
+            cache.format(rows, formatar_produtos)
+        _report("cache por id (acerto)", total, time.perf_counter() - start)
+
+def bench_backends(args) -> None:
+    """Latência das operações em cada backend de armazenamento (a conformidade fica em tests/test_armazenamento.py)"""
+    tmpdir = tempfile.mkdtemp(prefix="bench_")
+    fabricas = {
+        "sqlite": lambda nome: UserDB(DatabaseConfig(DB_NAME=os.path.join(tmpdir, f"{nome}.db"))),
+        "memoria": lambda nome: MemoryStorage(DatabaseConfig()),
+    }
+    try:
+        import mongomock
+        from armazenamento_mongo import MongoStorage
+        fabricas["mongo (mongomock)"] = lambda nome: MongoStorage(
+            DatabaseConfig(MONGO_DATABASE=nome, BLOOM_FILE=os.path.join(tmpdir, f"{nome}.bloom")),
+            client_factory=lambda uri, **opcoes: mongomock.MongoClient()
+        )
+    except ImportError:
+        print("mongomock indisponível: backend mongo não medido")
+
+    try:
+        for backend, fabrica in fabricas.items():
+            storage = fabrica("bench")
+            try:
+                start = time.perf_counter()
+                for inicio in range(0, args.products, 1000):
+                    storage.register_products([(f"produto {i}", i % 500, 1 + (i % 1000) / 10)
+                                               for i in range(inicio, min(inicio + 1000, args.products))])
+                _report(f"{backend} cadastro em lote", args.products, time.perf_counter() - start)
+
+                for sort_key in ('data_cadastro', 'nome'):
+                    start = time.perf_counter()
+                    cursor = None
+                    for _ in range(args.ops):
+                        page = storage.get_products_page(cursor, page_size=args.page_size, sort_key=sort_key)
+                        cursor = page.next_cursor
+                    _report(f"{backend} página por {sort_key}", args.ops, time.perf_counter() - start)
+
+                filtro = ProductFilter(texto="produto 12")
+                start = time.perf_counter()
+                for _ in range(args.ops):
+                    storage.get_products_page(page_size=args.page_size, filtro=filtro)
+                _report(f"{backend} página filtrada", args.ops, time.perf_counter() - start)
+
+                start = time.perf_counter()
+                for i in range(args.ops):
+                    storage.adjust_stock(1 + i % args.products, 1)
+                _report(f"{backend} ajuste de estoque", args.ops, time.perf_counter() - start)
+            finally:
+                storage.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+def _percentis(latencias: list) -> str:
+    latencias = sorted(latencias)
+    p50 = latencias[len(latencias) // 2]
+    p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+    return f"p50 {p50 * 1e3:.2f} ms  p99 {p99 * 1e3:.2f} ms"
+
+def bench_async(args) -> None:
+    """Vazão e latência com clientes asyncio concorrentes: to_thread sobre o UserDB contra AsyncUserDB"""
+    with _temp_db(PBKDF2_ITERATIONS=1000, USERNAME_INDEX=False) as db:
+        for i in range(args.users):
+            db.register_user(f"cliente{i:05d}", "senha123")
+        _seed_products(db, 1000)
+
+        async def operacao(api, i: int) -> None:
+            # 1 escrita a cada args.write_every operações; o resto são leituras
+            if i % args.write_every == 0:
+                await api.register_product(f"produto async {i}", i % 100, 9.9)
+            elif i % 3 == 0:
+                await api.search_users(f"cliente{i % args.users:05d}"[:-2])
+            else:
+                await api.validate_user(f"cliente{i % args.users:05d}", "senha123")
+
+        async def rodar(nome: str, api) -> None:
+            latencias = []
+
+            async def cliente(c: int) -> None:
+                for i in range(c, args.ops, args.clients):
+                    inicio = time.perf_counter()
+                    await operacao(api, i)
+                    latencias.append(time.perf_counter() - inicio)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(cliente(c) for c in range(args.clients)))
+            elapsed = time.perf_counter() - start
+            _report(nome, args.ops, elapsed)
+            print(f"{'':<40} {_percentis(latencias)}")
+
+        class ToThread:
+            """Cada chamada do UserDB num thread do executor padrão do asyncio"""
+            def __getattr__(self, nome):
+                return lambda *a: asyncio.to_thread(getattr(db, nome), *a)
+
+        async def principal() -> None:
+            await rodar(f"to_thread ({args.clients} clientes)", ToThread())
+            api = AsyncUserDB(db)
+            await rodar(f"AsyncUserDB ({args.clients} clientes)", api)
+            await api.close(close_db=False)
+
+        asyncio.run(principal())
+
+def bench_server(args) -> None:
+    """Requisições/s e latência do servidor de autenticação: keep-alive, lotes e tipos de operação"""
+    with _temp_db(PBKDF2_ITERATIONS=1000, LOGIN_RATE_LIMIT=False) as db:
+        for i in range(args.users):
+            db.register_user(f"cliente{i:05d}", "senha123")
+        _seed_products(db, 10000)
+
+        async def principal() -> None:
+            api = AsyncUserDB(db)
+            server = await AuthServer(api, ServerConfig(PORT=0)).start()
+            config = ServerConfig(PORT=server.sockets[0].getsockname()[1])
+            cenarios = [
+                ("ping sem keep-alive", lambda i: {'op': 'ping'}, 1, False),
+                ("ping keep-alive", lambda i: {'op': 'ping'}, 1, True),
+                ("ping lote 10", lambda i: {'op': 'ping'}, 10, True),
+                ("login", lambda i: {'op': 'login', 'username': f"cliente{i % args.users:05d}",
+                                     'password': "senha123"}, 1, True),
+                ("login lote 10", lambda i: {'op': 'login', 'username': f"cliente{i % args.users:05d}",
+                                             'password': "senha123"}, 10, True),
+                ("usuarios", lambda i: {'op': 'usuarios', 'termo': f"cliente{i % args.users:05d}"[:-1]}, 1, True),
+                ("produtos (página de 50)", lambda i: {'op': 'produtos', 'page_size': 50}, 1, True),
+            ]
+            try:
+                for rotulo, requisicao, lote, keep_alive in cenarios:
+                    resultado = await gerar_carga(config, requisicao, args.clients, args.requests,
+                                                  lote, keep_alive)
+                    imprimir_carga(rotulo, resultado)
+            finally:
+                server.close()
+                await server.wait_closed()
+                await api.close(close_db=False)
+
+        asyncio.run(principal())
+
+SCENARIOS = {
+    "pool": (bench_pool, {"--users": 1000, "--ops": 5000}),
+    "import": (bench_import, {"--rows": 200000, "--batches": "500,5000,50000", "--single": 2000}),
+    "logins": (bench_logins, {"--users": 20, "--logins": 200, "--iterations": 100000}),
+    "limiter": (bench_limiter, {"--attempts": 3000, "--attackers": 4, "--targets": 20, "--sources": 5,
+                                "--legit": 20, "--iterations": 100000}),
+    "bloom": (bench_bloom, {"--users": 1000000, "--ops": 200000}),
+    "sessions": (bench_sessions, {"--users": 10, "--logins": 20, "--ops": 200000}),
+    "export": (bench_export, {"--rows": 1000000}),
+    "hashing": (bench_hashing, {"--target-ms": 250.0, "--ops": 5}),
+    "pages": (bench_pages, {"--products": 200000, "--page-size": 100}),
+    "usersearch": (bench_user_search, {"--sizes": "10000,100000,1000000", "--ops": 200}),
+    "search": (bench_search, {"--products": 1000000, "--ops": 5, "--page-size": 100}),
+    "render": (bench_render, {"--rows": 100000, "--page-size": 100}),
+    "report": (bench_report, {"--products": 500000, "--ops": 20}),
+    "async": (bench_async, {"--users": 200, "--ops": 5000, "--clients": 50, "--write-every": 5}),
+    "server": (bench_server, {"--users": 200, "--requests": 5000, "--clients": 20}),
+    "backends": (bench_backends, {"--products": 100000, "--ops": 200, "--page-size": 100}),
+    "storage": (bench_storage, {"--products": 10000, "--readers": 4, "--seconds": 3.0}),
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks do projeto_empresa")
+    subparsers = parser.add_subparsers(dest="cenario", required=True)
+    for name, (func, options) in SCENARIOS.items():
+        sub = subparsers.add_parser(name, help=func.__doc__)
+        for option, default in options.items():
+            sub.add_argument(option, type=type(default), default=default)
+        sub.set_defaults(func=func)
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Filtro de Bloom dos nomes de usuário, para descartar logins de usuários inexistentes sem ir ao banco.
+
+O filtro fica num arquivo mapeado em memória (mmap): ao abrir o programa, só os
+usuários cadastrados depois da última sincronização são lidos do banco. O
+cabeçalho guarda um marcador crescente (maior id de usuário já incluído), e
+UsernameBloom.sync busca apenas o que vier depois dele.
+
+Um "não está" do filtro é respondido sempre pelo filtro, sem ir ao banco.
+Cadastros de outros processos entram pelo sync chamado pelo backend quando os
+dados mudam (DataVersionWatcher no SQLite) e, se a última sincronização tiver
+mais de intervalo_sync segundos, por um sync em segundo plano disparado pela
+ausência (no máximo um por vez); até ele terminar, um usuário recém-cadastrado
+por outro processo pode ser recusado.
+
+O arquivo pertence a um processo só: quem o abre primeiro trava o arquivo
+(flock/msvcrt.locking) e os demais usam um filtro só em memória, carregado do
+banco inteiro. Assim bits e cabeçalho nunca são escritos por dois processos.
+"""
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MAGIC = b'BLM2'
+# magic, número de hashes (k), bits (m), capacidade, marcador, itens incluídos
+HEADER = struct.Struct('<4sIQQqQ')
+
+def bloom_params(capacity: int, error_rate: float) -> tuple:
+    """(bits, hashes) para capacity itens com a taxa de falso positivo pedida"""
+    bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    return bits, max(1, round(bits / capacity * math.log(2)))
+
+def _abrir_exclusivo(path: str):
+    """Abre (ou cria) o arquivo travado para este processo; None se outro processo já o travou"""
+    arquivo = open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        arquivo.close()
+        return None
+    return arquivo
+
+def _liberar(arquivo) -> None:
+    if fcntl is None:
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+    # No flock, fechar o arquivo já libera a trava
+    arquivo.close()
+
+def _ler_cabecalho(arquivo, capacity: int, error_rate: float) -> Optional[tuple]:
+    """(hashes, bits, capacidade) de um arquivo válido com ao menos capacity itens, senão None"""
+    arquivo.seek(0)
+    dados = arquivo.read(HEADER.size)
+    tamanho = os.fstat(arquivo.fileno()).st_size
+    if len(dados) < HEADER.size:
+        return None
+    magic, hashes, bits, capacidade, _, _ = HEADER.unpack(dados)
+    if magic != MAGIC or capacidade < capacity or (bits, hashes) != bloom_params(capacidade, error_rate):
+        return None
+    if tamanho != HEADER.size + (bits + 7) // 8:
+        return None
+    return hashes, bits, capacidade
+
+class BloomFilter:
+    """Filtro de Bloom sobre um mmap; sem path, fica só em memória.
+
+    Um arquivo existente mantém a capacidade gravada nele, que pode ter crescido
+    além de capacity (ver UsernameBloom); só um arquivo menor é refeito. Se outro
+    processo tem o arquivo travado, o filtro fica em memória (path vira None).
+    """
+
+    def __init__(self, path: Optional[str], capacity: int, error_rate: float):
+        self._lock = threading.Lock()
+        self._file = _abrir_exclusivo(path) if path is not None else None
+        if path is not None and self._file is None:
+            logging.warning(f"Filtro de usuários {path} em uso por outro processo; usando filtro em memória")
+            path = None
+        self.path = path
+        existente = _ler_cabecalho(self._file, capacity, error_rate) if self._file is not None else None
+        # Verdadeiro se o arquivo não existia ou não servia (conteúdo zerado)
+        self.recriado = existente is None
+        if existente is None:
+            self.capacity = capacity
+            self.bits, self.hashes = bloom_params(capacity, error_rate)
+        else:
+            self.hashes, self.bits, self.capacity = existente
+        self.size = HEADER.size + (self.bits + 7) // 8
+        if path is None:
+            self._mm = mmap.mmap(-1, self.size)
+        else:
+            if self.recriado:
+                # Zera o conteúdo antigo, se havia
+                self._file.truncate(0)
+                self._file.truncate(self.size)
+            self._mm = mmap.mmap(self._file.fileno(), self.size)
+        if self.recriado:
+            self.marcador, self.itens = 0, 0
+            self._gravar_cabecalho()
+        else:
+            self.marcador, self.itens = HEADER.unpack_from(self._mm, 0)[4:]
+
+    def _posicoes(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        posicoes = self._posicoes(item)
+        offset = HEADER.size
+        with self._lock:
+            # Leitura e escrita do byte sob o lock, para bits de outro thread não se perderem
+            for pos in posicoes:
+                self._mm[offset + (pos >> 3)] |= 1 << (pos & 7)
+            self.itens += 1
+
+    def __contains__(self, item: str) -> bool:
+        mm, offset = self._mm, HEADER.size
+        return all(mm[offset + (pos >> 3)] & (1 << (pos & 7)) for pos in self._posicoes(item))
+
+    def _gravar_cabecalho(self) -> None:
+        HEADER.pack_into(self._mm, 0, MAGIC, self.hashes, self.bits, self.capacity, self.marcador, self.itens)
+
+    def flush(self) -> None:
+        """Grava os bits e só depois o marcador: após uma queda, no pior caso os mesmos nomes são relidos"""
+        with self._lock:
+            if self._file is not None:
+                self._mm.flush()
+            self._gravar_cabecalho()
+            if self._file is not None:
+                # Arquivos menores que uma página são gravados inteiros
+                self._mm.flush(0, min(mmap.PAGESIZE, self.size))
+
+    def close(self) -> None:
+        self.flush()
+        self._mm.close()
+        if self._file is not None:
+            _liberar(self._file)
+
+class UsernameBloom:
+    """Filtro de nomes mantido em dia com o backend.
+
+    carregar_desde(marcador) devolve (marcador, username) dos usuários
+    posteriores ao marcador, em ordem crescente; marcador_maximo() devolve o
+    maior marcador existente, para detectar um banco trocado ou recriado.
+    """
+
+    def __init__(self, path: Optional[str], capacity: int, error_rate: float,
+                 carregar_desde: Callable[[int], Iterable[tuple]],
+                 marcador_maximo: Callable[[], int], intervalo_sync: float):
+        self.carregar_desde = carregar_desde
+        self.intervalo_sync = intervalo_sync
+        self.error_rate = error_rate
+        self.filtro = BloomFilter(path, capacity, error_rate)
+        self._sync_lock = threading.Lock()
+        self._ultimo_sync = 0.0
+        # Lock próprio: _sync_lock fica preso durante a consulta, e uma ausência não pode esperar por ela
+        self._fundo_lock = threading.Lock()
+        self._sync_fundo = None
+        if self._banco_trocado(marcador_maximo):
+            self._recriar(self.filtro.capacity)
+        total = self.sync()
+        if self.filtro.itens > self.filtro.capacity:
+            # Acima da capacidade: refaz com o dobro; a nova capacidade fica gravada no arquivo
+            self._recriar(self.filtro.itens * 2)
+            total = self.sync()
+        logging.info(f"Filtro de usuários carregado: {self.filtro.itens} nomes ({total} novos)")
+
+    def _banco_trocado(self, marcador_maximo: Callable[[], int]) -> bool:
+        marcador = self.filtro.marcador
+        if marcador == 0:
+            return False
+        if marcador_maximo() < marcador:
+            return True
+        # O usuário do marcador tem de estar no filtro; se não está, é outro banco com marcadores maiores
+        for atual, username in self.carregar_desde(marcador - 1):
+            return atual == marcador and username not in self.filtro
+        return False
+
+    def _recriar(self, capacity: int) -> None:
+        path = self.filtro.path
+        self.filtro.close()
+        if path is not None:
+            os.remove(path)
+        self.filtro = BloomFilter(path, capacity, self.error_rate)
+
+    def sync(self) -> int:
+        """Inclui os usuários posteriores ao marcador; retorna quantos"""
+        with self._sync_lock:
+            total = 0
+            for marcador, username in self.carregar_desde(self.filtro.marcador):
+                self.filtro.add(username)
+                self.filtro.marcador = max(self.filtro.marcador, marcador)
+                total += 1
+            if total:
+                self.filtro.flush()
+            self._ultimo_sync = time.monotonic()
+            return total
+
+    def add(self, username: str, marcador: Optional[int] = None) -> None:
+        """Inclui um usuário recém-cadastrado por este processo"""
+        self.filtro.add(username)
+        if marcador is not None and marcador == self.filtro.marcador + 1:
+            # Só avança o marcador sem lacunas; cadastros de outros processos vêm no sync
+            self.filtro.marcador = marcador
+
+    def might_exist(self, username: str) -> bool:
+        """Falso quando o usuário não está no filtro; nunca consulta o banco"""
+        if username in self.filtro:
+            return True
+        if time.monotonic() - self._ultimo_sync > self.intervalo_sync:
+            self._sincronizar_em_fundo()
+        return False
+
+    def _sincronizar_em_fundo(self) -> None:
+        with self._fundo_lock:
+            if self._sync_fundo is not None and self._sync_fundo.is_alive():
+                return
+            # Marca agora, para as próximas ausências não dispararem outro sync
+            self._ultimo_sync = time.monotonic()
+            self._sync_fundo = threading.Thread(target=self._sync_seguro, name="bloom-sync", daemon=True)
+            self._sync_fundo.start()
+
+    def _sync_seguro(self) -> None:
+        try:
+            self.sync()
+        except Exception as e:
+            logging.error(f"Erro ao atualizar filtro de usuários: {str(e)}")
+
+    def close(self) -> None:
+        if self._sync_fundo is not None:
+            self._sync_fundo.join()
+        self.filtro.close()
@@ -2,12 +2,14 @@ import tkinter as tk
 from tkinter import messagebox
 import logging
 from config import AppConfig  # Adicione esta linha
+from executor import get_executor, set_loading
 
 class Cadastro(tk.Toplevel):
     def __init__(self, master, db, config: AppConfig):
         super().__init__(master)
         self.db = db  # ← Adicione esta linha crucial
         self.config = config
+        self._registrando = False
         
         self.title("Cadastro de Usuário")
         self.geometry("300x250")
@@ -18,7 +20,7 @@ class Cadastro(tk.Toplevel):
         self._bind_events()
 
     def _create_widgets(self):
-        frame = tk.Frame(self, bg=self.config.BG_COLOR)
+        frame = self.frame = tk.Frame(self, bg=self.config.BG_COLOR)
         frame.pack(padx=20, pady=20, fill='both', expand=True)
 
         tk.Label(
@@ -53,6 +55,8 @@ class Cadastro(tk.Toplevel):
         self.bind('<Return>', self._executar_registro)
 
     def _executar_registro(self, event=None):
+        if self._registrando:
+            return
         try:
             username = self.username_entry.get().strip()
             password = self.password_entry.get().strip()
@@ -61,17 +65,34 @@ class Cadastro(tk.Toplevel):
             if not self._validate_inputs(username, password, confirm):
                 return
 
-            success, message = self.db.register_user(username, password)
-            
-            if success:
-                messagebox.showinfo("Sucesso", message)
-                self.destroy()
-            else:
-                messagebox.showerror("Erro", message)
+            self._set_registrando(True)
+            get_executor(self).submit(
+                self.db.register_user, username, password,
+                on_success=self._on_registro_concluido,
+                on_error=self._on_erro_registro,
+                owner=self
+            )
                 
         except Exception as e:
-            logging.error(f"Erro no registro: {str(e)}")
-            messagebox.showerror("Erro", f"Falha crítica: {str(e)}")
+            self._on_erro_registro(e)
+
+    def _set_registrando(self, registrando: bool) -> None:
+        self._registrando = registrando
+        set_loading(self.frame, registrando)
+
+    def _on_registro_concluido(self, resultado: tuple) -> None:
+        self._set_registrando(False)
+        success, message = resultado
+        if success:
+            messagebox.showinfo("Sucesso", message)
+            self.destroy()
+        else:
+            messagebox.showerror("Erro", message)
+
+    def _on_erro_registro(self, e: Exception) -> None:
+        self._set_registrando(False)
+        logging.error(f"Erro no registro: {str(e)}")
+        messagebox.showerror("Erro", f"Falha crítica: {str(e)}")
 
     def _validate_inputs(self, username: str, password: str, confirm: str) -> bool:
         if len(username) < self.db.config.MIN_USERNAME_LENGTH:
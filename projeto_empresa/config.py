@@ -1,4 +1,44 @@
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+def _env(nome: str, padrao, tipo=str):
+    """Valor da variável de ambiente convertido para tipo, ou padrao se ela não existir"""
+    valor = os.environ.get(nome)
+    return tipo(valor) if valor else padrao
+
+# Perfis de armazenamento aplicados como PRAGMAs ao abrir cada conexão
+STORAGE_PROFILES = {
+    # Padrões do SQLite (rollback journal); útil em sistemas de arquivos de rede
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
 
 @dataclass
 class AppConfig:
@@ -16,10 +56,105 @@ class AppConfig:
     LISTBOX_BG: str = '#444444'
     LISTBOX_FG: str = '#FFFFFF'
     LISTBOX_HIGHLIGHT: str = '#666666'
+    AUTOCOMPLETE_DELAY_MS: int = 250
 
 @dataclass
 class DatabaseConfig:
+    # Backend de armazenamento: "sqlite", "mongo" ou "memoria" (ver armazenamento.py)
+    BACKEND: str = "sqlite"
     DB_NAME: str = "users.db"
     TABLE_NAME: str = "users"
     MIN_USERNAME_LENGTH: int = 3
-    MIN_PASSWORD_LENGTH: int = 5
\ No newline at end of file
+    MIN_PASSWORD_LENGTH: int = 5
+    # Filtro de Bloom dos nomes (ver bloom.py): login de usuário inexistente não vai ao banco
+    USERNAME_BLOOM: bool = True
+    BLOOM_CAPACITY: int = 100_000
+    BLOOM_ERROR_RATE: float = 0.01
+    # Arquivo do filtro; vazio = nome do banco + ".bloom"
+    BLOOM_FILE: str = ""
+    # Idade (s) da última sincronização a partir da qual uma ausência no filtro
+    # dispara um sync em segundo plano (a resposta continua vindo do filtro)
+    BLOOM_SYNC_INTERVAL: float = 1.0
+    # Pool de conexões
+    POOL_SIZE: int = 5
+    POOL_TIMEOUT: float = 5.0
+    POOL_HEALTH_CHECK_INTERVAL: float = 30.0
+    STATEMENT_CACHE_SIZE: int = 128
+    # Entradas do cache LRU da busca de usuários
+    USER_SEARCH_CACHE_SIZE: int = 256
+    # Índice de nomes em memória para o autocomplete (dispensa o LIKE no banco)
+    USERNAME_INDEX: bool = True
+    # Hash de senhas (ver hashing.py); mudar os custos refaz o hash no próximo login
+    PASSWORD_ALGORITHM: str = "pbkdf2_sha256"
+    PASSWORD_SALT_BYTES: int = 16
+    PBKDF2_ITERATIONS: int = 600_000
+    SCRYPT_N: int = 2 ** 14
+    SCRYPT_R: int = 8
+    SCRYPT_P: int = 1
+    # Processos dedicados ao hash de senhas (0 = calcula no próprio thread)
+    HASH_WORKERS: int = 0
+    # Linhas por transação na importação em lote
+    IMPORT_BATCH_SIZE: int = 5000
+    # Quantidade a partir da qual um produto entra no relatório de estoque baixo
+    LOW_STOCK_THRESHOLD: int = 10
+    # Perfil de armazenamento (ver STORAGE_PROFILES)
+    STORAGE_PROFILE: str = "durable"
+    # Intervalo (s) da verificação de escritas de outros processos (0 = desativada)
+    CHANGE_POLL_INTERVAL: float = 1.0
+    # Sessões após o login (ver sessoes.py): validade (s), onde ficam ("memoria" ou "sqlite") e limite
+    SESSION_TTL: float = 8 * 3600
+    SESSION_STORE: str = "memoria"
+    SESSION_MAX: int = 10000
+    # Chave do HMAC dos tokens; vazia = gerada por execução (ou guardada no banco com SESSION_STORE="sqlite")
+    SESSION_SECRET: str = field(default_factory=lambda: _env("SESSION_SECRET", ""))
+    # Limite de tentativas de login (ver limitador.py)
+    LOGIN_RATE_LIMIT: bool = True
+    LOGIN_BURST_USER: int = 5
+    LOGIN_ATTEMPTS_PER_MINUTE_USER: float = 10
+    LOGIN_BURST_SOURCE: int = 20
+    LOGIN_ATTEMPTS_PER_MINUTE_SOURCE: float = 60
+    LOGIN_LIMITER_MAX_KEYS: int = 10000
+    # Falhas seguidas que bloqueiam o usuário, e por quanto tempo (s)
+    LOGIN_MAX_FAILURES: int = 5
+    LOGIN_LOCKOUT_SECONDS: float = 300
+    # Intervalo máximo (s) entre as gravações em lote dos contadores de falhas
+    LOGIN_FAILURES_FLUSH_INTERVAL: float = 5.0
+    # Backend "mongo"; a conexão é aberta em segundo plano (ver armazenamento_mongo.py).
+    # A URI (com as credenciais) só vem do ambiente, em MONGODB_URI
+    MONGO_URI: str = field(default_factory=lambda: _env("MONGODB_URI", ""))
+    MONGO_DATABASE: str = field(default_factory=lambda: _env("MONGO_DATABASE", "projeto_empresa"))
+    MONGO_MAX_POOL_SIZE: int = field(default_factory=lambda: _env("MONGO_MAX_POOL_SIZE", 10, int))
+    MONGO_CONNECT_TIMEOUT_MS: int = field(default_factory=lambda: _env("MONGO_CONNECT_TIMEOUT_MS", 5000, int))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = field(
+        default_factory=lambda: _env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000, int))
+    MONGO_SOCKET_TIMEOUT_MS: int = field(default_factory=lambda: _env("MONGO_SOCKET_TIMEOUT_MS", 10000, int))
+    # primary, primaryPreferred, secondary, secondaryPreferred ou nearest
+    MONGO_READ_PREFERENCE: str = field(default_factory=lambda: _env("MONGO_READ_PREFERENCE", "primaryPreferred"))
+
+    def pragmas(self) -> dict:
+        if self.STORAGE_PROFILE not in STORAGE_PROFILES:
+            raise ValueError(f"Perfil de armazenamento desconhecido: {self.STORAGE_PROFILE}")
+        return STORAGE_PROFILES[self.STORAGE_PROFILE]
+
+    def mongo_options(self) -> dict:
+        """Parâmetros do MongoClient: pool, timeouts e preferência de leitura"""
+        return {
+            "maxPoolSize": self.MONGO_MAX_POOL_SIZE,
+            "connectTimeoutMS": self.MONGO_CONNECT_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": self.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "socketTimeoutMS": self.MONGO_SOCKET_TIMEOUT_MS,
+            "readPreference": self.MONGO_READ_PREFERENCE,
+        }
+
+@dataclass
+class ServerConfig:
+    """Servidor de autenticação sem interface (servidor.py)"""
+    HOST: str = "127.0.0.1"
+    PORT: int = 8765
+    # Caminho de socket Unix; quando definido, substitui HOST/PORT
+    UNIX_SOCKET: Optional[str] = None
+    # Conexões ociosas por mais que isso (s) são encerradas
+    IDLE_TIMEOUT: float = 60.0
+    # Requisições aceitas num único lote (lista JSON numa linha)
+    MAX_BATCH: int = 100
+    MAX_LINE_BYTES: int = 1024 * 1024
@@ -1,10 +1,22 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
+from tkinter import simpledialog
 import logging
+from functools import partial
 from config import AppConfig
-import sqlite3
 from datetime import datetime
+from db import PRODUCT_COLUMNS, PRODUCT_SORT_KEYS, ProductFilter
+from formatacao import formatar_produto, formatar_produtos
+from grid import VirtualTreeview
+from eventos import ALTERACAO_EXTERNA, EVENTOS_PRODUTO, PRODUTO_ATUALIZADO, PRODUTO_EXCLUIDO
+from executor import get_executor, subscribe_events
+from produtos import CadastroProduto
+
+PREFERENCIA_ORDENACAO = 'consulta_produtos.ordenacao'
+ORDENACAO_PADRAO = {'chave': 'data_cadastro', 'decrescente': True}
+# Espera para juntar vários eventos num único recarregamento
+ATRASO_RECARGA_MS = 200
 
 class ConsultaProdutos(tk.Toplevel):
     def __init__(self, master, db):
@@ -13,83 +25,274 @@ class ConsultaProdutos(tk.Toplevel):
         self.config = AppConfig()
         
         self.title("Consulta de Produtos")
-        self.geometry("800x400")
+        self.geometry("800x500")
         self.configure(bg=self.config.BG_COLOR)
         self.resizable(True, True)
         
+        self._recarga_job = None
         self._create_widgets()
         self._carregar_produtos()
+        subscribe_events(self, self.db.events, self._on_evento, EVENTOS_PRODUTO + (ALTERACAO_EXTERNA,))
 
     def _create_widgets(self):
         frame = tk.Frame(self, bg=self.config.BG_COLOR)
         frame.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # Treeview para exibir os produtos
-        self.tree = ttk.Treeview(
+        self._create_search_bar(frame)
+
+        # Grade virtual: só as linhas visíveis ficam na Treeview
+        self.grid_produtos = VirtualTreeview(
             frame,
-            columns=('ID', 'Nome', 'Quantidade', 'Preço', 'Data Cadastro'),
-            show='headings',
-            selectmode='browse'
+            columns=[
+                ('ID', 'ID', 50, 'center'),
+                ('Nome', 'Nome', 200, 'w'),
+                ('Quantidade', 'Quantidade', 100, 'center'),
+                ('Preço', 'Preço Unitário (R$)', 150, 'e'),
+                ('Data Cadastro', 'Data Cadastro', 150, 'center'),
+            ],
+            fetch_page=self.db.get_products_page,
+            count_rows=self.db.count_products,
+            format_row=formatar_produto,
+            format_rows=formatar_produtos,
+            executor=get_executor(self),
+            sort_keys={
+                'ID': 'id',
+                'Nome': 'nome',
+                'Quantidade': 'quantidade',
+                'Preço': 'preco',
+                'Data Cadastro': 'data_cadastro',
+            },
+            on_sort=self._salvar_ordenacao
         )
+        self.tree = self.grid_produtos.tree
+        self.grid_produtos.pack(fill='both', expand=True)
+        self.tree.bind('<Double-1>', lambda event: self._editar_produto())
 
-        # Configurar colunas
-        self.tree.heading('ID', text='ID')
-        self.tree.heading('Nome', text='Nome')
-        self.tree.heading('Quantidade', text='Quantidade')
-        self.tree.heading('Preço', text='Preço Unitário (R$)')
-        self.tree.heading('Data Cadastro', text='Data Cadastro')
-
-        # Ajustar largura das colunas
-        self.tree.column('ID', width=50, anchor='center')
-        self.tree.column('Nome', width=200, anchor='w')
-        self.tree.column('Quantidade', width=100, anchor='center')
-        self.tree.column('Preço', width=150, anchor='e')
-        self.tree.column('Data Cadastro', width=150, anchor='center')
-
-        # Scrollbar
-        scroll = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scroll.set)
-        
-        # Layout
-        self.tree.pack(side='left', fill='both', expand=True)
-        scroll.pack(side='right', fill='y')
+        acoes_frame = tk.Frame(frame, bg=self.config.BG_COLOR)
+        acoes_frame.pack(fill='x', pady=(5, 0))
+        for texto, comando in (("Editar", self._editar_produto),
+                               ("Ajustar Estoque", self._ajustar_estoque),
+                               ("Excluir", self._excluir_produto)):
+            tk.Button(
+                acoes_frame,
+                text=texto,
+                command=comando,
+                bg=self.config.BUTTON_BG,
+                fg=self.config.TEXT_COLOR
+            ).pack(side='left', padx=(0, 5))
+
+    def _create_search_bar(self, master):
+        busca_frame = tk.Frame(master, bg=self.config.BG_COLOR)
+        busca_frame.pack(fill='x', pady=(0, 5))
+        tk.Label(busca_frame, text="Buscar:", bg=self.config.BG_COLOR, fg=self.config.TEXT_COLOR).pack(side='left')
+        self.busca_entry = tk.Entry(busca_frame)
+        self.busca_entry.pack(side='left', fill='x', expand=True, padx=5)
+        self.busca_entry.bind('<Return>', lambda event: self._filtrar())
+        tk.Button(busca_frame, text="Filtrar", command=self._filtrar).pack(side='left', padx=2)
+        tk.Button(busca_frame, text="Limpar", command=self._limpar_filtro).pack(side='left', padx=2)
+
+        # Faixas: (rótulo, campo mínimo, campo máximo)
+        faixas_frame = tk.Frame(master, bg=self.config.BG_COLOR)
+        faixas_frame.pack(fill='x', pady=(0, 5))
+        self.faixas = {}
+        for rotulo, chave in (("Quantidade", 'quantidade'), ("Preço", 'preco'), ("Data (dd/mm/aaaa)", 'data')):
+            tk.Label(faixas_frame, text=f"{rotulo} de", bg=self.config.BG_COLOR, fg=self.config.TEXT_COLOR).pack(side='left')
+            minimo = tk.Entry(faixas_frame, width=10)
+            minimo.pack(side='left', padx=2)
+            tk.Label(faixas_frame, text="até", bg=self.config.BG_COLOR, fg=self.config.TEXT_COLOR).pack(side='left')
+            maximo = tk.Entry(faixas_frame, width=10)
+            maximo.pack(side='left', padx=(2, 10))
+            for entry in (minimo, maximo):
+                entry.bind('<Return>', lambda event: self._filtrar())
+            self.faixas[chave] = (minimo, maximo)
+
+    def _ler_filtro(self) -> tuple:
+        """Retorna (ProductFilter, None) ou (None, mensagem de erro)"""
+        def numero(entry, tipo, rotulo):
+            texto = entry.get().strip().replace(',', '.')
+            if not texto:
+                return None
+            try:
+                return tipo(texto)
+            except ValueError:
+                raise ValueError(f"{rotulo} inválido: {entry.get().strip()}")
+
+        def data(entry):
+            texto = entry.get().strip()
+            if not texto:
+                return None
+            try:
+                return datetime.strptime(texto, '%d/%m/%Y').strftime('%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"Data inválida: {texto} (use dd/mm/aaaa)")
 
-    def _carregar_produtos(self):
         try:
-            produtos = self.db.get_all_products()
-            print(f"\n Número de produtos encontrados: {len(produtos)}")
-            
-            self.tree.delete(*self.tree.get_children())
-            
-            for produto in produtos:
-                print(f"Processando produto: {produto}")
-                
-                try:
-                    # Acesse os campos por índice numérico
-                    id_produto = produto[0]
-                    nome = produto[1]
-                    quantidade = produto[2]
-                    preco = produto[3]
-                    data_cadastro = produto[4]
-                    
-                    # Formate os dados
-                    data = datetime.strptime(data_cadastro, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y %H:%M')
-                    preco_formatado = f"R$ {preco:.2f}".replace('.', ',')
-                    
-                    # Insira na treeview
-                    self.tree.insert('', 'end', values=(
-                        id_produto,
-                        nome,
-                        quantidade,
-                        preco_formatado,
-                        data
-                    ))
-                    
-                except Exception as e:
-                    print(f"Erro ao processar produto {produto}: {str(e)}")
-                    logging.error(f"Erro no processamento: {str(e)}")
+            filtro = ProductFilter(
+                texto=self.busca_entry.get().strip(),
+                quantidade_min=numero(self.faixas['quantidade'][0], int, "Quantidade"),
+                quantidade_max=numero(self.faixas['quantidade'][1], int, "Quantidade"),
+                preco_min=numero(self.faixas['preco'][0], float, "Preço"),
+                preco_max=numero(self.faixas['preco'][1], float, "Preço"),
+                data_inicio=data(self.faixas['data'][0]),
+                data_fim=data(self.faixas['data'][1])
+            )
+        except ValueError as e:
+            return None, str(e)
+        return filtro, None
+
+    def _filtrar(self):
+        filtro, erro = self._ler_filtro()
+        if erro:
+            messagebox.showerror("Erro", erro, parent=self)
+            return
+        # A grade passa a paginar só o resultado filtrado
+        self.grid_produtos.fetch_page = partial(self.db.get_products_page, filtro=filtro)
+        self.grid_produtos.count_rows = partial(self.db.count_products, filtro=filtro)
+        self.grid_produtos.reload(keep_position=False)
+
+    def _limpar_filtro(self):
+        self.busca_entry.delete(0, tk.END)
+        for minimo, maximo in self.faixas.values():
+            minimo.delete(0, tk.END)
+            maximo.delete(0, tk.END)
+        self.grid_produtos.fetch_page = self.db.get_products_page
+        self.grid_produtos.count_rows = self.db.count_products
+        self.grid_produtos.reload(keep_position=False)
+
+    def _produto_selecionado(self):
+        produto = self.grid_produtos.selected_row()
+        if produto is None:
+            messagebox.showwarning("Aviso", "Selecione um produto", parent=self)
+        return produto
+
+    def _editar_produto(self):
+        produto = self._produto_selecionado()
+        if produto is None:
+            return
+        # A edição parte da versão atual do banco, não da linha em cache
+        get_executor(self).submit(
+            self.db.get_product, produto[0],
+            on_success=self._abrir_edicao,
+            on_error=self._on_erro_acao,
+            owner=self
+        )
+
+    def _abrir_edicao(self, produto):
+        if produto is None:
+            messagebox.showerror("Erro", "Produto não encontrado", parent=self)
+            return
+        self._atualizar_linha(produto)
+        CadastroProduto(self, self.db, produto=produto, on_salvo=self._atualizar_linha)
+
+    def _atualizar_linha(self, produto: tuple):
+        self.grid_produtos.update_row(produto[0], produto[:len(PRODUCT_COLUMNS)])
+
+    def _ajustar_estoque(self):
+        produto = self._produto_selecionado()
+        if produto is None:
+            return
+        delta = simpledialog.askinteger(
+            "Ajustar Estoque",
+            f"Quantidade a somar ao estoque de '{produto[1]}'\n(negativa para retirar):",
+            parent=self
+        )
+        if not delta:
+            return
+        get_executor(self).submit(
+            self.db.adjust_stock, produto[0], delta,
+            on_success=self._on_resultado_acao,
+            on_error=self._on_erro_acao,
+            owner=self
+        )
+
+    def _excluir_produto(self):
+        produto = self._produto_selecionado()
+        if produto is None:
+            return
+        # A versão vem do banco; se a linha exibida já não é a atual, nada é excluído
+        get_executor(self).submit(
+            self.db.get_product, produto[0],
+            on_success=lambda atual: self._confirmar_exclusao(produto, atual),
+            on_error=self._on_erro_acao,
+            owner=self
+        )
+
+    def _confirmar_exclusao(self, exibido: tuple, produto):
+        if produto is None:
+            messagebox.showerror("Erro", "Produto não encontrado", parent=self)
+            return
+        if tuple(produto[:len(PRODUCT_COLUMNS)]) != tuple(exibido):
+            self._atualizar_linha(produto)
+            messagebox.showerror("Erro", "Produto foi alterado por outro usuário; confira os dados atuais",
+                                 parent=self)
+            return
+        if not messagebox.askyesno("Confirmar", f"Excluir o produto '{produto[1]}'?", parent=self):
+            return
+        get_executor(self).submit(
+            self.db.delete_product, produto[0], produto[-1],
+            on_success=lambda resultado: self._on_resultado_acao(resultado, excluido=produto[0]),
+            on_error=self._on_erro_acao,
+            owner=self
+        )
+
+    def _on_resultado_acao(self, resultado: tuple, excluido=None):
+        sucesso, mensagem, produto = resultado
+        if sucesso and excluido is not None:
+            self.grid_produtos.remove_row(excluido)
+        elif produto is not None:
+            self._atualizar_linha(produto)
+        if not sucesso:
+            messagebox.showerror("Erro", mensagem, parent=self)
+
+    def _on_erro_acao(self, e: Exception):
+        logging.error(f"Erro na consulta: {str(e)}")
+        messagebox.showerror("Erro", f"Falha crítica: {str(e)}", parent=self)
+
+    def _on_evento(self, evento):
+        # Alterações de uma linha são aplicadas nela; inserções e escritas de
+        # outros processos recarregam só a contagem e as páginas visíveis.
+        if evento.tipo == PRODUTO_ATUALIZADO:
+            if self.grid_produtos.update_row(evento.dados['produto'][0],
+                                             evento.dados['produto'][:len(PRODUCT_COLUMNS)]):
+                return
+        elif evento.tipo == PRODUTO_EXCLUIDO:
+            if self.grid_produtos.remove_row(evento.dados['id']):
+                return
+        elif evento.tipo == ALTERACAO_EXTERNA and evento.dados.get('tabela') != 'produtos':
+            return
+        self._agendar_recarga()
+
+    def _agendar_recarga(self):
+        if self._recarga_job is not None:
+            return
 
+        def _recarregar():
+            self._recarga_job = None
+            self.grid_produtos.invalidate_rows()
+            self.grid_produtos.reload()
+
+        self._recarga_job = self.after(ATRASO_RECARGA_MS, _recarregar)
+
+    def _carregar_produtos(self):
+        # A ordenação da última consulta é lida antes da primeira página
+        get_executor(self).submit(
+            self.db.get_preference, PREFERENCIA_ORDENACAO, ORDENACAO_PADRAO,
+            on_success=self._aplicar_ordenacao,
+            on_error=lambda e: self._aplicar_ordenacao(ORDENACAO_PADRAO),
+            owner=self
+        )
+
+    def _aplicar_ordenacao(self, ordenacao: dict):
+        if not isinstance(ordenacao, dict) or ordenacao.get('chave') not in PRODUCT_SORT_KEYS:
+            ordenacao = ORDENACAO_PADRAO
+        try:
+            self.grid_produtos.sort_by(ordenacao['chave'], ordenacao['decrescente'])
         except Exception as e:
-            print(f" Erro geral: {str(e)}")
             logging.error(f"Erro na consulta: {str(e)}")
-            tk.messagebox.showerror("Erro", "Falha ao carregar dados")
\ No newline at end of file
+            tk.messagebox.showerror("Erro", "Falha ao carregar dados")
+
+    def _salvar_ordenacao(self, chave: str, decrescente: bool):
+        get_executor(self).submit(
+            self.db.set_preference, PREFERENCIA_ORDENACAO,
+            {'chave': chave, 'decrescente': decrescente}
+        )
@@ -1,8 +1,22 @@
 import sqlite3
-import hashlib
 import logging
-from dataclasses import dataclass
+import base64
+import json
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Optional
 from config import DatabaseConfig
+from pool import ConnectionPool
+from autocomplete import PrefixCache, UsernameIndex
+from bloom import UsernameBloom
+from hashing import HashingExecutor, PasswordHasher
+from resumo import criar_tabelas_resumo
+from sessoes import get_session_manager
+from limitador import LoginBloqueado, get_login_limiter
+from validacao import validar_usuario
+from eventos import (EventBus, DataVersionWatcher, ALTERACAO_EXTERNA, PRODUTO_INSERIDO,
+                     PRODUTOS_IMPORTADOS, PRODUTO_ATUALIZADO, PRODUTO_EXCLUIDO, USUARIO_REGISTRADO)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -10,18 +24,134 @@ logging.basicConfig(
     filename='app.log'
 )
 
+PRODUCT_COLUMNS = ('id', 'nome', 'quantidade', 'preco', 'data_cadastro')
+# Chaves de ordenação aceitas pela paginação (todas cobertas por índice)
+PRODUCT_SORT_KEYS = ('data_cadastro', 'id', 'nome', 'quantidade', 'preco')
+# Expressão de ordenação por chave; precisa coincidir com a do índice (nome sem diferenciar maiúsculas)
+SORT_EXPRESSIONS = {'nome': 'nome COLLATE NOCASE'}
+MAX_PAGE_SIZE = 1000
+USER_SEARCH_LIMIT = 10
+
+@dataclass
+class ProductPage:
+    rows: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+def termos_busca(texto: str) -> list:
+    """Palavras sem acentos e em minúsculas, como o tokenizador do produtos_fts"""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(char for char in decomposto if not unicodedata.combining(char))
+    return re.findall(r'\w+', sem_acentos.casefold())
+
+def encode_cursor(value, last_id: int, sort_key: str, descending: bool) -> str:
+    """Cursor opaco de paginação: a chave de ordenação e o id da última linha entregue"""
+    payload = json.dumps([sort_key, descending, value, last_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str, sort_key: str, descending: bool) -> tuple:
+    try:
+        key, desc, value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cursor inválido: {str(e)}")
+    if key != sort_key or desc != descending:
+        raise ValueError("Cursor não corresponde à ordenação solicitada")
+    return value, last_id
+
+@dataclass
+class ProductFilter:
+    """Filtros da consulta de produtos; datas no formato AAAA-MM-DD (limites inclusivos)"""
+    texto: str = ''
+    quantidade_min: Optional[int] = None
+    quantidade_max: Optional[int] = None
+    preco_min: Optional[float] = None
+    preco_max: Optional[float] = None
+    data_inicio: Optional[str] = None
+    data_fim: Optional[str] = None
+
+    def fts_query(self) -> str:
+        """Consulta MATCH do FTS5: cada palavra vira um prefixo entre aspas ("cafe"* "gra"*)"""
+        return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', self.texto))
+
+    def apenas_texto(self) -> bool:
+        return all(getattr(self, name) is None for name in (
+            'quantidade_min', 'quantidade_max', 'preco_min', 'preco_max', 'data_inicio', 'data_fim'
+        ))
+
+    def matches(self, produto) -> bool:
+        """Aplica o filtro a uma linha em memória, com as mesmas regras do SQL"""
+        _, nome, quantidade, preco, data_cadastro = produto[:5]
+        palavras = termos_busca(self.texto)
+        if palavras:
+            termos = termos_busca(nome)
+            if not all(any(termo.startswith(palavra) for termo in termos) for palavra in palavras):
+                return False
+        for valor, minimo, maximo in ((quantidade, self.quantidade_min, self.quantidade_max),
+                                      (preco, self.preco_min, self.preco_max)):
+            if (minimo is not None and valor < minimo) or (maximo is not None and valor > maximo):
+                return False
+        if self.data_inicio is not None and (data_cadastro is None or data_cadastro < self.data_inicio):
+            return False
+        if self.data_fim is not None and (data_cadastro is None or data_cadastro[:10] > self.data_fim):
+            return False
+        return True
+
+    def to_sql(self, fts_enabled: bool) -> tuple:
+        """Retorna (condições, parâmetros) para o WHERE; cada condição usa um índice"""
+        conditions, params = [], []
+        words = re.findall(r'\w+', self.texto)
+        if words and fts_enabled:
+            conditions.append("id IN (SELECT rowid FROM produtos_fts WHERE produtos_fts MATCH ?)")
+            params.append(self.fts_query())
+        elif words:
+            for word in words:
+                conditions.append("nome LIKE '%' || ? || '%'")
+                params.append(word)
+        for column, operator, value in (
+            ('quantidade', '>=', self.quantidade_min),
+            ('quantidade', '<=', self.quantidade_max),
+            ('preco', '>=', self.preco_min),
+            ('preco', '<=', self.preco_max),
+            ('data_cadastro', '>=', self.data_inicio),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        if self.data_fim is not None:
+            conditions.append("data_cadastro < date(?, '+1 day')")
+            params.append(self.data_fim)
+        return conditions, params
+
 class UserDB:
     def __init__(self, config: DatabaseConfig = DatabaseConfig()):
         self.config = config
+        self.pool = ConnectionPool(config)
+        self.hash_executor = HashingExecutor(config.HASH_WORKERS) if config.HASH_WORKERS > 0 else None
+        self.hasher = PasswordHasher(config, self.hash_executor)
+        if self.hash_executor is not None:
+            self.hash_executor.warm_up()
+        self._search_cache = PrefixCache(config.USER_SEARCH_CACHE_SIZE, USER_SEARCH_LIMIT)
+        self._username_index = None
+        self._bloom = None
+        self.fts_enabled = False
+        # Escritas confirmadas são publicadas aqui (ver eventos.py)
+        self.events = EventBus()
+        self._watcher = None
         print("Iniciando banco de dados...")  # Debug
         self._initialize_db()
         self._create_product_table()
+        self._create_preferences_table()
+        if config.USERNAME_INDEX:
+            self._load_username_index()
+        if config.USERNAME_BLOOM:
+            self._load_username_bloom()
+        if config.CHANGE_POLL_INTERVAL > 0:
+            self._start_watcher()
         print("Tabelas verificadas com sucesso!")  # Debug
 
     def get_all_products(self) -> list:
         """Retorna todos os produtos do estoque"""
         try:
-            with sqlite3.connect(self.config.DB_NAME) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM produtos ORDER BY data_cadastro DESC")
                 return cursor.fetchall()
@@ -31,7 +161,7 @@ class UserDB:
 
     def _initialize_db(self) -> None:
         try:
-            with sqlite3.connect(self.config.DB_NAME) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(f'''
                     CREATE TABLE IF NOT EXISTS {self.config.TABLE_NAME} (
@@ -47,21 +177,35 @@ class UserDB:
 
     def register_user(self, username: str, password: str) -> tuple:
         try:
-            if len(username) < self.config.MIN_USERNAME_LENGTH:
-                return (False, f"Nome de usuário muito curto (mínimo {self.config.MIN_USERNAME_LENGTH} caracteres)")
-            
-            if len(password) < self.config.MIN_PASSWORD_LENGTH:
-                return (False, f"Senha muito curta (mínimo {self.config.MIN_PASSWORD_LENGTH} caracteres)")
+            erro = validar_usuario(username, password, self.config)
+            if erro:
+                return (False, erro)
 
-            hashed_password = UserDB._hash_password(password)
-            
-            with sqlite3.connect(self.config.DB_NAME) as conn:
+            hashed_password = self.hasher.hash(password)
+            return self.insert_user(username, hashed_password)
+
+        except Exception as e:
+            logging.error(f"Erro crítico no registro: {str(e)}")
+            return (False, f"Erro interno: {str(e)}")
+
+    def insert_user(self, username: str, hashed_password: str) -> tuple:
+        """Grava um usuário já validado, com a senha já convertida em hash"""
+        try:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(f'''
                     INSERT INTO {self.config.TABLE_NAME} (username, password)
                     VALUES (?, ?)
                 ''', (username, hashed_password))
                 conn.commit()
+                self._search_cache.clear()
+                if self._username_index is not None:
+                    self._username_index.add(username)
+                if self._bloom is not None:
+                    self._bloom.add(username, cursor.lastrowid)
+                if self._watcher is not None:
+                    self._watcher.local_user(cursor.lastrowid)
+                self.events.publish(USUARIO_REGISTRADO, username=username)
                 return (True, "Registro bem-sucedido!")
                 
         except sqlite3.IntegrityError:
@@ -73,42 +217,148 @@ class UserDB:
 
     def validate_user(self, username: str, password: str) -> bool:
         try:
-            hashed_password = self._hash_password(password)
-            with sqlite3.connect(self.config.DB_NAME) as conn:
+            if self._bloom is not None and not self._bloom.might_exist(username):
+                return False
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(f'''
                     SELECT password FROM {self.config.TABLE_NAME}
                     WHERE username = ?
                 ''', (username,))
                 result = cursor.fetchone()
-                return result and result[0] == hashed_password
+            if not result or not self.hasher.verify(password, result[0]):
+                return False
+            if self.hasher.needs_rehash(result[0]):
+                self._rehash_password(username, password, result[0])
+            return True
         except Exception as e:
             logging.error(f"Erro na validação: {str(e)}")
             return False
 
-    @staticmethod
-    def _hash_password(password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
+    def _rehash_password(self, username: str, password: str, old_hash: str) -> None:
+        """Regrava o hash com os parâmetros atuais após um login bem-sucedido"""
+        new_hash = self.hasher.hash(password)
+        try:
+            with self.pool.connection() as conn:
+                # A condição no hash antigo evita sobrescrever uma troca de senha concorrente
+                conn.execute(f'''
+                    UPDATE {self.config.TABLE_NAME} SET password = ?
+                    WHERE username = ? AND password = ?
+                ''', (new_hash, username, old_hash))
+                conn.commit()
+            logging.info(f"Hash de senha atualizado para {username}")
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao atualizar hash de senha: {str(e)}")
     
     def search_users(self, search_term: str) -> list:
             """Busca usuários que começam com o termo fornecido"""
+            if self._username_index is not None:
+                return self._username_index.search(search_term, USER_SEARCH_LIMIT)
+            cached = self._search_cache.get(search_term)
+            if cached is not None:
+                return cached
             try:
-                with sqlite3.connect(self.config.DB_NAME) as conn:
+                # Escapa os curingas do LIKE para que o termo seja um prefixo literal
+                escaped = search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                with self.pool.connection() as conn:
                     cursor = conn.cursor()
                     cursor.execute(f'''
                         SELECT username FROM {self.config.TABLE_NAME}
-                        WHERE username LIKE ? || '%'
+                        WHERE username LIKE ? || '%' ESCAPE '\\'
                         ORDER BY username
-                        LIMIT 10
-                    ''', (search_term,))
-                    return [row[0] for row in cursor.fetchall()]
+                        LIMIT ?
+                    ''', (escaped, USER_SEARCH_LIMIT))
+                    users = [row[0] for row in cursor.fetchall()]
+                self._search_cache.put(search_term, users)
+                return users
             except Exception as e:
                 logging.error(f"Erro na busca de usuários: {str(e)}")
                 return []
 
+    def _load_username_index(self) -> None:
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(
+                    f"SELECT username FROM {self.config.TABLE_NAME} ORDER BY username"
+                )
+                self._username_index = UsernameIndex(row[0] for row in cursor)
+            logging.info(f"Índice de usuários carregado: {len(self._username_index)} nomes")
+        except sqlite3.Error as e:
+            # Sem índice, a busca continua pelo banco
+            logging.error(f"Erro ao carregar índice de usuários: {str(e)}")
+
+    def _load_username_bloom(self) -> None:
+        path = self.config.BLOOM_FILE or (
+            None if self.config.DB_NAME == ':memory:' else f"{self.config.DB_NAME}.bloom"
+        )
+
+        def carregar_desde(marcador: int) -> list:
+            with self.pool.connection() as conn:
+                return conn.execute(
+                    f"SELECT id, username FROM {self.config.TABLE_NAME} WHERE id > ? ORDER BY id", (marcador,)
+                ).fetchall()
+
+        def marcador_maximo() -> int:
+            with self.pool.connection() as conn:
+                return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.config.TABLE_NAME}").fetchone()[0]
+
+        try:
+            self._bloom = UsernameBloom(
+                path, self.config.BLOOM_CAPACITY, self.config.BLOOM_ERROR_RATE,
+                carregar_desde, marcador_maximo, self.config.BLOOM_SYNC_INTERVAL
+            )
+        except (sqlite3.Error, OSError) as e:
+            # Sem filtro, todo login consulta o banco
+            logging.error(f"Erro ao carregar filtro de usuários: {str(e)}")
+
+    def _start_watcher(self) -> None:
+        try:
+            self._watcher = DataVersionWatcher(
+                self.config.DB_NAME, self.events, self.config.CHANGE_POLL_INTERVAL, self.config.TABLE_NAME
+            )
+            self._watcher.start()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao iniciar a verificação de alterações externas: {str(e)}")
+            self._watcher = None
+            return
+        self.events.subscribe(self._on_external_change, (ALTERACAO_EXTERNA,))
+
+    def _on_external_change(self, evento) -> None:
+        if evento.dados.get('tabela') != self.config.TABLE_NAME:
+            return
+        # Usuários cadastrados por outro processo entram no autocomplete e no filtro
+        self._search_cache.clear()
+        if self._bloom is not None:
+            try:
+                self._bloom.sync()
+            except sqlite3.Error as e:
+                logging.error(f"Erro ao atualizar filtro de usuários: {str(e)}")
+        if self._username_index is None:
+            return
+        try:
+            with self.pool.connection() as conn:
+                novos = conn.execute(
+                    f"SELECT username FROM {self.config.TABLE_NAME} WHERE id > ?", (evento.dados['desde'],)
+                ).fetchall()
+            for (username,) in novos:
+                self._username_index.add(username)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao atualizar índice de usuários: {str(e)}")
+
+    @staticmethod
+    def _products_version(conn) -> int:
+        row = conn.execute("SELECT versao FROM versoes_tabela WHERE tabela = 'produtos'").fetchone()
+        return row[0] if row else 0
+
+    def _publish_product_change(self, alteradas: int, versao: int, tipo: str, **dados) -> None:
+        """Publica uma escrita já confirmada; cada linha alterada soma 1 à versão de produtos"""
+        if self._watcher is not None:
+            self._watcher.local_write(versao - alteradas, versao)
+        self.events.publish(tipo, **dados)
+
     def _create_product_table(self):
         try:
-            with sqlite3.connect(self.config.DB_NAME) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS produtos (
@@ -116,53 +366,446 @@ class UserDB:
                         nome TEXT NOT NULL,
                         quantidade INTEGER NOT NULL,
                         preco REAL NOT NULL,
-                        data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        versao INTEGER NOT NULL DEFAULT 1
                     )
                 ''')
+                # Bancos anteriores ao controle de versão das linhas
+                colunas = [coluna[1] for coluna in cursor.execute("PRAGMA table_info(produtos)")]
+                if 'versao' not in colunas:
+                    cursor.execute("ALTER TABLE produtos ADD COLUMN versao INTEGER NOT NULL DEFAULT 1")
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_produtos_data_cadastro
+                    ON produtos (data_cadastro, id)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_produtos_quantidade
+                    ON produtos (quantidade, id)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_produtos_preco
+                    ON produtos (preco, id)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_produtos_nome
+                    ON produtos (nome COLLATE NOCASE, id)
+                ''')
+                self.fts_enabled = self._create_fts_index(cursor)
+                self._create_version_tracking(cursor)
+                criar_tabelas_resumo(cursor)
                 print(" Tabela 'produtos' criada/verificada!")
                 conn.commit()
         except Exception as e:
             print(f" Erro na tabela produtos: {str(e)}")
 
+    @staticmethod
+    def _create_fts_index(cursor) -> bool:
+        """Índice FTS5 (external content) sobre produtos.nome, mantido por triggers.
+
+        Retorna False se o SQLite não tiver FTS5; a busca por texto usa LIKE nesse caso.
+        """
+        try:
+            existe = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'produtos_fts'"
+            ).fetchone()
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+                    nome, content='produtos', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logging.warning(f"FTS5 indisponível, busca por texto usará LIKE: {str(e)}")
+            return False
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_insert AFTER INSERT ON produtos
+            BEGIN
+                INSERT INTO produtos_fts (rowid, nome) VALUES (NEW.id, NEW.nome);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_delete AFTER DELETE ON produtos
+            BEGIN
+                INSERT INTO produtos_fts (produtos_fts, rowid, nome) VALUES ('delete', OLD.id, OLD.nome);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_update AFTER UPDATE OF nome ON produtos
+            BEGIN
+                INSERT INTO produtos_fts (produtos_fts, rowid, nome) VALUES ('delete', OLD.id, OLD.nome);
+                INSERT INTO produtos_fts (rowid, nome) VALUES (NEW.id, NEW.nome);
+            END
+        ''')
+        if not existe:
+            # Banco com produtos anteriores ao índice
+            cursor.execute("INSERT INTO produtos_fts (produtos_fts) VALUES ('rebuild')")
+        return True
+
+    @staticmethod
+    def _create_version_tracking(cursor) -> None:
+        """Contador de versão da tabela produtos, incrementado por triggers a cada escrita"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS versoes_tabela (
+                tabela TEXT PRIMARY KEY,
+                versao INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO versoes_tabela (tabela, versao) VALUES ('produtos', 0)")
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_produtos_versao_{evento.lower()}
+                AFTER {evento} ON produtos
+                BEGIN
+                    UPDATE versoes_tabela SET versao = versao + 1 WHERE tabela = 'produtos';
+                END
+            ''')
+
+    def _create_preferences_table(self) -> None:
+        try:
+            with self.pool.connection() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS preferencias (
+                        chave TEXT PRIMARY KEY,
+                        valor TEXT NOT NULL
+                    )
+                ''')
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao criar tabela de preferências: {str(e)}")
+
+    def get_preference(self, chave: str, padrao=None):
+        """Retorna a preferência gravada (valor JSON), ou padrao se não existir"""
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute("SELECT valor FROM preferencias WHERE chave = ?", (chave,)).fetchone()
+            return json.loads(row[0]) if row else padrao
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Erro ao ler preferência {chave}: {str(e)}")
+            return padrao
+
+    def set_preference(self, chave: str, valor) -> bool:
+        try:
+            with self.pool.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO preferencias (chave, valor) VALUES (?, ?)",
+                    (chave, json.dumps(valor))
+                )
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao gravar preferência {chave}: {str(e)}")
+            return False
+
+    def table_version(self, tabela: str = 'produtos') -> int:
+        """Versão atual da tabela; muda sempre que a tabela é alterada"""
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT versao FROM versoes_tabela WHERE tabela = ?", (tabela,)
+                ).fetchone()
+                return row[0] if row else 0
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao ler versão da tabela {tabela}: {str(e)}")
+            return -1
+
     def register_product(self, nome: str, quantidade: int, preco: float) -> bool:
         try:
-            with sqlite3.connect(self.config.DB_NAME) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO produtos (nome, quantidade, preco)
                     VALUES (?, ?, ?)
                 ''', (nome, quantidade, preco))
+                produto = self._select_product(conn, cursor.lastrowid)
+                versao = self._products_version(conn)
                 conn.commit()
-                return True
+            self._publish_product_change(1, versao, PRODUTO_INSERIDO, produto=produto)
+            return True
         except sqlite3.Error as e:
             logging.error(f"Erro no cadastro de produto: {str(e)}")
             return False
-    
+
+    def register_products(self, produtos: list) -> bool:
+        """Insere vários produtos (nome, quantidade, preco) numa única transação"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.executemany('''
+                    INSERT INTO produtos (nome, quantidade, preco)
+                    VALUES (?, ?, ?)
+                ''', produtos)
+                versao = self._products_version(conn)
+                conn.commit()
+            self._publish_product_change(cursor.rowcount, versao, PRODUTOS_IMPORTADOS, total=cursor.rowcount)
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Erro no cadastro de produtos em lote: {str(e)}")
+            return False
+
+    def get_product(self, product_id: int) -> Optional[tuple]:
+        """Retorna (id, nome, quantidade, preco, data_cadastro, versao) ou None"""
+        try:
+            with self.pool.connection() as conn:
+                return self._select_product(conn, product_id)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao buscar produto {product_id}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _select_product(conn, product_id: int) -> Optional[tuple]:
+        return conn.execute(
+            f"SELECT {', '.join(PRODUCT_COLUMNS)}, versao FROM produtos WHERE id = ?", (product_id,)
+        ).fetchone()
+
+    def update_product(self, product_id: int, nome: str, quantidade: int, preco: float,
+                       versao: int) -> tuple:
+        """Atualiza o produto se ele ainda estiver na versao lida (bloqueio otimista).
+
+        Retorna (True, mensagem, produto atualizado) ou (False, mensagem, produto atual ou None).
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute('''
+                    UPDATE produtos SET nome = ?, quantidade = ?, preco = ?, versao = versao + 1
+                    WHERE id = ? AND versao = ?
+                ''', (nome, quantidade, preco, product_id, versao))
+                produto = self._select_product(conn, product_id)
+                versao_tabela = self._products_version(conn)
+                conn.commit()
+            if cursor.rowcount == 1:
+                self._publish_product_change(1, versao_tabela, PRODUTO_ATUALIZADO, produto=produto)
+                return (True, "Produto atualizado com sucesso!", produto)
+            if produto is None:
+                return (False, "Produto não encontrado", None)
+            return (False, "Produto foi alterado por outro usuário; confira os dados atuais", produto)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao atualizar produto {product_id}: {str(e)}")
+            return (False, "Falha ao atualizar produto", None)
+
+    def adjust_stock(self, product_id: int, delta: int) -> tuple:
+        """Soma delta à quantidade numa única instrução; o estoque nunca fica negativo.
+
+        Não depende da versão lida: ajustes concorrentes se acumulam.
+        Retorna (sucesso, mensagem, produto atual ou None).
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute('''
+                    UPDATE produtos SET quantidade = quantidade + ?, versao = versao + 1
+                    WHERE id = ? AND quantidade + ? >= 0
+                ''', (delta, product_id, delta))
+                produto = self._select_product(conn, product_id)
+                versao_tabela = self._products_version(conn)
+                conn.commit()
+            if cursor.rowcount == 1:
+                self._publish_product_change(1, versao_tabela, PRODUTO_ATUALIZADO, produto=produto)
+                return (True, "Estoque ajustado com sucesso!", produto)
+            if produto is None:
+                return (False, "Produto não encontrado", None)
+            return (False, f"Estoque insuficiente (disponível: {produto[2]})", produto)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao ajustar estoque do produto {product_id}: {str(e)}")
+            return (False, "Falha ao ajustar estoque", None)
+
+    def delete_product(self, product_id: int, versao: Optional[int] = None) -> tuple:
+        """Exclui o produto; com versao, só se ele não tiver sido alterado desde a leitura.
+
+        Retorna (sucesso, mensagem, produto atual ou None).
+        """
+        try:
+            with self.pool.connection() as conn:
+                if versao is None:
+                    cursor = conn.execute("DELETE FROM produtos WHERE id = ?", (product_id,))
+                else:
+                    cursor = conn.execute(
+                        "DELETE FROM produtos WHERE id = ? AND versao = ?", (product_id, versao)
+                    )
+                produto = self._select_product(conn, product_id)
+                versao_tabela = self._products_version(conn)
+                conn.commit()
+            if cursor.rowcount == 1:
+                self._publish_product_change(1, versao_tabela, PRODUTO_EXCLUIDO, id=product_id)
+                return (True, "Produto excluído com sucesso!", None)
+            if produto is None:
+                return (False, "Produto não encontrado", None)
+            return (False, "Produto foi alterado por outro usuário; confira os dados atuais", produto)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao excluir produto {product_id}: {str(e)}")
+            return (False, "Falha ao excluir produto", None)
+
+    def iter_products(self, batch_size: int = 1000):
+        """Percorre todos os produtos em blocos de fetchmany, com memória constante.
+
+        A conexão fica emprestada do pool até o gerador terminar ou ser fechado.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.execute(f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM produtos ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def count_products(self, filtro: Optional[ProductFilter] = None) -> int:
+        """Retorna o total de produtos cadastrados (que atendem ao filtro, se houver)"""
+        conditions, params = filtro.to_sql(self.fts_enabled) if filtro else ([], [])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            with self.pool.connection() as conn:
+                if not conditions:
+                    # Total mantido pelos triggers de resumo, sem percorrer a tabela
+                    row = conn.execute("SELECT total_produtos FROM resumo_estoque WHERE id = 1").fetchone()
+                    if row is not None:
+                        return row[0]
+                if conditions and self.fts_enabled and filtro.apenas_texto():
+                    # Só texto: a contagem sai do próprio índice FTS, sem tocar em produtos
+                    return conn.execute(
+                        "SELECT COUNT(*) FROM produtos_fts WHERE produtos_fts MATCH ?",
+                        (filtro.fts_query(),)
+                    ).fetchone()[0]
+                return conn.execute(f"SELECT COUNT(*) FROM produtos {where}", params).fetchone()[0]
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao contar produtos: {str(e)}")
+            return 0
+
+    def get_products_page(self, cursor: Optional[str] = None, page_size: int = 50,
+                          sort_key: str = 'data_cadastro', descending: bool = True,
+                          offset: int = 0, filtro: Optional[ProductFilter] = None) -> ProductPage:
+        """Retorna uma página de produtos usando paginação por chave (keyset).
+
+        O cursor é o token devolvido em ProductPage.next_cursor da página anterior;
+        cada página custa uma busca no índice, independente da posição na tabela.
+        Sem cursor, offset permite saltar direto para uma posição (percorre só o índice).
+        Com filtro, as mesmas regras valem sobre o subconjunto filtrado.
+        """
+        if sort_key not in PRODUCT_SORT_KEYS:
+            raise ValueError(f"Chave de ordenação inválida: {sort_key}")
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        order = "DESC" if descending else "ASC"
+        op = "<" if descending else ">"
+
+        columns = ", ".join(PRODUCT_COLUMNS)
+        sort_expr = SORT_EXPRESSIONS.get(sort_key, sort_key)
+        order_by = f"id {order}" if sort_key == 'id' else f"{sort_expr} {order}, id {order}"
+        filters, filter_params = filtro.to_sql(self.fts_enabled) if filtro else ([], [])
+
+        def where(*conditions) -> str:
+            conditions = [*conditions, *filters]
+            return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        if not cursor and offset > 0:
+            sql = f'''
+                SELECT {columns} FROM produtos WHERE id IN (
+                    SELECT id FROM produtos {where()} ORDER BY {order_by} LIMIT ? OFFSET ?
+                )
+                ORDER BY {order_by}
+            '''
+            params = (*filter_params, page_size + 1, offset)
+        elif not cursor:
+            sql = f"SELECT {columns} FROM produtos {where()} ORDER BY {order_by} LIMIT ?"
+            params = (*filter_params, page_size + 1)
+        else:
+            value, last_id = decode_cursor(cursor, sort_key, descending)
+            if sort_key == 'id':
+                sql = f"SELECT {columns} FROM produtos {where(f'id {op} ?')} ORDER BY {order_by} LIMIT ?"
+                params = (last_id, *filter_params, page_size + 1)
+            else:
+                # Duas buscas no índice (mesmo valor com id seguinte / valores seguintes);
+                # a comparação por row value só usaria a primeira coluna do índice.
+                sql = f'''
+                    SELECT * FROM (
+                        SELECT {columns} FROM produtos
+                        {where(f'{sort_expr} = ?', f'id {op} ?')}
+                        ORDER BY {order_by} LIMIT ?
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT {columns} FROM produtos
+                        {where(f'{sort_expr} {op} ?')}
+                        ORDER BY {order_by} LIMIT ?
+                    )
+                    ORDER BY {order_by} LIMIT ?
+                '''
+                params = (value, last_id, *filter_params, page_size + 1,
+                          value, *filter_params, page_size + 1, page_size + 1)
+
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao paginar produtos: {str(e)}")
+            return ProductPage()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = encode_cursor(last[PRODUCT_COLUMNS.index(sort_key)], last[0],
+                                        sort_key, descending)
+        return ProductPage(rows, next_cursor)
+
+    def close(self) -> None:
+        """Encerra a verificação de alterações, o pool de conexões e os processos de hash"""
+        if self._watcher is not None:
+            self._watcher.stop()
+        if self.hash_executor is not None:
+            self.hash_executor.shutdown()
+        if self._bloom is not None:
+            self._bloom.close()
+        limiter = getattr(self, '_login_limiter', None)
+        if limiter is not None:
+            limiter.close()
+        self.pool.close()
+
 class AuthManager:
     def __init__(self, db):
         self.db = db  # Recebe a instância do UserDB
-        
-    def validate_credentials(self, username: str, password: str) -> bool:
-        if not self._validate_input(username, self.db.config.MIN_USERNAME_LENGTH) or \
-           not self._validate_input(password, self.db.config.MIN_PASSWORD_LENGTH):
-            return False
-        
-        # Corrigido: usar o método de hash da classe UserDB
-        hashed_password = UserDB._hash_password(password)  # ← Alteração aqui
-        
+        self.sessions = get_session_manager(db)
+        self.limiter = get_login_limiter(db)
+
+    def login(self, username: str, password: str, origem: str = 'local') -> Optional[str]:
+        """Valida as credenciais e emite um token de sessão; None se forem inválidas"""
+        if not self.validate_credentials(username, password, origem):
+            return None
+        return self.sessions.issue(username)
+
+    def verify_token(self, token: str) -> Optional[str]:
+        """Usuário da sessão, sem consultar o banco; None se o token não vale mais"""
+        sessao = self.sessions.verify(token)
+        return sessao.username if sessao is not None else None
+
+    def logout(self, token: str) -> None:
+        self.sessions.revoke(token)
+
+    def validate_credentials(self, username: str, password: str, origem: str = 'local') -> bool:
         try:
-            with sqlite3.connect(self.db.config.DB_NAME) as conn:
-                cursor = conn.cursor()
-                cursor.execute(f'''
-                    SELECT password FROM {self.db.config.TABLE_NAME}
-                    WHERE username = ?
-                ''', (username,))
-                result = cursor.fetchone()
-                return result and result[0] == hashed_password
-        except Exception as e:
-            logging.error(f"Erro na validação: {str(e)}")
+            return self.check_credentials(username, password, origem)
+        except LoginBloqueado:
+            return False
+
+    def check_credentials(self, username: str, password: str, origem: str = 'local') -> bool:
+        """Como validate_credentials, mas levanta LoginBloqueado se o limitador recusar a tentativa"""
+        if not self.validate_input(username, password):
             return False
+        if self.limiter is not None:
+            # Tentativas em excesso param aqui, antes do banco e do hash
+            self.limiter.check(username, origem)
+
+        # O UserDB confere o hash e refaz hashes com parâmetros antigos
+        valido = self.db.validate_user(username, password)
+        if self.limiter is not None:
+            self.limiter.record(username, valido)
+        return valido
+
+    def lockout_remaining(self, username: str) -> float:
+        """Segundos até o usuário poder tentar de novo após falhas seguidas (0 se liberado)"""
+        return self.limiter.bloqueio_restante(username) if self.limiter is not None else 0.0
     
+    def validate_input(self, username: str, password: str) -> bool:
+        """Confere tamanho e espaços das credenciais antes de consultar o banco"""
+        return self._validate_input(username, self.db.config.MIN_USERNAME_LENGTH) and \
+            self._validate_input(password, self.db.config.MIN_PASSWORD_LENGTH)
+
     @staticmethod
     def _validate_input(value: str, min_length: int) -> bool:
         value = value.strip()
@@ -0,0 +1,158 @@
+"""Notificações de alteração de dados.
+
+UserDB publica um Evento no EventBus depois de cada escrita confirmada, e as
+janelas assinam (executor.subscribe_events) para aplicar só a diferença.
+DataVersionWatcher acompanha PRAGMA data_version para perceber escritas feitas
+por outros processos no mesmo arquivo de banco.
+"""
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+PRODUTO_INSERIDO = 'produto_inserido'
+PRODUTOS_IMPORTADOS = 'produtos_importados'
+PRODUTO_ATUALIZADO = 'produto_atualizado'
+PRODUTO_EXCLUIDO = 'produto_excluido'
+USUARIO_REGISTRADO = 'usuario_registrado'
+# Escrita de outro processo; dados['tabela'] diz qual tabela mudou
+ALTERACAO_EXTERNA = 'alteracao_externa'
+
+EVENTOS_PRODUTO = (PRODUTO_INSERIDO, PRODUTOS_IMPORTADOS, PRODUTO_ATUALIZADO, PRODUTO_EXCLUIDO)
+
+@dataclass(frozen=True)
+class Evento:
+    tipo: str
+    dados: dict = field(default_factory=dict)
+
+class EventBus:
+    """Publicação e assinatura de eventos dentro do processo.
+
+    Os assinantes rodam no thread que publicou; quem mexe em widgets deve
+    assinar por executor.subscribe_events, que entrega no thread do Tk.
+    """
+
+    def __init__(self):
+        self._assinantes = {}
+        self._proximo = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable, tipos: Optional[Iterable[str]] = None) -> Callable:
+        """Assina os tipos informados (todos, se None); retorna a função que cancela a assinatura"""
+        tipos = frozenset(tipos) if tipos is not None else None
+        with self._lock:
+            token = self._proximo
+            self._proximo += 1
+            self._assinantes[token] = (callback, tipos)
+
+        def cancelar() -> None:
+            with self._lock:
+                self._assinantes.pop(token, None)
+        return cancelar
+
+    def publish(self, tipo: str, **dados) -> None:
+        evento = Evento(tipo, dados)
+        with self._lock:
+            assinantes = list(self._assinantes.values())
+        for callback, tipos in assinantes:
+            if tipos is not None and tipo not in tipos:
+                continue
+            try:
+                callback(evento)
+            except Exception as e:
+                logging.error(f"Erro em assinante do evento {tipo}: {str(e)}")
+
+class DataVersionWatcher:
+    """Detecta escritas de outros processos consultando PRAGMA data_version.
+
+    data_version muda a cada commit de outra conexão, inclusive as do pool deste
+    processo. Por isso, quando ele muda, o watcher compara a versão de produtos
+    (versoes_tabela) e o maior id de usuário com o que as escritas locais já
+    informaram (local_write/local_user). Só a diferença vira ALTERACAO_EXTERNA.
+    """
+
+    def __init__(self, db_name: str, bus: EventBus, interval: float, tabela_usuarios: str):
+        self.db_name = db_name
+        self.bus = bus
+        self.interval = interval
+        self.tabela_usuarios = tabela_usuarios
+        self._versao_produtos = None
+        self._max_usuario = None
+        # Escritas locais ainda não encadeadas: versão anterior -> versão nova
+        self._transicoes = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        # Estado inicial lido antes de retornar, para nenhuma escrita local ficar de fora
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        try:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            self._versao_produtos, self._max_usuario = self._ler_estado(conn)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._thread = threading.Thread(
+            target=self._run, args=(conn, data_version), name="data-version-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def local_write(self, anterior: int, nova: int) -> None:
+        """Informa que uma escrita deste processo levou produtos da versão anterior à nova"""
+        with self._lock:
+            if self._versao_produtos is None:
+                return
+            self._transicoes[anterior] = nova
+            self._encadear()
+
+    def local_user(self, user_id: int) -> None:
+        with self._lock:
+            if self._max_usuario is not None:
+                self._max_usuario = max(self._max_usuario, user_id)
+
+    def _encadear(self) -> None:
+        while self._versao_produtos in self._transicoes:
+            self._versao_produtos = self._transicoes.pop(self._versao_produtos)
+        # Transições já cobertas por uma alteração externa detectada
+        for anterior in [anterior for anterior, nova in self._transicoes.items()
+                         if nova <= self._versao_produtos]:
+            del self._transicoes[anterior]
+
+    def _ler_estado(self, conn) -> tuple:
+        row = conn.execute("SELECT versao FROM versoes_tabela WHERE tabela = 'produtos'").fetchone()
+        max_usuario = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.tabela_usuarios}").fetchone()[0]
+        return (row[0] if row else 0), max_usuario
+
+    def _run(self, conn, data_version: int) -> None:
+        try:
+            while not self._parar.wait(self.interval):
+                atual = conn.execute("PRAGMA data_version").fetchone()[0]
+                if atual != data_version:
+                    data_version = atual
+                    self._verificar(conn)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao acompanhar alterações do banco: {str(e)}")
+        finally:
+            conn.close()
+
+    def _verificar(self, conn) -> None:
+        versao, max_usuario = self._ler_estado(conn)
+        with self._lock:
+            self._encadear()
+            produtos_externos = versao != self._versao_produtos
+            usuarios_desde = self._max_usuario if max_usuario > self._max_usuario else None
+            self._versao_produtos = versao
+            self._max_usuario = max(max_usuario, self._max_usuario)
+            self._encadear()
+        if produtos_externos:
+            self.bus.publish(ALTERACAO_EXTERNA, tabela='produtos')
+        if usuarios_desde is not None:
+            self.bus.publish(ALTERACAO_EXTERNA, tabela=self.tabela_usuarios, desde=usuarios_desde)
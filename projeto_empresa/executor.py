@@ -0,0 +1,193 @@
+import tkinter as tk
+from tkinter import ttk
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+class Task:
+    """Tarefa submetida ao TkExecutor; pode ser cancelada antes do callback"""
+
+    def __init__(self, on_success: Optional[Callable], on_error: Optional[Callable]):
+        self.on_success = on_success
+        self.on_error = on_error
+        self.cancelled = False
+        self.done = False
+        self.future = None
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+class AsyncLoop:
+    """Loop asyncio rodando num thread próprio, ao lado do mainloop do Tk"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="asyncio-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """Agenda a corrotina no loop; retorna um concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def shutdown(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+class TkExecutor:
+    """Executa trabalho de banco num pool de threads e entrega os resultados no thread do Tk.
+
+    Os resultados passam por uma fila drenada com after(), então on_success/on_error
+    sempre rodam no loop do Tk e podem mexer nos widgets com segurança.
+    """
+
+    def __init__(self, master: tk.Misc, max_workers: int = 4, poll_interval_ms: int = 20):
+        self.master = master
+        self.poll_interval_ms = poll_interval_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tk-worker")
+        self._results = queue.SimpleQueue()
+        self._owners = {}
+        self._closed = False
+        self._async_loop = None
+        self._poll()
+
+    def submit(self, fn: Callable, *args, on_success: Optional[Callable] = None,
+               on_error: Optional[Callable] = None, owner: Optional[tk.Misc] = None, **kwargs) -> Task:
+        """Roda fn(*args, **kwargs) em segundo plano.
+
+        Se owner for informado, a tarefa é cancelada quando o widget for destruído.
+        """
+        task = Task(on_success, on_error)
+        if owner is not None:
+            self._track(owner, task)
+        task.future = self._pool.submit(self._run, task, fn, args, kwargs)
+        return task
+
+    def submit_async(self, coro, on_success: Optional[Callable] = None,
+                     on_error: Optional[Callable] = None, owner: Optional[tk.Misc] = None) -> Task:
+        """Roda a corrotina no loop asyncio compartilhado e entrega o resultado no thread do Tk.
+
+        Cancelar a tarefa (ou destruir owner) cancela a corrotina.
+        """
+        if self._async_loop is None:
+            self._async_loop = AsyncLoop()
+        task = Task(on_success, on_error)
+        if owner is not None:
+            self._track(owner, task)
+        task.future = self._async_loop.submit(coro)
+        task.future.add_done_callback(lambda future: self._deliver_future(task, future))
+        return task
+
+    def _deliver_future(self, task: Task, future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        self._results.put((task, None if error else future.result(), error))
+
+    def call_soon(self, callback: Callable, *args) -> None:
+        """Agenda callback(*args) no thread do Tk; pode ser chamado de qualquer thread"""
+        task = Task(lambda _: callback(*args), None)
+        self._results.put((task, None, None))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._closed = True
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        if self._async_loop is not None:
+            self._async_loop.shutdown()
+            self._async_loop = None
+
+    def _run(self, task: Task, fn: Callable, args: tuple, kwargs: dict) -> None:
+        if task.cancelled:
+            return
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._results.put((task, None, e))
+        else:
+            self._results.put((task, result, None))
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            task.done = True
+            if task.cancelled:
+                continue
+            try:
+                if error is not None:
+                    if task.on_error:
+                        task.on_error(error)
+                    else:
+                        logging.error(f"Erro em tarefa de segundo plano: {str(error)}")
+                elif task.on_success:
+                    task.on_success(result)
+            except Exception as e:
+                logging.error(f"Erro no callback da tarefa: {str(e)}")
+
+        if not self._closed:
+            try:
+                self.master.after(self.poll_interval_ms, self._poll)
+            except tk.TclError:
+                # Janela principal já destruída
+                self._closed = True
+
+    def _track(self, owner: tk.Misc, task: Task) -> None:
+        key = str(owner)
+        tasks = self._owners.get(key)
+        if tasks is None:
+            tasks = self._owners[key] = []
+
+            def _on_destroy(event, owner=owner, key=key):
+                if event.widget is owner:
+                    for pending in self._owners.pop(key, []):
+                        pending.cancel()
+
+            owner.bind('<Destroy>', _on_destroy, add='+')
+        tasks[:] = [pending for pending in tasks if not pending.done]
+        tasks.append(task)
+
+def get_executor(widget: tk.Misc) -> TkExecutor:
+    """Retorna o executor compartilhado da janela principal do widget"""
+    root = widget.nametowidget('.')
+    executor = getattr(root, '_tk_executor', None)
+    if executor is None:
+        executor = root._tk_executor = TkExecutor(root)
+    return executor
+
+def subscribe_events(widget: tk.Misc, bus, callback: Callable, tipos=None) -> Callable:
+    """Assina eventos do bus (eventos.EventBus) entregando callback(evento) no thread do Tk.
+
+    A assinatura é cancelada quando o widget é destruído; retorna a função de cancelamento.
+    """
+    executor = get_executor(widget)
+
+    def _deliver(evento) -> None:
+        if widget.winfo_exists():
+            callback(evento)
+
+    cancel = bus.subscribe(lambda evento: executor.call_soon(_deliver, evento), tipos)
+
+    def _on_destroy(event) -> None:
+        if event.widget is widget:
+            cancel()
+
+    widget.bind('<Destroy>', _on_destroy, add='+')
+    return cancel
+
+def set_loading(container: tk.Misc, loading: bool) -> None:
+    """Mostra o cursor de espera e desabilita os botões enquanto há trabalho pendente"""
+    container.winfo_toplevel().configure(cursor='watch' if loading else '')
+    _set_buttons_state(container, 'disabled' if loading else 'normal')
+
+def _set_buttons_state(container: tk.Misc, state: str) -> None:
+    for child in container.winfo_children():
+        if isinstance(child, (tk.Button, ttk.Button)):
+            child.configure(state=state)
+        _set_buttons_state(child, state)
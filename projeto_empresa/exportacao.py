@@ -0,0 +1,150 @@
+"""Exportação de produtos em CSV, JSON Lines ou formato colunar binário.
+
+Uso: python exportacao.py saida.csv [--formato csv|jsonl|colunar] [--db users.db]
+
+O formato colunar grava grupos de linhas com cada coluna contígua:
+    MAGIC
+    repetido por grupo: <I nº de linhas> id(q) nome(str) quantidade(q) preco(d) data_cadastro(str)
+    grupo final com 0 linhas
+Colunas numéricas são arrays little-endian; textos são <I comprimentos> + <Q bytes> + UTF-8.
+"""
+import argparse
+import array
+import csv
+import json
+import logging
+import os
+import struct
+import sys
+from typing import Callable, Iterator, Optional
+from config import DatabaseConfig
+from db import PRODUCT_COLUMNS, UserDB
+
+MAGIC = b"PRODCOL1"
+FORMATOS = ('csv', 'jsonl', 'colunar')
+EXTENSOES = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.pcol': 'colunar'}
+
+def detectar_formato(path: str) -> str:
+    return EXTENSOES.get(os.path.splitext(path)[1].lower(), 'csv')
+
+def _escrever_csv(arquivo, blocos: Iterator[list], progress: Callable) -> None:
+    writer = csv.writer(arquivo)
+    writer.writerow(PRODUCT_COLUMNS)
+    for rows in blocos:
+        writer.writerows(rows)
+        progress(len(rows))
+
+def _escrever_jsonl(arquivo, blocos: Iterator[list], progress: Callable) -> None:
+    for rows in blocos:
+        arquivo.write(''.join(
+            json.dumps(dict(zip(PRODUCT_COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows
+        ))
+        progress(len(rows))
+
+def _numeros(typecode: str, valores) -> bytes:
+    dados = array.array(typecode, valores)
+    if sys.byteorder == 'big':
+        dados.byteswap()
+    return dados.tobytes()
+
+def _textos(valores) -> bytes:
+    codificados = [(valor or '').encode('utf-8') for valor in valores]
+    blob = b''.join(codificados)
+    return _numeros('I', map(len, codificados)) + struct.pack('<Q', len(blob)) + blob
+
+def _escrever_colunar(arquivo, blocos: Iterator[list], progress: Callable) -> None:
+    arquivo.write(MAGIC)
+    for rows in blocos:
+        ids, nomes, quantidades, precos, datas = zip(*rows)
+        arquivo.write(struct.pack('<I', len(rows)))
+        arquivo.write(_numeros('q', ids))
+        arquivo.write(_textos(nomes))
+        arquivo.write(_numeros('q', quantidades))
+        arquivo.write(_numeros('d', precos))
+        arquivo.write(_textos(datas))
+        progress(len(rows))
+    arquivo.write(struct.pack('<I', 0))
+
+def ler_colunar(path: str) -> Iterator[dict]:
+    """Lê um arquivo colunar, um grupo de linhas por vez ({coluna: lista de valores})"""
+    def numeros(arquivo, typecode: str, total: int) -> list:
+        dados = array.array(typecode)
+        dados.frombytes(arquivo.read(dados.itemsize * total))
+        if sys.byteorder == 'big':
+            dados.byteswap()
+        return dados.tolist()
+
+    def textos(arquivo, total: int) -> list:
+        tamanhos = numeros(arquivo, 'I', total)
+        blob = arquivo.read(struct.unpack('<Q', arquivo.read(8))[0])
+        valores, posicao = [], 0
+        for tamanho in tamanhos:
+            valores.append(blob[posicao:posicao + tamanho].decode('utf-8'))
+            posicao += tamanho
+        return valores
+
+    with open(path, 'rb') as arquivo:
+        if arquivo.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Arquivo colunar inválido")
+        while True:
+            total = struct.unpack('<I', arquivo.read(4))[0]
+            if total == 0:
+                break
+            yield {
+                'id': numeros(arquivo, 'q', total),
+                'nome': textos(arquivo, total),
+                'quantidade': numeros(arquivo, 'q', total),
+                'preco': numeros(arquivo, 'd', total),
+                'data_cadastro': textos(arquivo, total),
+            }
+
+ESCRITORES = {'csv': _escrever_csv, 'jsonl': _escrever_jsonl, 'colunar': _escrever_colunar}
+
+def exportar_produtos(db, path: str, formato: Optional[str] = None, batch_size: int = 10000,
+                      progress: Optional[Callable] = None) -> int:
+    """Exporta a tabela produtos para path; retorna o número de linhas gravadas.
+
+    progress(linhas_gravadas) é chamado após cada bloco.
+    """
+    formato = formato or detectar_formato(path)
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+
+    total = 0
+
+    def _progress(gravadas: int) -> None:
+        nonlocal total
+        total += gravadas
+        if progress:
+            progress(total)
+
+    modo = {'newline': ''} if formato == 'csv' else {}
+    try:
+        if formato == 'colunar':
+            with open(path, 'wb') as arquivo:
+                _escrever_colunar(arquivo, db.iter_products(batch_size), _progress)
+        else:
+            with open(path, 'w', encoding='utf-8', **modo) as arquivo:
+                ESCRITORES[formato](arquivo, db.iter_products(batch_size), _progress)
+    except Exception as e:
+        logging.error(f"Erro na exportação para {path}: {str(e)}")
+        raise
+    return total
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta a tabela de produtos")
+    parser.add_argument("arquivo")
+    parser.add_argument("--db", default=DatabaseConfig.DB_NAME)
+    parser.add_argument("--formato", choices=FORMATOS)
+    parser.add_argument("--lote", type=int, default=10000)
+    args = parser.parse_args()
+
+    db = UserDB(DatabaseConfig(DB_NAME=args.db, USERNAME_INDEX=False))
+    try:
+        total = exportar_produtos(db, args.arquivo, args.formato, args.lote)
+    finally:
+        db.close()
+    print(f"{total} produtos exportados para {args.arquivo}")
+
+if __name__ == "__main__":
+    main()
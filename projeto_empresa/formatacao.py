@@ -0,0 +1,44 @@
+"""Formatação das linhas de produtos para exibição na grade.
+
+As funções trabalham por página: datas repetidas na página são formatadas uma
+única vez e o formato do SQLite ('AAAA-MM-DD HH:MM:SS') é convertido por
+fatiamento, sem strptime/strftime.
+"""
+import logging
+from datetime import datetime
+
+def formatar_data(data_cadastro) -> str:
+    """'AAAA-MM-DD HH:MM:SS' -> 'DD/MM/AAAA HH:MM'"""
+    if (isinstance(data_cadastro, str) and len(data_cadastro) == 19
+            and data_cadastro[4] == data_cadastro[7] == '-' and data_cadastro[10] == ' '
+            and data_cadastro[:4].isdigit()):
+        return f"{data_cadastro[8:10]}/{data_cadastro[5:7]}/{data_cadastro[:4]} {data_cadastro[11:16]}"
+    # Formato inesperado: caminho lento, que valida a data
+    try:
+        return datetime.strptime(data_cadastro, '%Y-%m-%d %H:%M:%S').strftime('%d/%m/%Y %H:%M')
+    except (TypeError, ValueError) as e:
+        logging.error(f"Erro no processamento: {str(e)}")
+        return data_cadastro or ''
+
+def formatar_preco(preco: float) -> str:
+    return f"R$ {preco:.2f}".replace('.', ',')
+
+def preco_para_edicao(preco: float) -> str:
+    """Preço para o campo do formulário: duas casas quando bastam, senão todas (float(texto) == preco)"""
+    texto = f"{preco:.2f}"
+    return texto if float(texto) == preco else repr(float(preco))
+
+def formatar_produto(produto) -> tuple:
+    id_produto, nome, quantidade, preco, data_cadastro = produto
+    return (id_produto, nome, quantidade, formatar_preco(preco), formatar_data(data_cadastro))
+
+def formatar_produtos(produtos: list) -> list:
+    """Formata uma página inteira de produtos"""
+    datas = {}
+    linhas = []
+    for id_produto, nome, quantidade, preco, data_cadastro in produtos:
+        data = datas.get(data_cadastro)
+        if data is None:
+            data = datas[data_cadastro] = formatar_data(data_cadastro)
+        linhas.append((id_produto, nome, quantidade, formatar_preco(preco), data))
+    return linhas
@@ -0,0 +1,364 @@
+import tkinter as tk
+from tkinter import ttk
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+class RowCache:
+    """LRU de linhas já formatadas, pela chave da linha (primeira coluna).
+
+    A linha crua fica guardada junto: se o banco devolver a linha alterada,
+    ela é formatada de novo mesmo sem invalidate.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def format(self, rows: list, format_rows: Callable) -> list:
+        """Valores de exibição das linhas; as que faltam são formatadas num único lote"""
+        display = [None] * len(rows)
+        missing = []
+        with self._lock:
+            for position, row in enumerate(rows):
+                entry = self._rows.get(row[0])
+                if entry is not None and entry[0] == row:
+                    self._rows.move_to_end(row[0])
+                    display[position] = entry[1]
+                else:
+                    missing.append(position)
+        if not missing:
+            return display
+
+        formatted = format_rows([rows[position] for position in missing])
+        with self._lock:
+            for position, values in zip(missing, formatted):
+                display[position] = values
+                self._rows[rows[position][0]] = (rows[position], values)
+            while len(self._rows) > self.max_rows:
+                self._rows.popitem(last=False)
+        return display
+
+    def invalidate(self, keys=None) -> None:
+        """Descarta as linhas das chaves informadas (todas, se keys for None)"""
+        with self._lock:
+            if keys is None:
+                self._rows.clear()
+            for key in keys or ():
+                self._rows.pop(key, None)
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview que mantém no widget apenas as linhas visíveis.
+
+    As linhas vêm de uma consulta paginada (fetch_page) e ficam num cache de
+    páginas limitado; a barra de rolagem é calculada a partir de count_rows.
+    Com um executor, as páginas são buscadas em segundo plano e as linhas ainda
+    não carregadas aparecem como "Carregando...".
+    Com sort_keys ({coluna: chave}), clicar no cabeçalho refaz a consulta ordenada
+    (fetch_page recebe sort_key e descending) e on_sort(chave, descending) é avisado.
+    As linhas são formatadas uma página por vez (format_rows, ou format_row linha a
+    linha) junto com a busca, e os valores formatados ficam num RowCache por id.
+    """
+
+    def __init__(self, master, columns: list, fetch_page: Callable, count_rows: Callable,
+                 format_row: Callable = tuple, page_size: int = 100, max_cached_pages: int = 10,
+                 executor=None, sort_keys: Optional[dict] = None, on_sort: Optional[Callable] = None,
+                 format_rows: Optional[Callable] = None, row_cache_size: Optional[int] = None):
+        super().__init__(master)
+        self.executor = executor
+        self.columns = columns
+        self.fetch_page = fetch_page
+        self.count_rows = count_rows
+        self.format_row = format_row
+        self.format_rows = format_rows or (lambda rows: [format_row(row) for row in rows])
+        self.row_cache = RowCache(row_cache_size or page_size * max_cached_pages * 2)
+        self.page_size = page_size
+        self.max_cached_pages = max_cached_pages
+        self.sort_keys = sort_keys or {}
+        self.on_sort = on_sort
+        self.sort_key = None
+        self.descending = False
+
+        self._pages = OrderedDict()
+        self._pending = set()
+        self._generation = 0
+        self._cursors = {0: None}
+        self._slot_rows = []
+        self._slot_values = []
+        self._total = 0
+        self._counting = False
+        self._top = 0
+        self._visible = 1
+
+        self._create_widgets()
+        self._bind_events()
+
+    def _create_widgets(self) -> None:
+        self.tree = ttk.Treeview(
+            self,
+            columns=[column[0] for column in self.columns],
+            show='headings',
+            selectmode='browse'
+        )
+        for column_id, heading, width, anchor in self.columns:
+            self.tree.heading(column_id, text=heading)
+            self.tree.column(column_id, width=width, anchor=anchor)
+            if column_id in self.sort_keys:
+                self.tree.heading(column_id, command=lambda c=column_id: self._on_heading_click(c))
+
+        self.scroll = ttk.Scrollbar(self, orient='vertical', command=self._yview)
+
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scroll.pack(side='right', fill='y')
+
+    def _bind_events(self) -> None:
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self._scroll_to(self._top - 3))
+        self.tree.bind('<Button-5>', lambda event: self._scroll_to(self._top + 3))
+        self.tree.bind('<Prior>', lambda event: self._scroll_to(self._top - self._visible))
+        self.tree.bind('<Next>', lambda event: self._scroll_to(self._top + self._visible))
+
+    def reload(self, keep_position: bool = True) -> None:
+        """Descarta o cache e recarrega a contagem e as linhas visíveis"""
+        self._pages.clear()
+        self._pending.clear()
+        self._generation += 1
+        self._cursors = {0: None}
+        if not keep_position:
+            self._top = 0
+        if self.executor is None:
+            self._on_count_loaded(self._generation, self.count_rows())
+        else:
+            generation = self._generation
+            self._counting = True
+            if keep_position and self._total:
+                # O total anterior vale até a nova contagem: a posição e as linhas na
+                # tela ficam onde estão e só as páginas visíveis são buscadas de novo
+                first = self._top // self.page_size
+                last = (self._top + self._visible - 1) // self.page_size
+                for index in range(first, last + 1):
+                    self._request_page(index)
+            else:
+                # A primeira página é buscada junto com a contagem e aparece assim que chegar
+                self._total = 0
+                self._request_page(0)
+            self.executor.submit(
+                self.count_rows,
+                on_success=lambda total: self._on_count_loaded(generation, total),
+                owner=self
+            )
+
+    def sort_by(self, sort_key: str, descending: bool = False) -> None:
+        """Ordena pela chave no banco e volta ao topo; as linhas da Treeview são reaproveitadas"""
+        self.sort_key = sort_key
+        self.descending = descending
+        for column_id, heading, _, _ in self.columns:
+            arrow = (' ▼' if descending else ' ▲') if self.sort_keys.get(column_id) == sort_key else ''
+            self.tree.heading(column_id, text=heading + arrow)
+        self.reload(keep_position=False)
+
+    def _on_heading_click(self, column_id: str) -> None:
+        sort_key = self.sort_keys[column_id]
+        descending = not self.descending if sort_key == self.sort_key else False
+        self.sort_by(sort_key, descending)
+        if self.on_sort:
+            self.on_sort(sort_key, descending)
+
+    def _on_count_loaded(self, generation: int, total: int) -> None:
+        if generation != self._generation:
+            return
+        self._counting = False
+        self._total = total
+        self._scroll_to(self._top)
+
+    def selected_row(self) -> Optional[tuple]:
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        slot = self.tree.index(selection[0])
+        return self._slot_rows[slot] if slot < len(self._slot_rows) else None
+
+    def _row_height(self) -> int:
+        height = ttk.Style(self).lookup('Treeview', 'rowheight')
+        return int(height) if height else 20
+
+    def _on_resize(self, event) -> None:
+        # Descontamos uma linha para o cabeçalho
+        visible = max(1, event.height // self._row_height() - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _on_mousewheel(self, event) -> str:
+        self._scroll_to(self._top - int(event.delta / 120) * 3)
+        return 'break'
+
+    def _yview(self, *args) -> None:
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * self._total))
+        elif args[0] == 'scroll':
+            step = self._visible if args[2] == 'pages' else 1
+            self._scroll_to(self._top + int(args[1]) * step)
+
+    def _scroll_to(self, top: int) -> None:
+        self._top = max(0, min(top, self._total - self._visible))
+        self._render()
+
+    def update_row(self, key, row: tuple) -> bool:
+        """Substitui a linha de chave key nas páginas em cache e na tela, sem recarregar.
+
+        A linha fica na posição atual até o próximo reload, mesmo que a ordenação mude.
+        Retorna False se a linha não está carregada.
+        """
+        found = self._find_row(key)
+        if found is None:
+            return False
+        index, position = found
+        rows, display = self._pages[index]
+        rows[position] = row
+        display[position] = self.row_cache.format([row], self.format_rows)[0]
+        self._render()
+        return True
+
+    def remove_row(self, key) -> bool:
+        """Tira a linha de chave key da grade buscando de novo só a página onde ela estava.
+
+        As páginas anteriores continuam em cache; as seguintes são descartadas, pois
+        suas posições mudaram. Retorna False se a linha não está carregada.
+        """
+        found = self._find_row(key)
+        if found is None:
+            return False
+        index = found[0]
+        self.row_cache.invalidate([key])
+        for cached in [cached for cached in self._pages if cached >= index]:
+            del self._pages[cached]
+        for cached in [cached for cached in self._cursors if cached > index]:
+            del self._cursors[cached]
+        # Buscas em andamento usam as posições antigas
+        self._pending.clear()
+        self._generation += 1
+        self._total = max(0, self._total - 1)
+        if self._counting:
+            self.reload()
+            return True
+        self._scroll_to(self._top)
+        return True
+
+    def _find_row(self, key) -> Optional[tuple]:
+        for index, (rows, _) in self._pages.items():
+            for position, row in enumerate(rows):
+                if row[0] == key:
+                    return index, position
+        return None
+
+    def invalidate_rows(self, keys=None) -> None:
+        """Descarta a formatação guardada das linhas (todas, se keys for None)"""
+        self.row_cache.invalidate(keys)
+
+    def _page(self, index: int) -> Optional[tuple]:
+        """Retorna (linhas, valores formatados) da página, ou None se ela ainda está sendo buscada"""
+        if index in self._pages:
+            self._pages.move_to_end(index)
+            return self._pages[index]
+        if self.executor is None:
+            self._store_page(index, self._load(index))
+            return self._pages[index]
+        self._request_page(index)
+        return None
+
+    def _load(self, index: int) -> tuple:
+        # Roda no thread do executor: busca e formatação ficam fora do thread do Tk
+        page = self._fetch(index)
+        return page, self.row_cache.format(page.rows, self.format_rows)
+
+    def _fetch(self, index: int):
+        kwargs = {'sort_key': self.sort_key, 'descending': self.descending} if self.sort_key else {}
+        if index in self._cursors:
+            return self.fetch_page(cursor=self._cursors[index], offset=0, page_size=self.page_size, **kwargs)
+        return self.fetch_page(cursor=None, offset=index * self.page_size, page_size=self.page_size, **kwargs)
+
+    def _request_page(self, index: int) -> None:
+        if index in self._pages or index in self._pending:
+            return
+        self._pending.add(index)
+        generation = self._generation
+        self.executor.submit(
+            self._load, index,
+            on_success=lambda loaded: self._on_page_loaded(generation, index, loaded),
+            owner=self
+        )
+
+    def _on_page_loaded(self, generation: int, index: int, loaded: tuple) -> None:
+        if generation != self._generation:
+            return
+        self._pending.discard(index)
+        self._store_page(index, loaded)
+        page = loaded[0]
+        if self._counting:
+            # Total provisório até a contagem terminar
+            self._total = max(self._total, index * self.page_size + len(page.rows))
+        self._render()
+
+    def _store_page(self, index: int, loaded: tuple) -> None:
+        page, display = loaded
+        self._cursors[index + 1] = page.next_cursor
+        self._pages[index] = (page.rows, display)
+        while len(self._pages) > self.max_cached_pages:
+            self._pages.popitem(last=False)
+
+    def _rows(self, start: int, count: int) -> tuple:
+        """Retorna (linhas, valores formatados) a partir da posição start"""
+        rows, display = [], []
+        position = start
+        end = min(start + count, self._total)
+        while position < end:
+            index, offset = divmod(position, self.page_size)
+            page = self._page(index)
+            if page is None or offset >= len(page[0]):
+                break
+            chunk = page[0][offset:offset + end - position]
+            rows.extend(chunk)
+            display.extend(page[1][offset:offset + len(chunk)])
+            position += len(chunk)
+        return rows, display
+
+    def _render(self) -> None:
+        try:
+            rows, display = self._rows(self._top, self._visible)
+        except Exception as e:
+            logging.error(f"Erro ao carregar linhas da grade: {str(e)}")
+            rows, display = [], []
+
+        expected = max(0, min(self._visible, self._total - self._top))
+        placeholder = ('', 'Carregando...') + ('',) * (len(self.columns) - 2)
+        slots = self.tree.get_children()
+        values_by_slot = []
+        for slot in range(max(len(rows), expected)):
+            values = display[slot] if slot < len(rows) else placeholder
+            values_by_slot.append(values)
+            if slot < len(slots):
+                # Slots que já mostram os mesmos valores não são tocados
+                if slot >= len(self._slot_values) or self._slot_values[slot] != values:
+                    self.tree.item(slots[slot], values=values)
+            else:
+                self.tree.insert('', 'end', values=values)
+        if len(slots) > max(len(rows), expected):
+            self.tree.delete(*slots[max(len(rows), expected):])
+        self._slot_rows = rows
+        self._slot_values = values_by_slot
+
+        # Busca antecipada da página seguinte à última linha visível
+        next_index = (self._top + self._visible) // self.page_size + 1
+        if self.executor is not None and next_index * self.page_size < self._total:
+            self._request_page(next_index)
+
+        if self._total:
+            first = self._top / self._total
+            last = min(1.0, (self._top + self._visible) / self._total)
+            self.scroll.set(first, last)
+        else:
+            self.scroll.set(0.0, 1.0)
@@ -0,0 +1,199 @@
+import hashlib
+import hmac
+import base64
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+from config import DatabaseConfig
+
+# Formato armazenado: algoritmo$parâmetros...$salt$hash (salt e hash em base64)
+#   pbkdf2_sha256$<iterações>$<salt>$<hash>
+#   scrypt$<n>$<r>$<p>$<salt>$<hash>
+# Hashes antigos (sha256 hexadecimal sem salt) continuam aceitos e são refeitos no login.
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip('=')
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+def _pbkdf2_sha256(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+def hash_password(password: str, params: dict) -> str:
+    """Gera o hash com salt aleatório conforme os parâmetros (ver hasher_params)"""
+    salt = os.urandom(params['salt_bytes'])
+    algorithm = params['algorithm']
+    if algorithm == 'pbkdf2_sha256':
+        digest = _pbkdf2_sha256(password, salt, params['iterations'])
+        return f"pbkdf2_sha256${params['iterations']}${_b64encode(salt)}${_b64encode(digest)}"
+    if algorithm == 'scrypt':
+        digest = _scrypt(password, salt, params['n'], params['r'], params['p'])
+        return (f"scrypt${params['n']}${params['r']}${params['p']}$"
+                f"{_b64encode(salt)}${_b64encode(digest)}")
+    raise ValueError(f"Algoritmo de hash desconhecido: {algorithm}")
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Confere a senha contra o hash armazenado, em qualquer formato suportado"""
+    parts = encoded.split('$')
+    try:
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            digest = _pbkdf2_sha256(password, _b64decode(parts[2]), int(parts[1]))
+            return hmac.compare_digest(digest, _b64decode(parts[3]))
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt(password, _b64decode(parts[4]), n, r, p)
+            return hmac.compare_digest(digest, _b64decode(parts[5]))
+    except ValueError:
+        return False
+    if len(parts) == 1 and len(encoded) == 64:
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, encoded)
+    return False
+
+def hasher_params(config: DatabaseConfig) -> dict:
+    """Parâmetros de hash definidos no DatabaseConfig"""
+    params = {'algorithm': config.PASSWORD_ALGORITHM, 'salt_bytes': config.PASSWORD_SALT_BYTES}
+    if config.PASSWORD_ALGORITHM == 'pbkdf2_sha256':
+        params['iterations'] = config.PBKDF2_ITERATIONS
+    elif config.PASSWORD_ALGORITHM == 'scrypt':
+        params.update(n=config.SCRYPT_N, r=config.SCRYPT_R, p=config.SCRYPT_P)
+    else:
+        raise ValueError(f"Algoritmo de hash desconhecido: {config.PASSWORD_ALGORITHM}")
+    return params
+
+class HashingExecutor:
+    """Pool de processos para calcular hashes fora do GIL.
+
+    O pool é criado no primeiro uso (ou em warm_up) com o método spawn, que é
+    seguro mesmo com threads do Tk e do pool de conexões já em execução.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def warm_up(self) -> None:
+        """Sobe os processos em segundo plano para o primeiro login não pagar a partida"""
+        pool = self._get_pool()
+        for _ in range(self.workers):
+            pool.submit(os.getpid)
+
+    def submit_hash(self, password: str, params: dict) -> Future:
+        return self._get_pool().submit(hash_password, password, params)
+
+    def submit_verify(self, password: str, encoded: str) -> Future:
+        return self._get_pool().submit(verify_password, password, encoded)
+
+    async def hash_async(self, password: str, params: dict) -> str:
+        return await asyncio.wrap_future(self.submit_hash(password, params))
+
+    async def verify_async(self, password: str, encoded: str) -> bool:
+        return await asyncio.wrap_future(self.submit_verify(password, encoded))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+class PasswordHasher:
+    """Hash de senhas configurável, com detecção de hashes que precisam ser refeitos.
+
+    Com um HashingExecutor, o cálculo roda em outro processo; sem ele, no thread
+    chamador (as versões async usam um thread à parte).
+    """
+
+    def __init__(self, config: DatabaseConfig, executor: Optional[HashingExecutor] = None):
+        self.params = hasher_params(config)
+        self.executor = executor
+
+    def hash(self, password: str) -> str:
+        if self.executor is not None:
+            return self.executor.submit_hash(password, self.params).result()
+        return hash_password(password, self.params)
+
+    def verify(self, password: str, encoded: str) -> bool:
+        if self.executor is not None:
+            return self.executor.submit_verify(password, encoded).result()
+        return verify_password(password, encoded)
+
+    def submit_hash(self, password: str) -> Future:
+        if self.executor is not None:
+            return self.executor.submit_hash(password, self.params)
+        return _completed(hash_password, password, self.params)
+
+    def submit_verify(self, password: str, encoded: str) -> Future:
+        if self.executor is not None:
+            return self.executor.submit_verify(password, encoded)
+        return _completed(verify_password, password, encoded)
+
+    async def hash_async(self, password: str) -> str:
+        if self.executor is not None:
+            return await asyncio.wrap_future(self.submit_hash(password))
+        # Sem pool de processos, o hash vai para um thread para não travar o loop
+        return await asyncio.to_thread(hash_password, password, self.params)
+
+    async def verify_async(self, password: str, encoded: str) -> bool:
+        if self.executor is not None:
+            return await asyncio.wrap_future(self.submit_verify(password, encoded))
+        return await asyncio.to_thread(verify_password, password, encoded)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """Verdadeiro se o hash usa outro algoritmo ou outros custos que os atuais"""
+        parts = encoded.split('$')
+        algorithm = self.params['algorithm']
+        if parts[0] != algorithm:
+            return True
+        if algorithm == 'pbkdf2_sha256':
+            return parts[1:2] != [str(self.params['iterations'])]
+        return parts[1:4] != [str(self.params[key]) for key in ('n', 'r', 'p')]
+
+def _completed(fn, *args) -> Future:
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def calibrate(algorithm: str, target_ms: float) -> dict:
+    """Escolhe o custo para que um hash leve aproximadamente target_ms nesta máquina"""
+    salt = os.urandom(16)
+    if algorithm == 'pbkdf2_sha256':
+        sample = 20_000
+        _pbkdf2_sha256('aquecimento', salt, 1000)
+        start = time.perf_counter()
+        _pbkdf2_sha256('calibracao', salt, sample)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        iterations = max(10_000, int(sample * target_ms / elapsed_ms) // 1000 * 1000)
+        return {'algorithm': algorithm, 'iterations': iterations}
+    if algorithm == 'scrypt':
+        # O custo do scrypt cresce com n (potência de 2); dobramos enquanto o próximo passo couber no alvo
+        n, r, p = 2 ** 12, 8, 1
+        while True:
+            start = time.perf_counter()
+            _scrypt('calibracao', salt, n, r, p)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms * 2 > target_ms or n >= 2 ** 20:
+                return {'algorithm': algorithm, 'n': n, 'r': r, 'p': p}
+            n *= 2
+    raise ValueError(f"Algoritmo de hash desconhecido: {algorithm}")
@@ -0,0 +1,131 @@
+"""Importação em lote de produtos a partir de CSV ou JSON Lines.
+
+Uso: python importacao.py arquivo.csv [--db users.db] [--lote 5000]
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterator, Optional
+from config import DatabaseConfig
+from db import UserDB
+from validacao import validar_produto
+
+CAMPOS_PRODUTO = ('nome', 'quantidade', 'preco')
+# Limite de linhas rejeitadas guardadas no relatório (as demais só são contadas)
+MAX_REJEITADOS = 1000
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected_count: int = 0
+    rejected: list = field(default_factory=list)
+    error: Optional[str] = None
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REJEITADOS:
+            self.rejected.append((line, reason))
+
+def detectar_formato(path: str) -> str:
+    return 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl'
+
+def ler_linhas(path: str, formato: Optional[str] = None, delimitador: str = ',') -> Iterator[tuple]:
+    """Gera (número da linha, registro) sem carregar o arquivo inteiro"""
+    formato = formato or detectar_formato(path)
+    with open(path, newline='', encoding='utf-8-sig') as arquivo:
+        if formato == 'csv':
+            reader = csv.DictReader(arquivo, delimiter=delimitador)
+            faltando = set(CAMPOS_PRODUTO) - set(reader.fieldnames or ())
+            if faltando:
+                raise ValueError(f"Colunas ausentes no CSV: {', '.join(sorted(faltando))}")
+            for registro in reader:
+                yield reader.line_num, registro
+        else:
+            for numero, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield numero, f"JSON inválido: {e.msg}"
+                    continue
+                yield numero, registro if isinstance(registro, dict) else "Registro não é um objeto"
+
+def _converter(registro) -> tuple:
+    """Retorna ((nome, quantidade, preco), None) ou (None, motivo da rejeição)"""
+    if isinstance(registro, str):
+        return None, registro
+    valores = (registro.get(campo) for campo in CAMPOS_PRODUTO)
+    nome, quantidade, preco = ('' if valor is None else str(valor).strip() for valor in valores)
+    erro = validar_produto(nome, quantidade, preco)
+    if erro:
+        return None, erro
+    return (nome, int(quantidade), float(preco)), None
+
+def importar_produtos(db, path: str, batch_size: Optional[int] = None, formato: Optional[str] = None,
+                      delimitador: str = ',', progress: Optional[Callable] = None) -> ImportResult:
+    """Importa produtos em transações de batch_size linhas.
+
+    progress(linhas_lidas, resultado) é chamado após cada lote gravado.
+    """
+    batch_size = batch_size or db.config.IMPORT_BATCH_SIZE
+    result = ImportResult()
+    lidas = 0
+    try:
+        linhas = ler_linhas(path, formato, delimitador)
+        while True:
+            bloco = list(islice(linhas, batch_size))
+            if not bloco:
+                break
+            lidas += len(bloco)
+
+            validos = []
+            for numero, registro in bloco:
+                produto, motivo = _converter(registro)
+                if motivo:
+                    result.reject(numero, motivo)
+                else:
+                    validos.append(produto)
+
+            if validos and not db.register_products(validos):
+                result.error = f"Falha ao gravar o lote que termina na linha {bloco[-1][0]}"
+                break
+            result.imported += len(validos)
+            if progress:
+                progress(lidas, result)
+    except (OSError, ValueError, csv.Error) as e:
+        logging.error(f"Erro na importação de {path}: {str(e)}")
+        result.error = str(e)
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa produtos de CSV ou JSON Lines")
+    parser.add_argument("arquivo")
+    parser.add_argument("--db", default=DatabaseConfig.DB_NAME)
+    parser.add_argument("--lote", type=int, default=DatabaseConfig.IMPORT_BATCH_SIZE)
+    parser.add_argument("--formato", choices=('csv', 'jsonl'))
+    parser.add_argument("--delimitador", default=',')
+    args = parser.parse_args()
+
+    db = UserDB(DatabaseConfig(DB_NAME=args.db, USERNAME_INDEX=False))
+    try:
+        result = importar_produtos(
+            db, args.arquivo, args.lote, args.formato, args.delimitador,
+            progress=lambda lidas, r: print(f"{lidas} linhas lidas, {r.imported} importadas, "
+                                            f"{r.rejected_count} rejeitadas")
+        )
+    finally:
+        db.close()
+
+    for numero, motivo in result.rejected:
+        print(f"Linha {numero}: {motivo}")
+    if result.error:
+        print(f"Erro: {result.error}")
+    print(f"Total: {result.imported} importados, {result.rejected_count} rejeitados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Limite de tentativas de login, consultado pelo AuthManager antes do banco e do hash.
+
+Duas camadas, consultadas em memória:
+    - token bucket por usuário e por origem (IP do cliente no servidor, "local"
+      na interface), em LRU com no máximo LOGIN_LIMITER_MAX_KEYS chaves;
+    - bloqueio do usuário após LOGIN_MAX_FAILURES falhas seguidas. Os contadores
+      de falhas são gravados no SQLite (tabela falhas_login) e recarregados ao
+      abrir, para um reinício não zerar a contagem. Bloqueios são gravados na
+      hora; as demais mudanças vão em lote, no máximo a cada
+      LOGIN_FAILURES_FLUSH_INTERVAL s (e em flush/close), então tentar nomes
+      inexistentes não gera uma escrita por tentativa. A tabela descarta
+      bloqueios vencidos e fica limitada às LOGIN_LIMITER_MAX_KEYS linhas mais
+      recentes.
+Uma tentativa recusada custa só consultas a dicionários: nenhum hash, nenhuma I/O.
+"""
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from config import DatabaseConfig
+
+class LoginBloqueado(Exception):
+    """Tentativa recusada pelo limitador; espera é o tempo (s) até a próxima ser aceita"""
+
+    def __init__(self, espera: float):
+        super().__init__(f"Muitas tentativas de login; tente novamente em {math.ceil(espera)} s")
+        self.espera = espera
+
+class TokenBuckets:
+    """Token buckets por chave, em LRU limitado a max_keys.
+
+    Cada chave acumula até capacity fichas, repostas a rate fichas/s. Uma chave
+    descartada pelo LRU volta cheia, o que só favorece chaves pouco usadas.
+    """
+
+    def __init__(self, capacity: float, rate: float, max_keys: int):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, agora: Optional[float] = None) -> float:
+        """Gasta uma ficha; retorna 0 se havia ficha ou o tempo (s) até a próxima"""
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            fichas, atualizado = self._buckets.pop(key, (self.capacity, agora))
+            fichas = min(self.capacity, fichas + (agora - atualizado) * self.rate)
+            if fichas >= 1:
+                fichas -= 1
+                espera = 0.0
+            else:
+                espera = (1 - fichas) / self.rate
+            self._buckets[key] = (fichas, agora)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return espera
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class LoginLimiter:
+    """Decide se uma tentativa de login pode ir ao banco e registra o resultado"""
+
+    def __init__(self, config: DatabaseConfig, pool=None):
+        self.config = config
+        self.pool = pool
+        self.por_usuario = TokenBuckets(
+            config.LOGIN_BURST_USER, config.LOGIN_ATTEMPTS_PER_MINUTE_USER / 60, config.LOGIN_LIMITER_MAX_KEYS
+        )
+        self.por_origem = TokenBuckets(
+            config.LOGIN_BURST_SOURCE, config.LOGIN_ATTEMPTS_PER_MINUTE_SOURCE / 60, config.LOGIN_LIMITER_MAX_KEYS
+        )
+        # username -> (falhas seguidas, bloqueado até em epoch)
+        self._falhas = OrderedDict()
+        # username -> estado ainda não gravado (None = apagar a linha)
+        self._pendentes = {}
+        self._gravado_em = time.monotonic()
+        self._lock = threading.Lock()
+        # Serializa as gravações, para um lote antigo não sobrescrever um mais novo
+        self._lock_gravacao = threading.Lock()
+        if pool is not None:
+            self._carregar()
+
+    def _carregar(self) -> None:
+        try:
+            with self.pool.connection() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS falhas_login (
+                        username TEXT PRIMARY KEY,
+                        falhas INTEGER NOT NULL,
+                        bloqueado_ate REAL NOT NULL DEFAULT 0
+                    )
+                ''')
+                # Bloqueio vencido recomeça a contagem; contadores sem bloqueio (0) continuam
+                conn.execute("DELETE FROM falhas_login WHERE bloqueado_ate > 0 AND bloqueado_ate <= ?",
+                             (time.time(),))
+                self._limitar_tabela(conn)
+                conn.commit()
+                rows = conn.execute(
+                    "SELECT username, falhas, bloqueado_ate FROM falhas_login ORDER BY rowid DESC LIMIT ?",
+                    (self.config.LOGIN_LIMITER_MAX_KEYS,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao carregar falhas de login: {str(e)}")
+            return
+        for username, falhas, bloqueado_ate in reversed(rows):
+            self._falhas[username] = (falhas, bloqueado_ate)
+
+    def bloqueio_restante(self, username: str) -> float:
+        """Segundos até o fim do bloqueio do usuário (0 se não está bloqueado)"""
+        falhas = self._falhas.get(username)
+        return max(0.0, falhas[1] - time.time()) if falhas else 0.0
+
+    def check(self, username: str, origem: str = 'local') -> None:
+        """Levanta LoginBloqueado se a tentativa deve ser recusada; não faz I/O"""
+        espera = self.bloqueio_restante(username)
+        if espera <= 0:
+            espera = self.por_origem.consume(origem)
+        if espera <= 0:
+            espera = self.por_usuario.consume(username)
+        if espera > 0:
+            # Sem log aqui: num ataque, registrar cada recusa já seria I/O por tentativa
+            raise LoginBloqueado(espera)
+
+    def record(self, username: str, sucesso: bool) -> None:
+        """Atualiza o contador de falhas do usuário; grava na hora ao bloquear, em lote nos demais casos"""
+        with self._lock:
+            anterior = self._falhas.pop(username, None)
+            bloqueou = False
+            if sucesso:
+                # Sem contador, não há linha no banco para apagar
+                if anterior is None:
+                    return
+                estado = None
+            else:
+                falhas = (anterior[0] if anterior else 0) + 1
+                bloqueado_ate = anterior[1] if anterior else 0.0
+                bloqueou = falhas % self.config.LOGIN_MAX_FAILURES == 0
+                if bloqueou:
+                    bloqueado_ate = time.time() + self.config.LOGIN_LOCKOUT_SECONDS
+                    logging.warning(f"Usuário {username} bloqueado após {falhas} falhas de login")
+                estado = self._falhas[username] = (falhas, bloqueado_ate)
+                if len(self._falhas) > self.config.LOGIN_LIMITER_MAX_KEYS:
+                    self._falhas.popitem(last=False)
+            if self.pool is None:
+                return
+            self._pendentes[username] = estado
+            if not (bloqueou or len(self._pendentes) >= self.config.LOGIN_LIMITER_MAX_KEYS
+                    or time.monotonic() - self._gravado_em >= self.config.LOGIN_FAILURES_FLUSH_INTERVAL):
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Grava os contadores que ainda estão só em memória"""
+        if self.pool is None:
+            return
+        with self._lock_gravacao:
+            with self._lock:
+                pendentes, self._pendentes = self._pendentes, {}
+                self._gravado_em = time.monotonic()
+            if pendentes:
+                self._gravar(pendentes)
+
+    def close(self) -> None:
+        self.flush()
+
+    def _limitar_tabela(self, conn) -> None:
+        # INSERT OR REPLACE renumera o rowid, então os maiores são os mais recentes, como no LRU
+        conn.execute('''
+            DELETE FROM falhas_login WHERE rowid NOT IN (
+                SELECT rowid FROM falhas_login ORDER BY rowid DESC LIMIT ?
+            )
+        ''', (self.config.LOGIN_LIMITER_MAX_KEYS,))
+
+    def _gravar(self, pendentes: dict) -> None:
+        """Grava um lote de estados numa transação só"""
+        try:
+            with self.pool.connection() as conn:
+                conn.executemany("DELETE FROM falhas_login WHERE username = ?",
+                                 [(username,) for username, estado in pendentes.items() if estado is None])
+                conn.executemany('''
+                    INSERT OR REPLACE INTO falhas_login (username, falhas, bloqueado_ate)
+                    VALUES (?, ?, ?)
+                ''', [(username, *estado) for username, estado in pendentes.items() if estado is not None])
+                self._limitar_tabela(conn)
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao gravar falhas de login: {str(e)}")
+
+def get_login_limiter(db) -> Optional[LoginLimiter]:
+    """Retorna o limitador compartilhado do banco, ou None se desativado em db.config"""
+    if not db.config.LOGIN_RATE_LIMIT:
+        return None
+    limiter = getattr(db, '_login_limiter', None)
+    if limiter is None:
+        limiter = db._login_limiter = LoginLimiter(db.config, getattr(db, 'pool', None))
+    return limiter
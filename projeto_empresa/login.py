@@ -1,10 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox
 import logging
+import math
 from config import AppConfig
 from db import AuthManager
 from cadastro import Cadastro
 from menu import MainMenu  # Importação correta do menu atualizado
+from executor import get_executor, set_loading
+
+# Teclas que não alteram o texto e não devem disparar o autocomplete
+NAVIGATION_KEYS = {
+    'Up', 'Down', 'Left', 'Right', 'Home', 'End', 'Prior', 'Next', 'Tab', 'Return',
+    'Escape', 'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R',
+    'Caps_Lock', 'Super_L', 'Super_R', 'Meta_L', 'Meta_R'
+}
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,6 +27,9 @@ class LoginScreen:
         self.config = config
         self.db = db
         self.auth = AuthManager(db)
+        self._autenticando = False
+        self._autocomplete_job = None
+        self._ultimo_termo = None
         self._setup_window()
         self._create_widgets()
         self._setup_autocomplete()
@@ -30,7 +42,7 @@ class LoginScreen:
         self.master.resizable(False, False)
 
     def _setup_autocomplete(self):
-        self.username_entry.bind('<KeyRelease>', self._update_users_list)
+        self.username_entry.bind('<KeyRelease>', self._schedule_users_update)
         self.username_entry.bind('<FocusOut>', self._hide_listbox)
         self.users_listbox.bind('<<ListboxSelect>>', self._select_user_from_list)
 
@@ -87,13 +99,37 @@ class LoginScreen:
         self.users_listbox.grid(row=3, column=1, sticky='nsew', padx=5, pady=2)
         self.users_listbox.grid_remove()
 
+    def _schedule_users_update(self, event=None):
+        """Agrupa as teclas digitadas: a busca só roda após uma pausa na digitação"""
+        if event is not None and event.keysym in NAVIGATION_KEYS:
+            return
+        if self._autocomplete_job is not None:
+            self.master.after_cancel(self._autocomplete_job)
+        self._autocomplete_job = self.master.after(
+            self.config.AUTOCOMPLETE_DELAY_MS, self._update_users_list
+        )
+
     def _update_users_list(self, event=None):
+        self._autocomplete_job = None
         search_term = self.username_entry.get().strip()
-        print(f"Termo buscado: '{search_term}'")
-        
-        users = self.db.search_users(search_term)
-        print(f"Usuários encontrados: {users}")
-        
+        if search_term == self._ultimo_termo:
+            return
+        self._ultimo_termo = search_term
+
+        if not search_term:
+            self._show_users(search_term, [])
+            return
+
+        get_executor(self.master).submit(
+            self.db.search_users, search_term,
+            on_success=lambda users: self._show_users(search_term, users)
+        )
+
+    def _show_users(self, search_term: str, users: list) -> None:
+        # Descarta respostas de termos que o usuário já alterou
+        if search_term != self.username_entry.get().strip():
+            return
+
         self.users_listbox.delete(0, tk.END)
         
         if search_term and users:
@@ -161,6 +197,8 @@ class LoginScreen:
         self.master.bind('<Return>', lambda event: self._handle_login())
 
     def _handle_login(self) -> None:
+        if self._autenticando:
+            return
         try:
             username = self.username_entry.get().strip()
             password = self.password_entry.get().strip()
@@ -169,25 +207,43 @@ class LoginScreen:
                 self._show_error("Preencha todos os campos!")
                 return
 
-            success = self.auth.validate_credentials(username, password)
-            
-            if success:
-                # CORREÇÃO AQUI: passar o username como parâmetro
-                self._on_login_success(username)  # ← Adicionado o parâmetro
-            else:
-                self._show_error("Usuário ou senha inválidos")
+            self._set_autenticando(True)
+            get_executor(self.master).submit(
+                self.auth.login, username, password,
+                on_success=lambda token: self._on_login_result(username, token),
+                on_error=self._on_login_error
+            )
 
         except Exception as e:
-            logging.error(f"Erro no login: {str(e)}")
-            self._show_error("Erro interno no sistema")
+            self._on_login_error(e)
+
+    def _set_autenticando(self, autenticando: bool) -> None:
+        self._autenticando = autenticando
+        set_loading(self.frame, autenticando)
+
+    def _on_login_result(self, username: str, token) -> None:
+        self._set_autenticando(False)
+        if token:
+            self._on_login_success(username, token)
+        elif self.auth.lockout_remaining(username) > 0:
+            minutos = math.ceil(self.auth.lockout_remaining(username) / 60)
+            self._show_error(f"Muitas tentativas sem sucesso. Tente novamente em {minutos} min")
+        else:
+            self._show_error("Usuário ou senha inválidos")
+
+    def _on_login_error(self, e: Exception) -> None:
+        self._set_autenticando(False)
+        logging.error(f"Erro no login: {str(e)}")
+        self._show_error("Erro interno no sistema")
 
     def _show_error(self, message: str) -> None:
         messagebox.showerror("Erro", message)
         self.password_entry.delete(0, tk.END)
 
-    def _on_login_success(self, username: str) -> None:
+    def _on_login_success(self, username: str, token: str) -> None:
         self.master.withdraw()
-        MainMenu(self.master, self.db, username)  # Passa 3 argumentos
+        # O token identifica a sessão nas ações seguintes, sem repetir a senha
+        MainMenu(self.master, self.db, username, token)
 
     def _toggle_password_visibility(self) -> None:
         show = self.show_password.get()
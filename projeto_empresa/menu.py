@@ -1,21 +1,31 @@
 import tkinter as tk
 from tkinter import messagebox
+from tkinter import filedialog
 from config import AppConfig
 from produtos import CadastroProduto
 from consulta import ConsultaProdutos
+from executor import get_executor, set_loading
+from importacao import importar_produtos
+from exportacao import exportar_produtos
+from relatorio import RelatorioProdutos
+from db import AuthManager, UserDB
 
 class MainMenu(tk.Toplevel):
-    def __init__(self, master, db, username: str):  # ← 3 parâmetros
+    def __init__(self, master, db, username: str, token: str = None):
         super().__init__(master)
         self.db = db
         self.username = username
+        # Token de sessão emitido no login (sessoes.py); conferido antes de cada ação
+        self.token = token
+        self.auth = AuthManager(db)
         self.config = AppConfig()
+        self._transferindo = False
         self._setup_window()
         self._create_widgets()
 
     def _setup_window(self):
         self.title("Sistema de Gestão")
-        self.geometry("600x400")
+        self.geometry("600x540")
         self.configure(bg=self.config.BG_COLOR)
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
@@ -33,12 +43,14 @@ class MainMenu(tk.Toplevel):
         ).pack(side='left')
 
         # Botões principais
-        buttons_frame = tk.Frame(self, bg=self.config.BG_COLOR)
+        buttons_frame = self.buttons_frame = tk.Frame(self, bg=self.config.BG_COLOR)
         buttons_frame.pack(expand=True)
 
         buttons = [
             ("Cadastrar", self._open_cadastro),
             ("Consulta", self._open_consulta),
+            ("Importar", self._open_importacao),
+            ("Exportar", self._open_exportacao),
             ("Relatório", self._open_relatorio),
             ("Sair", self._on_close)
         ]
@@ -56,15 +68,130 @@ class MainMenu(tk.Toplevel):
             )
             btn.pack(pady=10, padx=10, side='top')
 
+        # Barra de status para operações em segundo plano
+        self.status_label = tk.Label(
+            self,
+            text="",
+            bg=self.config.BG_COLOR,
+            fg=self.config.TEXT_COLOR,
+            anchor='w'
+        )
+        self.status_label.pack(fill='x', side='bottom', padx=20, pady=5)
+
     def _open_cadastro(self):
+        if not self._sessao_valida():
+            return
         CadastroProduto(self, self.db)
 
     def _open_consulta(self):
+        if not self._sessao_valida():
+            return
         ConsultaProdutos(self, self.db)  # Substitua a messagebox por esta linha
 
+    def _open_importacao(self):
+        if not self._sessao_valida():
+            return
+        if self._transferindo:
+            return
+        path = filedialog.askopenfilename(
+            parent=self,
+            title="Importar produtos",
+            filetypes=[("CSV ou JSON Lines", "*.csv *.jsonl *.ndjson"), ("Todos os arquivos", "*.*")]
+        )
+        if not path:
+            return
+
+        executor = get_executor(self)
+        self._set_transferindo(True)
+        self.status_label.config(text="Importando...")
+        executor.submit(
+            importar_produtos, self.db, path,
+            progress=lambda lidas, result: executor.call_soon(self._on_import_progress, lidas, result.imported),
+            on_success=self._on_import_done,
+            on_error=self._on_import_error,
+            owner=self
+        )
+
+    def _set_transferindo(self, transferindo: bool) -> None:
+        self._transferindo = transferindo
+        set_loading(self.buttons_frame, transferindo)
+
+    def _on_import_progress(self, lidas: int, importados: int) -> None:
+        self.status_label.config(text=f"Importando... {lidas} linhas lidas, {importados} importadas")
+
+    def _on_import_done(self, result) -> None:
+        self._set_transferindo(False)
+        resumo = f"{result.imported} produtos importados, {result.rejected_count} linhas rejeitadas"
+        self.status_label.config(text=resumo)
+        detalhes = "\n".join(f"Linha {numero}: {motivo}" for numero, motivo in result.rejected[:10])
+        if result.error:
+            messagebox.showerror("Importação", f"{resumo}\n\nErro: {result.error}", parent=self)
+        elif result.rejected_count:
+            messagebox.showwarning("Importação", f"{resumo}\n\n{detalhes}", parent=self)
+        else:
+            messagebox.showinfo("Importação", resumo, parent=self)
+
+    def _on_import_error(self, e: Exception) -> None:
+        self._set_transferindo(False)
+        self.status_label.config(text="")
+        messagebox.showerror("Importação", f"Falha crítica: {str(e)}", parent=self)
+
+    def _open_exportacao(self):
+        if not self._sessao_valida():
+            return
+        if self._transferindo:
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Exportar produtos",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Colunar", "*.pcol")]
+        )
+        if not path:
+            return
+
+        executor = get_executor(self)
+        self._set_transferindo(True)
+        self.status_label.config(text="Exportando...")
+        executor.submit(
+            exportar_produtos, self.db, path,
+            progress=lambda total: executor.call_soon(
+                lambda: self.status_label.config(text=f"Exportando... {total} produtos")
+            ),
+            on_success=self._on_export_done,
+            on_error=self._on_export_error,
+            owner=self
+        )
+
+    def _on_export_done(self, total: int) -> None:
+        self._set_transferindo(False)
+        self.status_label.config(text=f"{total} produtos exportados")
+        messagebox.showinfo("Exportação", f"{total} produtos exportados", parent=self)
+
+    def _on_export_error(self, e: Exception) -> None:
+        self._set_transferindo(False)
+        self.status_label.config(text="")
+        messagebox.showerror("Exportação", f"Falha na exportação: {str(e)}", parent=self)
+
     def _open_relatorio(self):
-        messagebox.showinfo("Relatório", "Funcionalidade de relatório em desenvolvimento!")
+        if not self._sessao_valida():
+            return
+        # O relatório lê as tabelas de resumo mantidas por triggers, que só existem no SQLite
+        if not isinstance(self.db, UserDB):
+            messagebox.showinfo("Relatório", "Relatório disponível apenas com o backend SQLite", parent=self)
+            return
+        RelatorioProdutos(self, self.db)
+
+    def _sessao_valida(self) -> bool:
+        """Confere o token em memória; com a sessão vencida, volta para o login"""
+        if self.token is None or self.auth.verify_token(self.token) == self.username:
+            return True
+        messagebox.showwarning("Sessão", "Sua sessão expirou. Faça login novamente.", parent=self)
+        self._on_close()
+        return False
 
     def _on_close(self):
+        if self.token is not None:
+            self.auth.logout(self.token)
         self.destroy()          # Fecha a janela do menu
         self.master.deiconify() # Reexibe a janela principal (login)
\ No newline at end of file
@@ -0,0 +1,108 @@
+import sqlite3
+import queue
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from config import DatabaseConfig
+
+class ConnectionPool:
+    """Pool limitado de conexões SQLite reutilizáveis entre threads"""
+
+    def __init__(self, config: DatabaseConfig):
+        self.config = config
+        self._pragmas = config.pragmas()
+        self._idle = queue.LifoQueue(maxsize=config.POOL_SIZE)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.config.DB_NAME,
+            timeout=self.config.POOL_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=self.config.STATEMENT_CACHE_SIZE
+        )
+        for pragma, value in self._pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logging.warning(f"Conexão descartada pelo health check: {str(e)}")
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Pool de conexões encerrado")
+
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.config.POOL_SIZE
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._connect()
+                    except sqlite3.Error:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                try:
+                    conn, last_used = self._idle.get(timeout=self.config.POOL_TIMEOUT)
+                except queue.Empty:
+                    raise sqlite3.OperationalError("Pool de conexões esgotado")
+
+            idle_time = time.monotonic() - last_used
+            if idle_time < self.config.POOL_HEALTH_CHECK_INTERVAL or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait((conn, time.monotonic()))
+        except (sqlite3.Error, queue.Full):
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão do pool e a devolve ao final do bloco"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Fecha todas as conexões ociosas e recusa novos empréstimos"""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    @property
+    def size(self) -> int:
+        return self._created
@@ -1,15 +1,28 @@
 import tkinter as tk
 from tkinter import messagebox
 import logging
+from typing import Callable, Optional
 from config import AppConfig
+from executor import get_executor, set_loading
+from formatacao import preco_para_edicao
+from validacao import validar_produto
 
 class CadastroProduto(tk.Toplevel):
-    def __init__(self, master, db):  # Corrigido
+    """Cadastro de produto; com produto (linha de UserDB.get_product), edita o existente.
+
+    on_salvo(produto) é chamado com a linha atualizada após uma edição.
+    """
+
+    def __init__(self, master, db, produto: Optional[tuple] = None,
+                 on_salvo: Optional[Callable] = None):  # Corrigido
         super().__init__(master)
         self.db = db
         self.config = AppConfig()
+        self.produto = produto
+        self.on_salvo = on_salvo
+        self._salvando = False
         
-        self.title("Cadastro de Produtos")
+        self.title("Editar Produto" if produto else "Cadastro de Produtos")
         self.geometry("400x300")
         self.configure(bg=self.config.BG_COLOR)
         self.resizable(False, False)
@@ -18,12 +31,12 @@ class CadastroProduto(tk.Toplevel):
         self._bind_events()
 
     def _create_widgets(self):
-        frame = tk.Frame(self, bg=self.config.BG_COLOR)
+        frame = self.frame = tk.Frame(self, bg=self.config.BG_COLOR)
         frame.pack(padx=20, pady=20, fill='both', expand=True)
 
         tk.Label(
             frame,
-            text="Cadastro de Produtos",
+            text="Editar Produto" if self.produto else "Cadastro de Produtos",
             bg=self.config.BG_COLOR,
             fg=self.config.TEXT_COLOR,
             font=(self.config.FONT, self.config.TITLE_FONT_SIZE)
@@ -42,10 +55,16 @@ class CadastroProduto(tk.Toplevel):
         self.preco_entry = tk.Entry(frame)
         self.preco_entry.grid(row=3, column=1, pady=5, sticky='ew')
 
+        if self.produto:
+            _, nome, quantidade, preco = self.produto[:4]
+            self.nome_entry.insert(0, nome)
+            self.quantidade_entry.insert(0, str(quantidade))
+            self.preco_entry.insert(0, preco_para_edicao(preco))
+
         # Botão de cadastro
         tk.Button(
             frame,
-            text="Salvar Produto",
+            text="Salvar Alterações" if self.produto else "Salvar Produto",
             command=self._salvar_produto,
             bg=self.config.BUTTON_BG,
             fg=self.config.TEXT_COLOR
@@ -55,6 +74,8 @@ class CadastroProduto(tk.Toplevel):
         self.bind('<Return>', lambda event: self._salvar_produto())
 
     def _salvar_produto(self, event=None):
+        if self._salvando:
+            return
         try:
             nome = self.nome_entry.get().strip()
             quantidade = self.quantidade_entry.get().strip()
@@ -67,11 +88,22 @@ class CadastroProduto(tk.Toplevel):
             quantidade = int(quantidade)
             preco = float(preco)
 
-            if self.db.register_product(nome, quantidade, preco):
-                messagebox.showinfo("Sucesso", "Produto cadastrado com sucesso!")
-                self.destroy()
-            else:
-                messagebox.showerror("Erro", "Falha ao cadastrar produto")
+            self._set_salvando(True)
+            if self.produto:
+                # A versão lida ao abrir a edição impede sobrescrever alteração de outro usuário
+                get_executor(self).submit(
+                    self.db.update_product, self.produto[0], nome, quantidade, preco, self.produto[-1],
+                    on_success=self._on_produto_atualizado,
+                    on_error=self._on_erro_salvar,
+                    owner=self
+                )
+                return
+            get_executor(self).submit(
+                self.db.register_product, nome, quantidade, preco,
+                on_success=self._on_produto_salvo,
+                on_error=self._on_erro_salvar,
+                owner=self
+            )
 
         except ValueError:
             messagebox.showerror("Erro", "Valores numéricos inválidos")
@@ -79,20 +111,44 @@ class CadastroProduto(tk.Toplevel):
             logging.error(f"Erro no cadastro: {str(e)}")
             messagebox.showerror("Erro", f"Falha crítica: {str(e)}")
 
+    def _set_salvando(self, salvando: bool) -> None:
+        self._salvando = salvando
+        set_loading(self.frame, salvando)
+
+    def _on_produto_salvo(self, sucesso: bool) -> None:
+        self._set_salvando(False)
+        if sucesso:
+            messagebox.showinfo("Sucesso", "Produto cadastrado com sucesso!")
+            self.destroy()
+        else:
+            messagebox.showerror("Erro", "Falha ao cadastrar produto")
+
+    def _on_produto_atualizado(self, resultado: tuple) -> None:
+        self._set_salvando(False)
+        sucesso, mensagem, produto = resultado
+        if produto is not None and self.on_salvo:
+            self.on_salvo(produto)
+        if sucesso:
+            messagebox.showinfo("Sucesso", mensagem, parent=self.master)
+            self.destroy()
+            return
+        messagebox.showerror("Erro", mensagem, parent=self)
+        if produto is not None:
+            # Conflito: o formulário passa a editar a versão atual
+            self.produto = produto
+            for entry, valor in ((self.nome_entry, produto[1]), (self.quantidade_entry, str(produto[2])),
+                                 (self.preco_entry, preco_para_edicao(produto[3]))):
+                entry.delete(0, tk.END)
+                entry.insert(0, valor)
+
+    def _on_erro_salvar(self, e: Exception) -> None:
+        self._set_salvando(False)
+        logging.error(f"Erro no cadastro: {str(e)}")
+        messagebox.showerror("Erro", f"Falha crítica: {str(e)}")
+
     def _validar_campos(self, nome: str, quantidade: str, preco: str) -> bool:
-        if not nome:
-            messagebox.showerror("Erro", "Nome do produto é obrigatório")
-            return False
-            
-        if not quantidade.isdigit() or int(quantidade) < 0:
-            messagebox.showerror("Erro", "Quantidade inválida")
-            return False
-            
-        try:
-            if float(preco) <= 0:
-                raise ValueError
-        except ValueError:
-            messagebox.showerror("Erro", "Preço inválido")
+        erro = validar_produto(nome, quantidade, preco)
+        if erro:
+            messagebox.showerror("Erro", erro)
             return False
-            
         return True
\ No newline at end of file
@@ -0,0 +1,213 @@
+import tkinter as tk
+from tkinter import ttk
+from tkinter import messagebox
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from config import AppConfig
+from eventos import ALTERACAO_EXTERNA, EVENTOS_PRODUTO
+from executor import get_executor, subscribe_events
+from resumo import ler_resumos
+
+# Tamanho do prefixo de 'AAAA-MM-DD' que identifica cada período
+PERIODOS = {'dia': 10, 'mes': 7}
+MAX_ESTOQUE_BAIXO = 100
+# Espera para juntar várias alterações de produtos numa única atualização
+ATRASO_ATUALIZACAO_MS = 500
+
+@dataclass
+class Relatorio:
+    total_produtos: int = 0
+    total_itens: int = 0
+    valor_total: float = 0.0
+    estoque_baixo: list = field(default_factory=list)
+    cadastros_por_dia: list = field(default_factory=list)
+    cadastros_por_mes: list = field(default_factory=list)
+    versao: int = 0
+
+class RelatorioEngine:
+    """Relatórios sobre a tabela produtos, com toda a agregação feita no SQLite.
+
+    Os resultados ficam em cache pela versão da tabela (UserDB.table_version),
+    então reabrir o relatório sem alterações no estoque não refaz as consultas.
+    """
+
+    def __init__(self, db, max_cached: int = 8):
+        self.db = db
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def gerar(self, limite_estoque_baixo: int = None) -> Relatorio:
+        limite = self.db.config.LOW_STOCK_THRESHOLD if limite_estoque_baixo is None else limite_estoque_baixo
+        versao = self.db.table_version('produtos')
+        chave = (versao, limite)
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+
+        relatorio = self._calcular(limite)
+        relatorio.versao = versao
+        # Versão negativa indica falha ao lê-la; nesse caso não guardamos
+        if versao >= 0:
+            with self._lock:
+                self._cache[chave] = relatorio
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+        return relatorio
+
+    def _calcular(self, limite: int) -> Relatorio:
+        # Totais e contagens vêm das tabelas de resumo (resumo.py), não da tabela inteira
+        with self.db.pool.connection() as conn:
+            (total_produtos, total_itens, valor_total), _ = ler_resumos(conn)
+            estoque_baixo = conn.execute('''
+                SELECT id, nome, quantidade FROM produtos
+                WHERE quantidade <= ?
+                ORDER BY quantidade, id
+                LIMIT ?
+            ''', (limite, MAX_ESTOQUE_BAIXO)).fetchall()
+            por_periodo = {
+                periodo: conn.execute(f'''
+                    SELECT substr(dia, 1, {tamanho}) AS periodo, SUM(total)
+                    FROM resumo_cadastros_dia
+                    GROUP BY periodo
+                    ORDER BY periodo DESC
+                ''').fetchall()
+                for periodo, tamanho in PERIODOS.items()
+            }
+        return Relatorio(
+            total_produtos=total_produtos,
+            total_itens=total_itens,
+            valor_total=valor_total,
+            estoque_baixo=estoque_baixo,
+            cadastros_por_dia=por_periodo['dia'],
+            cadastros_por_mes=por_periodo['mes']
+        )
+
+def get_relatorio_engine(db) -> RelatorioEngine:
+    """Retorna o motor de relatórios compartilhado do banco (mantém o cache entre janelas)"""
+    engine = getattr(db, '_relatorio_engine', None)
+    if engine is None:
+        engine = db._relatorio_engine = RelatorioEngine(db)
+    return engine
+
+def formatar_moeda(valor: float) -> str:
+    return "R$ " + f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+class RelatorioProdutos(tk.Toplevel):
+    def __init__(self, master, db):
+        super().__init__(master)
+        self.db = db
+        self.config = AppConfig()
+        self.engine = get_relatorio_engine(db)
+        self.relatorio = None
+        self._atualizacao_job = None
+
+        self.title("Relatório de Estoque")
+        self.geometry("700x500")
+        self.configure(bg=self.config.BG_COLOR)
+        self.resizable(True, True)
+
+        self._create_widgets()
+        self._carregar_relatorio()
+        subscribe_events(self, db.events, self._on_evento, EVENTOS_PRODUTO + (ALTERACAO_EXTERNA,))
+
+    def _create_widgets(self):
+        frame = tk.Frame(self, bg=self.config.BG_COLOR)
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
+
+        # Resumo do estoque
+        self.resumo_label = tk.Label(
+            frame,
+            text="Carregando relatório...",
+            bg=self.config.BG_COLOR,
+            fg=self.config.TEXT_COLOR,
+            font=(self.config.FONT, self.config.FONT_SIZE),
+            justify='left',
+            anchor='w'
+        )
+        self.resumo_label.pack(fill='x', pady=(0, 10))
+
+        tabelas = tk.Frame(frame, bg=self.config.BG_COLOR)
+        tabelas.pack(fill='both', expand=True)
+
+        # Estoque baixo
+        self.estoque_label = tk.Label(tabelas, text="Estoque baixo", bg=self.config.BG_COLOR, fg=self.config.TEXT_COLOR)
+        self.estoque_label.grid(row=0, column=0, sticky='w')
+        self.estoque_tree = ttk.Treeview(tabelas, columns=('ID', 'Nome', 'Quantidade'), show='headings')
+        for coluna, largura, ancora in (('ID', 50, 'center'), ('Nome', 200, 'w'), ('Quantidade', 90, 'center')):
+            self.estoque_tree.heading(coluna, text=coluna)
+            self.estoque_tree.column(coluna, width=largura, anchor=ancora)
+        self.estoque_tree.grid(row=1, column=0, sticky='nsew', padx=(0, 10))
+
+        # Cadastros por período
+        periodo_frame = tk.Frame(tabelas, bg=self.config.BG_COLOR)
+        periodo_frame.grid(row=0, column=1, sticky='w')
+        tk.Label(periodo_frame, text="Cadastros por", bg=self.config.BG_COLOR, fg=self.config.TEXT_COLOR).pack(side='left')
+        self.periodo = tk.StringVar(value='dia')
+        for texto, valor in (("dia", 'dia'), ("mês", 'mes')):
+            tk.Radiobutton(
+                periodo_frame,
+                text=texto,
+                value=valor,
+                variable=self.periodo,
+                command=self._mostrar_cadastros,
+                bg=self.config.BG_COLOR,
+                fg=self.config.TEXT_COLOR,
+                selectcolor=self.config.BG_COLOR
+            ).pack(side='left')
+        self.cadastros_tree = ttk.Treeview(tabelas, columns=('Período', 'Cadastros'), show='headings')
+        self.cadastros_tree.heading('Período', text='Período')
+        self.cadastros_tree.heading('Cadastros', text='Cadastros')
+        self.cadastros_tree.column('Período', width=120, anchor='center')
+        self.cadastros_tree.column('Cadastros', width=90, anchor='center')
+        self.cadastros_tree.grid(row=1, column=1, sticky='nsew')
+
+        tabelas.grid_rowconfigure(1, weight=1)
+        tabelas.grid_columnconfigure(0, weight=2)
+        tabelas.grid_columnconfigure(1, weight=1)
+
+    def _carregar_relatorio(self):
+        get_executor(self).submit(
+            self.engine.gerar,
+            on_success=self._mostrar_relatorio,
+            on_error=self._on_erro,
+            owner=self
+        )
+
+    def _on_evento(self, evento) -> None:
+        if evento.tipo == ALTERACAO_EXTERNA and evento.dados.get('tabela') != 'produtos':
+            return
+        if self._atualizacao_job is None:
+            self._atualizacao_job = self.after(ATRASO_ATUALIZACAO_MS, self._atualizar)
+
+    def _atualizar(self) -> None:
+        self._atualizacao_job = None
+        self._carregar_relatorio()
+
+    def _mostrar_relatorio(self, relatorio: Relatorio) -> None:
+        self.relatorio = relatorio
+        self.resumo_label.config(text=(
+            f"Produtos cadastrados: {relatorio.total_produtos}\n"
+            f"Itens em estoque: {relatorio.total_itens}\n"
+            f"Valor total do estoque: {formatar_moeda(relatorio.valor_total)}"
+        ))
+        self.estoque_label.config(text=f"Estoque baixo (até {self.db.config.LOW_STOCK_THRESHOLD} unidades)")
+        self.estoque_tree.delete(*self.estoque_tree.get_children())
+        for produto in relatorio.estoque_baixo:
+            self.estoque_tree.insert('', 'end', values=produto)
+        self._mostrar_cadastros()
+
+    def _mostrar_cadastros(self) -> None:
+        if self.relatorio is None:
+            return
+        linhas = self.relatorio.cadastros_por_dia if self.periodo.get() == 'dia' else self.relatorio.cadastros_por_mes
+        self.cadastros_tree.delete(*self.cadastros_tree.get_children())
+        for periodo, total in linhas:
+            self.cadastros_tree.insert('', 'end', values=(periodo or '-', total))
+
+    def _on_erro(self, e: Exception) -> None:
+        logging.error(f"Erro no relatório: {str(e)}")
+        messagebox.showerror("Erro", "Falha ao gerar relatório", parent=self)
@@ -0,0 +1,157 @@
+"""Tabelas de resumo do estoque mantidas por triggers.
+
+resumo_estoque guarda os totais (produtos, itens e valor) numa única linha e
+resumo_cadastros_dia a contagem de cadastros por dia. Os triggers atualizam os
+resumos na mesma transação da escrita em produtos.
+
+Uso: python resumo.py [--db users.db] [--reconstruir]
+"""
+import argparse
+import logging
+import math
+from config import DatabaseConfig
+
+# Chave do dia; produtos sem data ficam agrupados em ''
+_DIA = "COALESCE(strftime('%Y-%m-%d', {linha}.data_cadastro), '')"
+
+def criar_tabelas_resumo(cursor) -> None:
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_estoque (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_produtos INTEGER NOT NULL,
+            total_itens INTEGER NOT NULL,
+            valor_total REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_cadastros_dia (
+            dia TEXT PRIMARY KEY,
+            total INTEGER NOT NULL
+        )
+    ''')
+
+    novo = cursor.execute("SELECT COUNT(*) FROM resumo_estoque").fetchone()[0] == 0
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_insert AFTER INSERT ON produtos
+        BEGIN
+            UPDATE resumo_estoque SET
+                total_produtos = total_produtos + 1,
+                total_itens = total_itens + NEW.quantidade,
+                valor_total = valor_total + NEW.quantidade * NEW.preco
+            WHERE id = 1;
+            INSERT INTO resumo_cadastros_dia (dia, total) VALUES ({_DIA.format(linha='NEW')}, 1)
+            ON CONFLICT (dia) DO UPDATE SET total = total + 1;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_delete AFTER DELETE ON produtos
+        BEGIN
+            UPDATE resumo_estoque SET
+                total_produtos = total_produtos - 1,
+                total_itens = total_itens - OLD.quantidade,
+                valor_total = valor_total - OLD.quantidade * OLD.preco
+            WHERE id = 1;
+            UPDATE resumo_cadastros_dia SET total = total - 1 WHERE dia = {_DIA.format(linha='OLD')};
+            DELETE FROM resumo_cadastros_dia WHERE dia = {_DIA.format(linha='OLD')} AND total <= 0;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_update
+        AFTER UPDATE OF quantidade, preco, data_cadastro ON produtos
+        BEGIN
+            UPDATE resumo_estoque SET
+                total_itens = total_itens - OLD.quantidade + NEW.quantidade,
+                valor_total = valor_total - OLD.quantidade * OLD.preco + NEW.quantidade * NEW.preco
+            WHERE id = 1;
+            UPDATE resumo_cadastros_dia SET total = total - 1
+            WHERE dia = {_DIA.format(linha='OLD')} AND {_DIA.format(linha='OLD')} <> {_DIA.format(linha='NEW')};
+            DELETE FROM resumo_cadastros_dia WHERE dia = {_DIA.format(linha='OLD')} AND total <= 0;
+            INSERT INTO resumo_cadastros_dia (dia, total)
+            SELECT {_DIA.format(linha='NEW')}, 1
+            WHERE {_DIA.format(linha='OLD')} <> {_DIA.format(linha='NEW')}
+            ON CONFLICT (dia) DO UPDATE SET total = total + 1;
+        END
+    ''')
+
+    # Banco existente sem resumos: preenche a partir dos produtos já cadastrados
+    if novo:
+        reconstruir_resumos(cursor)
+
+def calcular_do_zero(conn) -> tuple:
+    """Agrega a tabela produtos inteira; retorna ((produtos, itens, valor), {dia: total})"""
+    totais = conn.execute('''
+        SELECT COUNT(*), COALESCE(SUM(quantidade), 0), COALESCE(SUM(quantidade * preco), 0)
+        FROM produtos
+    ''').fetchone()
+    dias = dict(conn.execute(f'''
+        SELECT {_DIA.format(linha='produtos')} AS dia, COUNT(*) FROM produtos GROUP BY dia
+    ''').fetchall())
+    return tuple(totais), dias
+
+def ler_resumos(conn) -> tuple:
+    """Lê os resumos mantidos pelos triggers, no mesmo formato de calcular_do_zero"""
+    totais = conn.execute(
+        "SELECT total_produtos, total_itens, valor_total FROM resumo_estoque WHERE id = 1"
+    ).fetchone() or (0, 0, 0.0)
+    dias = dict(conn.execute("SELECT dia, total FROM resumo_cadastros_dia").fetchall())
+    return tuple(totais), dias
+
+def reconstruir_resumos(conn) -> None:
+    """Recalcula os resumos do zero (não faz commit)"""
+    (produtos, itens, valor), dias = calcular_do_zero(conn)
+    conn.execute('''
+        INSERT OR REPLACE INTO resumo_estoque (id, total_produtos, total_itens, valor_total)
+        VALUES (1, ?, ?, ?)
+    ''', (produtos, itens, valor))
+    conn.execute("DELETE FROM resumo_cadastros_dia")
+    conn.executemany("INSERT INTO resumo_cadastros_dia (dia, total) VALUES (?, ?)", dias.items())
+
+def verificar_resumos(db, corrigir: bool = False) -> list:
+    """Compara os resumos com um recálculo completo; retorna a lista de divergências.
+
+    Com corrigir=True, os resumos são reconstruídos quando há divergência.
+    """
+    with db.pool.connection() as conn:
+        # Leitura, recálculo e eventual correção na mesma transação
+        conn.execute("BEGIN IMMEDIATE" if corrigir else "BEGIN")
+        esperado_totais, esperado_dias = calcular_do_zero(conn)
+        atual_totais, atual_dias = ler_resumos(conn)
+
+        divergencias = []
+        for nome, esperado, atual in zip(('total_produtos', 'total_itens', 'valor_total'),
+                                         esperado_totais, atual_totais):
+            if not math.isclose(esperado, atual, rel_tol=1e-9, abs_tol=1e-6):
+                divergencias.append(f"{nome}: esperado {esperado}, resumo {atual}")
+        for dia in sorted(set(esperado_dias) | set(atual_dias)):
+            if esperado_dias.get(dia, 0) != atual_dias.get(dia, 0):
+                divergencias.append(
+                    f"cadastros em {dia or 'sem data'}: esperado {esperado_dias.get(dia, 0)}, "
+                    f"resumo {atual_dias.get(dia, 0)}"
+                )
+
+        if divergencias and corrigir:
+            logging.warning(f"Resumos divergentes, reconstruindo: {divergencias[:5]}")
+            reconstruir_resumos(conn)
+            conn.commit()
+    return divergencias
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verifica as tabelas de resumo do estoque")
+    parser.add_argument("--db", default=DatabaseConfig.DB_NAME)
+    parser.add_argument("--reconstruir", action="store_true", help="corrige divergências encontradas")
+    args = parser.parse_args()
+
+    # Import tardio: db importa este módulo
+    from db import UserDB
+    db = UserDB(DatabaseConfig(DB_NAME=args.db, USERNAME_INDEX=False))
+    try:
+        divergencias = verificar_resumos(db, corrigir=args.reconstruir)
+    finally:
+        db.close()
+    for divergencia in divergencias:
+        print(divergencia)
+    print("Resumos consistentes" if not divergencias else f"{len(divergencias)} divergência(s)")
+
+if __name__ == "__main__":
+    main()
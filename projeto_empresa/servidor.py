@@ -0,0 +1,295 @@
+"""Servidor de autenticação sem interface, para outras ferramentas usarem o cadastro.
+
+Protocolo: JSON Lines sobre TCP (localhost) ou socket Unix. Cada linha é uma
+requisição {"id": ..., "op": ..., ...} ou um lote (lista JSON de requisições,
+executadas em paralelo); a resposta vem numa linha, na mesma forma e ordem:
+{"id": ..., "ok": true, "resultado": ...} ou {"id": ..., "ok": false, "erro": "..."}.
+A conexão fica aberta entre requisições (keep-alive) até IDLE_TIMEOUT.
+
+Operações:
+    ping
+    login      username, password                 -> bool (erro se houver tentativas demais)
+    registrar  username, password                 -> {"sucesso", "mensagem"}
+    usuarios   termo                              -> [username, ...]
+    produtos   cursor, page_size, sort_key, descending, offset,
+               filtro {campos de ProductFilter}    -> {"rows", "next_cursor"}
+    contar     filtro                             -> int
+
+Uso:
+    python servidor.py servir [--db users.db] [--host 127.0.0.1] [--port 8765] [--unix caminho] [--sem-limite]
+    python servidor.py carga --username u --password s [--clientes 20] [--requisicoes 5000] [--lote 1]
+
+O limite de tentativas de login (limitador.py) recusa quase toda a carga de
+login depois das primeiras requisições; para medir logins de verdade, suba o
+servidor com --sem-limite (só em testes, nunca exposto).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Optional
+from assincrono import AsyncUserDB
+from config import DatabaseConfig, ServerConfig
+from db import AuthManager, ProductFilter, UserDB
+from limitador import LoginBloqueado
+
+class AuthServer:
+    """Atende o protocolo JSON Lines sobre um AsyncUserDB (backend SQLite)"""
+
+    def __init__(self, api: AsyncUserDB, config: ServerConfig = ServerConfig()):
+        self.api = api
+        self.config = config
+        self.auth = AuthManager(api.db)
+        self._ops = {
+            'ping': self._ping,
+            'login': self._login,
+            'registrar': self._registrar,
+            'usuarios': self._usuarios,
+            'produtos': self._produtos,
+            'contar': self._contar,
+        }
+
+    async def start(self) -> asyncio.AbstractServer:
+        if self.config.UNIX_SOCKET:
+            return await asyncio.start_unix_server(
+                self._handle, self.config.UNIX_SOCKET, limit=self.config.MAX_LINE_BYTES
+            )
+        return await asyncio.start_server(
+            self._handle, self.config.HOST, self.config.PORT, limit=self.config.MAX_LINE_BYTES
+        )
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Origem usada pelo limite de tentativas de login: IP do cliente, ou o caminho do socket Unix
+        peer = writer.get_extra_info('peername')
+        origem = peer[0] if isinstance(peer, tuple) else (self.config.UNIX_SOCKET or 'local')
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.config.IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:
+                    # Linha maior que MAX_LINE_BYTES: não há como ressincronizar o fluxo
+                    writer.write(self._encode({'id': None, 'ok': False, 'erro': "Requisição grande demais"}))
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                writer.write(self._encode(await self._processar_linha(line, origem)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _encode(resposta) -> bytes:
+        return json.dumps(resposta, ensure_ascii=False).encode('utf-8') + b'\n'
+
+    async def _processar_linha(self, line: bytes, origem: str):
+        try:
+            requisicao = json.loads(line)
+        except ValueError:
+            return {'id': None, 'ok': False, 'erro': "JSON inválido"}
+        if isinstance(requisicao, list):
+            if len(requisicao) > self.config.MAX_BATCH:
+                return {'id': None, 'ok': False, 'erro': f"Lote maior que {self.config.MAX_BATCH} requisições"}
+            return list(await asyncio.gather(*(self._executar(item, origem) for item in requisicao)))
+        return await self._executar(requisicao, origem)
+
+    async def _executar(self, requisicao, origem: str) -> dict:
+        if not isinstance(requisicao, dict):
+            return {'id': None, 'ok': False, 'erro': "Requisição deve ser um objeto JSON"}
+        id_requisicao = requisicao.get('id')
+        handler = self._ops.get(requisicao.get('op'))
+        if handler is None:
+            return {'id': id_requisicao, 'ok': False, 'erro': f"Operação desconhecida: {requisicao.get('op')}"}
+        try:
+            return {'id': id_requisicao, 'ok': True, 'resultado': await handler(requisicao, origem)}
+        except LoginBloqueado as e:
+            return {'id': id_requisicao, 'ok': False, 'erro': str(e)}
+        except KeyError as e:
+            return {'id': id_requisicao, 'ok': False, 'erro': f"Campo obrigatório ausente: {e.args[0]}"}
+        except (TypeError, ValueError) as e:
+            return {'id': id_requisicao, 'ok': False, 'erro': f"Parâmetro inválido: {str(e)}"}
+        except Exception as e:
+            logging.error(f"Erro no servidor ({requisicao.get('op')}): {str(e)}")
+            return {'id': id_requisicao, 'ok': False, 'erro': "Erro interno"}
+
+    async def _ping(self, requisicao: dict, origem: str) -> str:
+        return "pong"
+
+    async def _login(self, requisicao: dict, origem: str) -> bool:
+        # Mesmo caminho do login pela interface; LoginBloqueado vira uma resposta de erro
+        return await self.api.check_credentials(
+            self.auth, str(requisicao['username']), str(requisicao['password']), origem
+        )
+
+    async def _registrar(self, requisicao: dict, origem: str) -> dict:
+        sucesso, mensagem = await self.api.register_user(str(requisicao['username']).strip(),
+                                                         str(requisicao['password']).strip())
+        return {'sucesso': sucesso, 'mensagem': mensagem}
+
+    async def _usuarios(self, requisicao: dict, origem: str) -> list:
+        return await self.api.search_users(str(requisicao['termo']))
+
+    @staticmethod
+    def _filtro(requisicao: dict) -> Optional[ProductFilter]:
+        filtro = requisicao.get('filtro')
+        return ProductFilter(**filtro) if filtro else None
+
+    async def _produtos(self, requisicao: dict, origem: str) -> dict:
+        page = await self.api.get_products_page(
+            requisicao.get('cursor'),
+            page_size=int(requisicao.get('page_size', 50)),
+            sort_key=requisicao.get('sort_key', 'data_cadastro'),
+            descending=bool(requisicao.get('descending', True)),
+            offset=int(requisicao.get('offset', 0)),
+            filtro=self._filtro(requisicao)
+        )
+        return {'rows': page.rows, 'next_cursor': page.next_cursor}
+
+    async def _contar(self, requisicao: dict, origem: str) -> int:
+        return await self.api.count_products(self._filtro(requisicao))
+
+async def conectar(config: ServerConfig) -> tuple:
+    """Abre uma conexão com o servidor; retorna (reader, writer)"""
+    if config.UNIX_SOCKET:
+        return await asyncio.open_unix_connection(config.UNIX_SOCKET, limit=config.MAX_LINE_BYTES)
+    return await asyncio.open_connection(config.HOST, config.PORT, limit=config.MAX_LINE_BYTES)
+
+def percentil(valores: list, fracao: float) -> float:
+    """Percentil de uma lista já ordenada"""
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))] if valores else 0.0
+
+async def gerar_carga(config: ServerConfig, requisicao: Callable[[int], dict], clientes: int = 20,
+                      total: int = 5000, lote: int = 1, keep_alive: bool = True) -> dict:
+    """Envia total requisições com clientes conexões simultâneas, lote requisições por linha.
+
+    requisicao(i) monta a i-ésima requisição. Sem keep_alive, cada linha abre
+    uma conexão nova. Retorna requisições/s e latências (s) de ida e volta por linha.
+    """
+    latencias = []
+    falhas = 0
+    primeiro_erro = None
+
+    async def enviar(reader, writer, indices: list) -> None:
+        nonlocal falhas, primeiro_erro
+        itens = [dict(requisicao(i), id=i) for i in indices]
+        linha = itens if lote > 1 else itens[0]
+        inicio = time.perf_counter()
+        writer.write(json.dumps(linha).encode('utf-8') + b'\n')
+        await writer.drain()
+        resposta = json.loads(await reader.readline())
+        latencias.append(time.perf_counter() - inicio)
+        for item in (resposta if isinstance(resposta, list) else [resposta]):
+            if not item.get('ok'):
+                falhas += 1
+                primeiro_erro = primeiro_erro or item.get('erro')
+
+    async def cliente(c: int) -> None:
+        linhas = [list(range(inicio, min(inicio + lote, total)))
+                  for inicio in range(c * lote, total, clientes * lote)]
+        if keep_alive:
+            reader, writer = await conectar(config)
+            try:
+                for indices in linhas:
+                    await enviar(reader, writer, indices)
+            finally:
+                writer.close()
+                await writer.wait_closed()
+            return
+        for indices in linhas:
+            reader, writer = await conectar(config)
+            try:
+                await enviar(reader, writer, indices)
+            finally:
+                writer.close()
+                await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(cliente(c) for c in range(clientes)))
+    elapsed = time.perf_counter() - start
+    latencias.sort()
+    return {
+        'requisicoes': total,
+        'falhas': falhas,
+        'primeiro_erro': primeiro_erro,
+        'segundos': elapsed,
+        'requisicoes_s': total / elapsed,
+        'p50': percentil(latencias, 0.50),
+        'p99': percentil(latencias, 0.99),
+    }
+
+def imprimir_carga(rotulo: str, resultado: dict) -> None:
+    print(f"{rotulo:<40} {resultado['requisicoes_s']:>10,.0f} req/s  "
+          f"p50 {resultado['p50'] * 1e3:.2f} ms  p99 {resultado['p99'] * 1e3:.2f} ms"
+          + (f"  {resultado['falhas']} falhas" if resultado['falhas'] else ""))
+    if resultado['falhas'] * 2 > resultado['requisicoes']:
+        # Com a maioria das respostas sendo erro, os números medem a recusa, não a operação
+        print(f"ATENÇÃO: {resultado['falhas']} de {resultado['requisicoes']} requisições falharam "
+              f"({resultado.get('primeiro_erro')}); req/s e latências não são da operação pedida. "
+              f"Para login, suba o servidor com --sem-limite.")
+
+async def servir(db_config: DatabaseConfig, server_config: ServerConfig) -> None:
+    api = AsyncUserDB(UserDB(db_config))
+    server = await AuthServer(api, server_config).start()
+    endereco = server_config.UNIX_SOCKET or f"{server_config.HOST}:{server_config.PORT}"
+    print(f"Servidor de autenticação em {endereco}")
+    if not db_config.LOGIN_RATE_LIMIT:
+        print("ATENÇÃO: limite de tentativas de login desativado")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await api.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor de autenticação do projeto_empresa")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    for nome in ("servir", "carga"):
+        sub = subparsers.add_parser(nome)
+        sub.add_argument("--host", default=ServerConfig.HOST)
+        sub.add_argument("--port", type=int, default=ServerConfig.PORT)
+        sub.add_argument("--unix")
+        if nome == "servir":
+            sub.add_argument("--db", default=DatabaseConfig.DB_NAME)
+            sub.add_argument("--sem-limite", action="store_true",
+                             help="desativa o limite de tentativas de login (só para testes de carga)")
+        else:
+            sub.add_argument("--op", choices=("ping", "login", "usuarios", "produtos"), default="login")
+            sub.add_argument("--username", default="")
+            sub.add_argument("--password", default="")
+            sub.add_argument("--clientes", type=int, default=20)
+            sub.add_argument("--requisicoes", type=int, default=5000)
+            sub.add_argument("--lote", type=int, default=1)
+            sub.add_argument("--sem-keep-alive", action="store_true")
+    args = parser.parse_args()
+    server_config = ServerConfig(HOST=args.host, PORT=args.port, UNIX_SOCKET=args.unix)
+
+    try:
+        if args.comando == "servir":
+            db_config = DatabaseConfig(DB_NAME=args.db, LOGIN_RATE_LIMIT=not args.sem_limite)
+            asyncio.run(servir(db_config, server_config))
+            return
+        requisicoes = {
+            "ping": {'op': 'ping'},
+            "login": {'op': 'login', 'username': args.username, 'password': args.password},
+            "usuarios": {'op': 'usuarios', 'termo': args.username[:2]},
+            "produtos": {'op': 'produtos', 'page_size': 50},
+        }
+        resultado = asyncio.run(gerar_carga(
+            server_config, lambda i: requisicoes[args.op], args.clientes, args.requisicoes,
+            args.lote, not args.sem_keep_alive
+        ))
+        imprimir_carga(f"{args.op} (lote {args.lote})", resultado)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Tokens de sessão assinados (HMAC-SHA256) emitidos pelo AuthManager após o login.
+
+Formato do token: base64url(payload JSON) + "." + base64url(assinatura), com
+payload {"u": usuário, "s": id da sessão, "e": expiração em epoch}. A
+verificação confere a assinatura e a validade e procura a sessão num dicionário
+em memória, sem consultar o banco nem refazer o hash da senha. O store guarda
+as sessões ativas para permitir logout; o SQLiteSessionStore também grava em
+disco, para sessões sobreviverem a um reinício.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from config import DatabaseConfig
+
+PREFERENCIA_CHAVE = 'sessoes.chave'
+
+@dataclass(frozen=True)
+class Sessao:
+    username: str
+    session_id: str
+    expira: float
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+class MemorySessionStore:
+    """Sessões ativas em memória, removidas ao expirar e limitadas a max_sessions.
+
+    Como todas usam o mesmo TTL, a ordem de inserção é a ordem de expiração:
+    a limpeza só percorre as sessões vencidas no início do OrderedDict.
+    """
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._sessoes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, sessao: Sessao) -> None:
+        with self._lock:
+            self._sessoes[sessao.session_id] = sessao
+            self._purge_locked(time.time())
+            while len(self._sessoes) > self.max_sessions:
+                self._sessoes.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[Sessao]:
+        sessao = self._sessoes.get(session_id)
+        if sessao is not None and sessao.expira <= time.time():
+            self.revoke(session_id)
+            return None
+        return sessao
+
+    def revoke(self, session_id: str) -> None:
+        with self._lock:
+            self._sessoes.pop(session_id, None)
+
+    def revoke_user(self, username: str) -> int:
+        """Encerra todas as sessões do usuário (ex.: troca de senha); retorna quantas"""
+        with self._lock:
+            ids = [session_id for session_id, sessao in self._sessoes.items() if sessao.username == username]
+            for session_id in ids:
+                del self._sessoes[session_id]
+        return len(ids)
+
+    def purge(self) -> int:
+        with self._lock:
+            return self._purge_locked(time.time())
+
+    def _purge_locked(self, agora: float) -> int:
+        removidas = 0
+        while self._sessoes:
+            session_id, sessao = next(iter(self._sessoes.items()))
+            if sessao.expira > agora:
+                break
+            del self._sessoes[session_id]
+            removidas += 1
+        return removidas
+
+    def __len__(self) -> int:
+        return len(self._sessoes)
+
+class SQLiteSessionStore(MemorySessionStore):
+    """MemorySessionStore que também grava as sessões numa tabela do SQLite.
+
+    As sessões válidas são carregadas na criação; depois disso o banco só recebe
+    escritas (login, logout, limpeza), e a verificação continua em memória.
+    """
+
+    def __init__(self, pool, max_sessions: int = 10000):
+        super().__init__(max_sessions)
+        self.pool = pool
+        self._carregar()
+
+    def _carregar(self) -> None:
+        try:
+            with self.pool.connection() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS sessoes (
+                        id TEXT PRIMARY KEY,
+                        username TEXT NOT NULL,
+                        expira REAL NOT NULL
+                    )
+                ''')
+                conn.execute("DELETE FROM sessoes WHERE expira <= ?", (time.time(),))
+                rows = conn.execute("SELECT id, username, expira FROM sessoes ORDER BY expira").fetchall()
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao carregar sessões: {str(e)}")
+            return
+        for session_id, username, expira in rows[-self.max_sessions:]:
+            self._sessoes[session_id] = Sessao(username, session_id, expira)
+
+    def _executar(self, sql: str, params: tuple) -> None:
+        try:
+            with self.pool.connection() as conn:
+                conn.execute(sql, params)
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao gravar sessões: {str(e)}")
+
+    def add(self, sessao: Sessao) -> None:
+        super().add(sessao)
+        self._executar("INSERT OR REPLACE INTO sessoes (id, username, expira) VALUES (?, ?, ?)",
+                       (sessao.session_id, sessao.username, sessao.expira))
+
+    def revoke(self, session_id: str) -> None:
+        super().revoke(session_id)
+        self._executar("DELETE FROM sessoes WHERE id = ?", (session_id,))
+
+    def revoke_user(self, username: str) -> int:
+        removidas = super().revoke_user(username)
+        self._executar("DELETE FROM sessoes WHERE username = ?", (username,))
+        return removidas
+
+    def purge(self) -> int:
+        removidas = super().purge()
+        self._executar("DELETE FROM sessoes WHERE expira <= ?", (time.time(),))
+        return removidas
+
+class SessionManager:
+    """Emite e verifica tokens de sessão"""
+
+    def __init__(self, secret: bytes, store: MemorySessionStore, ttl: float):
+        self.secret = secret
+        self.store = store
+        self.ttl = ttl
+
+    def _assinar(self, payload: str) -> str:
+        return _b64encode(hmac.new(self.secret, payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, username: str) -> str:
+        sessao = Sessao(username, secrets.token_urlsafe(16), time.time() + self.ttl)
+        self.store.add(sessao)
+        payload = _b64encode(json.dumps(
+            {'u': sessao.username, 's': sessao.session_id, 'e': sessao.expira}, separators=(',', ':')
+        ).encode())
+        return f"{payload}.{self._assinar(payload)}"
+
+    def verify(self, token: str) -> Optional[Sessao]:
+        """Sessão do token, ou None se a assinatura não confere, venceu ou houve logout"""
+        try:
+            payload, assinatura = token.split('.')
+            if not hmac.compare_digest(assinatura, self._assinar(payload)):
+                return None
+            dados = json.loads(_b64decode(payload))
+        except (AttributeError, ValueError):
+            return None
+        if dados['e'] <= time.time():
+            return None
+        sessao = self.store.get(dados['s'])
+        if sessao is None or sessao.username != dados['u']:
+            return None
+        return sessao
+
+    def revoke(self, token: str) -> None:
+        sessao = self.verify(token)
+        if sessao is not None:
+            self.store.revoke(sessao.session_id)
+
+def _chave(db, config: DatabaseConfig) -> bytes:
+    if config.SESSION_SECRET:
+        return config.SESSION_SECRET.encode()
+    if config.SESSION_STORE != 'sqlite':
+        # Sessões só em memória: uma chave por execução basta
+        return os.urandom(32)
+    # Sessões persistidas precisam da mesma chave após reiniciar
+    chave = db.get_preference(PREFERENCIA_CHAVE)
+    if chave is None:
+        chave = secrets.token_urlsafe(32)
+        db.set_preference(PREFERENCIA_CHAVE, chave)
+    return chave.encode()
+
+def get_session_manager(db) -> SessionManager:
+    """Retorna o gerenciador de sessões compartilhado do banco, criado conforme db.config"""
+    manager = getattr(db, '_session_manager', None)
+    if manager is None:
+        config = db.config
+        if config.SESSION_STORE == 'sqlite' and hasattr(db, 'pool'):
+            store = SQLiteSessionStore(db.pool, config.SESSION_MAX)
+        else:
+            if config.SESSION_STORE not in ('memoria', 'sqlite'):
+                raise ValueError(f"Armazenamento de sessões desconhecido: {config.SESSION_STORE}")
+            store = MemorySessionStore(config.SESSION_MAX)
+        manager = db._session_manager = SessionManager(_chave(db, config), store, config.SESSION_TTL)
+    return manager
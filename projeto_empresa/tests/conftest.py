@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos de projeto_empresa são importados pelo nome, como nos programas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
@@ -0,0 +1,125 @@
+"""Conformidade dos backends de armazenamento: as mesmas operações devem dar o mesmo resultado em todos.
+
+O backend mongo roda sobre o mongomock (pip install -r requirements-dev.txt); sem ele, os casos
+do mongo são pulados com o motivo no relatório do pytest (-rs).
+"""
+import hashlib
+import pytest
+from armazenamento import MemoryStorage, Storage
+from config import DatabaseConfig
+from db import PRODUCT_SORT_KEYS, ProductFilter, UserDB
+
+NOMES = ["Café Torrado", "cafeteira", "Arroz Integral", "açúcar", "Feijão", "arroz branco"]
+
+class Backend:
+    """abrir() cria o storage (de novo, sobre os mesmos dados); inserir_legado(storage, username, hash)
+    grava um usuário como as versões antigas: sha256 sem sal e sem os campos novos"""
+
+    def __init__(self, abrir, inserir_legado=None):
+        self.abrir = abrir
+        self.inserir_legado = inserir_legado
+
+def _config(tmp_path) -> DatabaseConfig:
+    return DatabaseConfig(DB_NAME=str(tmp_path / "conformidade.db"), BLOOM_FILE=str(tmp_path / "usuarios.bloom"),
+                          PBKDF2_ITERATIONS=1000, CHANGE_POLL_INTERVAL=0)
+
+def _inserir_legado_sqlite(storage, username: str, hashed: str) -> None:
+    with storage.pool.connection() as conn:
+        conn.execute(f"INSERT INTO {storage.config.TABLE_NAME} (username, password) VALUES (?, ?)",
+                     (username, hashed))
+        conn.commit()
+
+def _inserir_legado_mongo(storage, username: str, hashed: str) -> None:
+    storage.users.insert_one({'username': username, 'password': hashed})
+
+@pytest.fixture(params=['sqlite', 'memoria', 'mongo'])
+def backend(request, tmp_path) -> Backend:
+    if request.param == 'sqlite':
+        return Backend(lambda: UserDB(_config(tmp_path)), _inserir_legado_sqlite)
+    if request.param == 'memoria':
+        return Backend(lambda: MemoryStorage(_config(tmp_path)))
+    mongomock = pytest.importorskip("mongomock", reason="mongomock não instalado: pip install -r requirements-dev.txt")
+    from armazenamento_mongo import MongoStorage
+    # Um cliente só, para o storage reaberto ver os mesmos dados
+    cliente = mongomock.MongoClient()
+    return Backend(lambda: MongoStorage(_config(tmp_path), client_factory=lambda uri, **opcoes: cliente),
+                   _inserir_legado_mongo)
+
+@pytest.fixture
+def storage(backend):
+    storage = backend.abrir()
+    yield storage
+    storage.close()
+
+@pytest.fixture
+def produtos(storage):
+    storage.register_products([(nome, (i * 7) % 11, 1.5 * (i + 1)) for i, nome in enumerate(NOMES)])
+    return storage
+
+def test_protocolo(storage):
+    assert isinstance(storage, Storage)
+
+def test_usuarios(storage):
+    assert storage.register_user("conformidade", "segredo1")[0]
+    assert not storage.register_user("conformidade", "segredo1")[0]
+    assert not storage.register_user("ab", "segredo1")[0]
+    assert storage.validate_user("conformidade", "segredo1")
+    assert not storage.validate_user("conformidade", "errada")
+    assert not storage.validate_user("inexistente", "segredo1")
+    assert storage.search_users("CONF") == ["conformidade"]
+
+def test_usuario_legado(backend):
+    if backend.inserir_legado is None:
+        pytest.skip("backend sem persistência")
+    storage = backend.abrir()
+    backend.inserir_legado(storage, "legado", hashlib.sha256(b"segredo1").hexdigest())
+    storage.close()
+    storage = backend.abrir()
+    try:
+        assert storage.validate_user("legado", "segredo1")
+        assert not storage.validate_user("legado", "errada")
+        # O hash é refeito no formato atual e o login continua valendo
+        assert storage.validate_user("legado", "segredo1")
+        assert storage.search_users("leg") == ["legado"]
+    finally:
+        storage.close()
+
+def test_filtros(produtos):
+    assert produtos.count_products() == len(NOMES)
+    assert produtos.count_products(ProductFilter(texto="cafe")) == 2
+    assert produtos.count_products(ProductFilter(texto="arroz", preco_max=5.0)) == 1
+
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('sort_key', PRODUCT_SORT_KEYS)
+def test_paginacao(produtos, sort_key, descending):
+    ids, cursor = [], None
+    while True:
+        page = produtos.get_products_page(cursor, page_size=2, sort_key=sort_key, descending=descending)
+        ids.extend(row[0] for row in page.rows)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    assert sorted(ids) == list(range(1, len(NOMES) + 1))
+    deslocado = produtos.get_products_page(page_size=2, sort_key=sort_key, descending=descending, offset=3)
+    assert [row[0] for row in deslocado.rows] == ids[3:5]
+
+def test_ordem_por_nome(produtos):
+    page = produtos.get_products_page(page_size=len(NOMES), sort_key='nome', descending=False)
+    assert [row[1] for row in page.rows][:2] == ["arroz branco", "Arroz Integral"]
+
+def test_versoes(produtos):
+    produto = produtos.get_product(1)
+    assert produtos.update_product(1, "Café Moído", 3, 9.9, produto[-1])[0]
+    assert not produtos.update_product(1, "Outro", 3, 9.9, produto[-1])[0]
+    assert not produtos.adjust_stock(1, -4)[0]
+    assert produtos.adjust_stock(1, -3)[2][2] == 0
+    atual = produtos.get_product(2)
+    assert not produtos.delete_product(2, atual[-1] + 1)[0]
+    assert produtos.delete_product(2, atual[-1])[0]
+    assert produtos.get_product(2) is None
+    assert sum(len(rows) for rows in produtos.iter_products(batch_size=2)) == len(NOMES) - 1
+
+def test_preferencias(storage):
+    assert storage.get_preference("ordem", "x") == "x"
+    storage.set_preference("ordem", ["nome", True])
+    assert storage.get_preference("ordem") == ["nome", True]
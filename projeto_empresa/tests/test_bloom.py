@@ -0,0 +1,76 @@
+"""Filtro de nomes: ausências respondidas sem ir ao banco e arquivo de um processo só."""
+import threading
+import time
+from bloom import UsernameBloom
+
+class Banco:
+    """Usuários (seq, username) em memória; liberado controla se uma consulta pode terminar"""
+
+    def __init__(self, nomes):
+        self.usuarios = list(enumerate(nomes, 1))
+        self.liberado = threading.Event()
+        self.liberado.set()
+        self.consultas = 0
+
+    def carregar_desde(self, marcador: int) -> list:
+        self.consultas += 1
+        self.liberado.wait()
+        return [(seq, nome) for seq, nome in self.usuarios if seq > marcador]
+
+    def marcador_maximo(self) -> int:
+        return len(self.usuarios)
+
+    def cadastrar(self, nome: str) -> None:
+        self.usuarios.append((len(self.usuarios) + 1, nome))
+
+def _abrir(path, banco: Banco, intervalo: float = 0.0) -> UsernameBloom:
+    return UsernameBloom(str(path), 1000, 0.01, banco.carregar_desde, banco.marcador_maximo, intervalo)
+
+def test_ausencia_nao_espera_o_banco(tmp_path):
+    banco = Banco(["ana", "bruno"])
+    bloom = _abrir(tmp_path / "usuarios.bloom", banco)
+    try:
+        banco.cadastrar("carla")
+        # Um banco lento não atrasa a resposta: o sync vai para segundo plano
+        banco.liberado.clear()
+        inicio = time.monotonic()
+        assert not bloom.might_exist("carla")
+        assert not bloom.might_exist("carla")
+        assert time.monotonic() - inicio < 0.5
+        banco.liberado.set()
+        bloom._sync_fundo.join()
+        assert bloom.might_exist("carla")
+    finally:
+        banco.liberado.set()
+        bloom.close()
+
+def test_ausencia_recente_nao_sincroniza(tmp_path):
+    banco = Banco(["ana"])
+    bloom = _abrir(tmp_path / "usuarios.bloom", banco, intervalo=3600)
+    try:
+        consultas = banco.consultas
+        for i in range(100):
+            assert not bloom.might_exist(f"inexistente{i}")
+        assert banco.consultas == consultas
+    finally:
+        bloom.close()
+
+def test_arquivo_de_um_processo(tmp_path):
+    path = tmp_path / "usuarios.bloom"
+    banco = Banco(["ana", "bruno"])
+    dono = _abrir(path, banco)
+    # O arquivo travado pelo primeiro fica com ele; o segundo usa um filtro em memória
+    outro = _abrir(path, banco)
+    try:
+        assert dono.filtro.path == str(path)
+        assert outro.filtro.path is None
+        assert outro.might_exist("bruno")
+    finally:
+        outro.close()
+        dono.close()
+    reaberto = _abrir(path, banco, intervalo=3600)
+    try:
+        assert reaberto.filtro.path == str(path) and not reaberto.filtro.recriado
+        assert reaberto.might_exist("ana")
+    finally:
+        reaberto.close()
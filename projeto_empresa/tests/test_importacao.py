@@ -0,0 +1,35 @@
+"""Importação em lote: valores que o banco não guarda voltam como linhas rejeitadas, sem derrubar o lote."""
+import pytest
+from config import DatabaseConfig
+from db import UserDB
+from importacao import importar_produtos
+
+@pytest.fixture
+def db(tmp_path):
+    db = UserDB(DatabaseConfig(DB_NAME=str(tmp_path / "importacao.db"), BLOOM_FILE=str(tmp_path / "usuarios.bloom"),
+                               CHANGE_POLL_INTERVAL=0))
+    yield db
+    db.close()
+
+def _importar(db, tmp_path, quantidade: str, preco: str):
+    arquivo = tmp_path / "produtos.csv"
+    arquivo.write_text(f"nome,quantidade,preco\nValido,3,2.5\nInvalido,{quantidade},{preco}\n", encoding='utf-8')
+    return importar_produtos(db, str(arquivo))
+
+@pytest.mark.parametrize('quantidade, preco, motivo', [
+    ('99999999999999999999', '2.5', "Quantidade inválida"),
+    ('9223372036854775808', '2.5', "Quantidade inválida"),
+    ('3', 'nan', "Preço inválido"),
+    ('3', 'inf', "Preço inválido"),
+    ('3', '1e400', "Preço inválido"),
+])
+def test_valores_fora_do_banco(db, tmp_path, quantidade, preco, motivo):
+    result = _importar(db, tmp_path, quantidade, preco)
+    assert result.error is None
+    assert result.imported == 1
+    assert result.rejected == [(3, motivo)]
+    assert [row[1] for row in db.get_all_products()] == ["Valido"]
+
+def test_maior_quantidade(db, tmp_path):
+    result = _importar(db, tmp_path, '9223372036854775807', '2.5')
+    assert result.error is None and result.imported == 2
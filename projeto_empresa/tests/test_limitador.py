@@ -0,0 +1,62 @@
+"""Limite de tentativas de login: contadores de falhas sobrevivem ao reinício, gravados em lote."""
+import pytest
+from config import DatabaseConfig
+from db import AuthManager, UserDB
+from limitador import LoginBloqueado
+
+def _config(tmp_path, **opcoes) -> DatabaseConfig:
+    # Buckets folgados: aqui só interessa o bloqueio por falhas seguidas
+    opcoes = dict(dict(LOGIN_BURST_USER=100, LOGIN_BURST_SOURCE=100), **opcoes)
+    return DatabaseConfig(DB_NAME=str(tmp_path / "limitador.db"), BLOOM_FILE=str(tmp_path / "usuarios.bloom"),
+                          PBKDF2_ITERATIONS=1000, CHANGE_POLL_INTERVAL=0, **opcoes)
+
+def _linhas(db) -> list:
+    with db.pool.connection() as conn:
+        return conn.execute("SELECT username, falhas FROM falhas_login ORDER BY username").fetchall()
+
+def test_falhas_sobrevivem_ao_reinicio(tmp_path):
+    db = UserDB(_config(tmp_path))
+    db.register_user("alvo", "segredo1")
+    auth = AuthManager(db)
+    for _ in range(4):
+        assert not auth.check_credentials("alvo", "errada")
+    db.close()
+
+    db = UserDB(_config(tmp_path))
+    try:
+        auth = AuthManager(db)
+        assert not auth.check_credentials("alvo", "errada")
+        with pytest.raises(LoginBloqueado):
+            auth.check_credentials("alvo", "segredo1")
+    finally:
+        db.close()
+
+def test_gravacao_em_lote(tmp_path):
+    db = UserDB(_config(tmp_path, LOGIN_FAILURES_FLUSH_INTERVAL=3600))
+    try:
+        auth = AuthManager(db)
+        for i in range(20):
+            auth.check_credentials(f"inexistente{i}", "errada")
+        # Abaixo do bloqueio nada vai ao banco antes do intervalo (ou do close)
+        assert _linhas(db) == []
+        auth.limiter.flush()
+        assert len(_linhas(db)) == 20
+
+        db.register_user("alvo", "segredo1")
+        auth.check_credentials("alvo", "errada")
+        assert auth.check_credentials("alvo", "segredo1")
+        auth.limiter.flush()
+        assert "alvo" not in dict(_linhas(db))
+    finally:
+        db.close()
+
+def test_tabela_limitada(tmp_path):
+    db = UserDB(_config(tmp_path, LOGIN_LIMITER_MAX_KEYS=10, LOGIN_BURST_SOURCE=1000))
+    try:
+        auth = AuthManager(db)
+        for i in range(50):
+            auth.check_credentials(f"inexistente{i}", "errada")
+        auth.limiter.flush()
+        assert len(_linhas(db)) == 10
+    finally:
+        db.close()
@@ -0,0 +1,37 @@
+import math
+from typing import Optional
+
+# Maior inteiro que o SQLite guarda (INTEGER de 64 bits com sinal)
+INTEIRO_MAXIMO = 2 ** 63 - 1
+
+def validar_usuario(username: str, password: str, config) -> Optional[str]:
+    """Confere os tamanhos mínimos do DatabaseConfig; retorna a mensagem de erro ou None"""
+    if len(username) < config.MIN_USERNAME_LENGTH:
+        return f"Nome de usuário muito curto (mínimo {config.MIN_USERNAME_LENGTH} caracteres)"
+    if len(password) < config.MIN_PASSWORD_LENGTH:
+        return f"Senha muito curta (mínimo {config.MIN_PASSWORD_LENGTH} caracteres)"
+    return None
+
+def validar_produto(nome: str, quantidade: str, preco: str) -> Optional[str]:
+    """Valida os campos de um produto; retorna a mensagem de erro ou None se válido.
+
+    Regras compartilhadas pelo formulário de cadastro e pela importação em lote.
+    """
+    if not nome:
+        return "Nome do produto é obrigatório"
+
+    try:
+        if not quantidade.isdigit() or not 0 <= int(quantidade) <= INTEIRO_MAXIMO:
+            return "Quantidade inválida"
+    except ValueError:
+        return "Quantidade inválida"
+
+    try:
+        valor = float(preco)
+        # nan e inf passariam no <= 0 (e nan vira NULL no banco)
+        if not math.isfinite(valor) or valor <= 0:
+            raise ValueError
+    except ValueError:
+        return "Preço inválido"
+
+    return None